@@ -33,6 +33,8 @@ class MainWindow(QMainWindow):
 
         # Connect task manager signals
         self.task_manager.progress.connect(self.on_progress_update)
+        self.task_manager.link_progress.connect(self.on_link_progress)
+        self.task_manager.workload_discovered.connect(self.on_workload_discovered)
         self.task_manager.error.connect(self.on_error)
         self.task_manager.all_tasks_completed.connect(self.on_all_tasks_completed)
 
@@ -115,14 +117,8 @@ class MainWindow(QMainWindow):
             self.log_viewer.append("No vault directory selected. Please select a directory first.")
             return
 
-        # Get workload first
-        workload = self.file_manager.get_media_workload(current_directory)
-        if not workload:
-            self.log_viewer.append("No media files found in the selected directory.")
-            return
-
-        # Set up progress tracking
-        self.work_progress.set_work(workload)
+        # Set up progress tracking; the workload is added as the scan finds it
+        self.work_progress.start()
         self.upload_button.setEnabled(False)
         
         # Start processing
@@ -139,6 +135,21 @@ class MainWindow(QMainWindow):
             self.logger.info(message)
             self.log_viewer.append(message)
             self.work_progress.update_progress(item, status)
+        elif status == "compression_progress":
+            self.work_progress.update_progress(item, status)
+
+    def on_workload_discovered(self, items):
+        """Add media files found by the running scan to the progress total"""
+        self.work_progress.add_work(items)
+
+    def on_link_progress(self, notes_done, notes_total):
+        """Report link replacement progress across notes"""
+        if notes_done == notes_total:
+            message = f"Link replacement processed {notes_total} notes"
+            self.logger.info(message)
+            self.log_viewer.append(message)
+        else:
+            self.logger.debug(f"Link replacement: {notes_done}/{notes_total} notes")
 
     def on_error(self, error_message):
         """Handle error messages from task manager"""
@@ -194,5 +205,8 @@ class MainWindow(QMainWindow):
             self.tray_icon.setParent(None)  # Remove parent to prevent ghost process
             self.tray_icon = None
 
+        # Compressed images spilled to disk are of no use once the app is gone
+        self.file_manager.remove_spill_dir()
+
         # Quit the application
         QApplication.instance().quit()
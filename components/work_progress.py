@@ -1,4 +1,5 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QProgressBar
+import os
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QProgressBar, QLabel
 from PyQt6.QtCore import pyqtSignal
 from utils.logger import Logger
 
@@ -28,6 +29,11 @@ class WorkProgress(QWidget):
         self.progress_bar.setValue(0)
         layout.addWidget(self.progress_bar)
 
+        # Live status of the most recently reported video encode
+        self.encode_label = QLabel()
+        layout.addWidget(self.encode_label)
+        self.encode_item = None
+
     def reset(self):
         """Reset progress bar"""
         self.logger.debug("Resetting progress bar")
@@ -36,6 +42,7 @@ class WorkProgress(QWidget):
         self.progress_bar.setValue(0)
         self.is_processing = False
         self.workload = None
+        self.clear_encode_status()
 
     def calculate_stage_work(self, item, stage):
         """
@@ -57,6 +64,33 @@ class WorkProgress(QWidget):
             return self.LINK_REPLACEMENT_WORK
         return 0
 
+    def get_stage_fraction(self, item, status):
+        """Get the fraction of a stage done from a partial progress update, or None if unknown"""
+        if status == 'upload_progress':
+            if item.get('total_bytes'):
+                return min(1.0, item.get('bytes_uploaded', 0) / item['total_bytes'])
+        elif status == 'compression_progress':
+            return item.get('compression_fraction')
+        return None
+
+    def show_encode_status(self, item):
+        """Show a video's encode progress, speed and ETA below the progress bar"""
+        text = f"Encoding {os.path.basename(item['path'])}"
+        if item.get('compression_fraction') is not None:
+            text += f": {item['compression_fraction'] * 100:.0f}%"
+        if item.get('encode_speed'):
+            text += f" at {item['encode_speed']:.2f}x"
+        if item.get('compression_eta') is not None:
+            minutes, seconds = divmod(int(item['compression_eta']), 60)
+            text += f", ETA {minutes}:{seconds:02d}"
+        self.encode_label.setText(text)
+        self.encode_item = item
+
+    def clear_encode_status(self):
+        """Clear the encode status"""
+        self.encode_label.clear()
+        self.encode_item = None
+
     def calculate_total_work(self, item):
         """
         Calculate total work units for all stages of a workload item.
@@ -70,20 +104,29 @@ class WorkProgress(QWidget):
         return sum(self.calculate_stage_work(item, stage) 
                   for stage in ['compression', 'upload', 'link'])
 
+    def start(self):
+        """Begin tracking a run whose workload is added as it is discovered"""
+        self.reset()
+        self.is_processing = True
+        self.workload = []
+        self.progress_bar.setMaximum(100)
+
+    def add_work(self, items):
+        """Add newly discovered workload items to the total work"""
+        if not self.is_processing:
+            return
+        self.workload.extend(items)
+        self.total_work += sum(self.calculate_total_work(item) for item in items)
+        self.logger.debug(f"Progress bar total work: {self.total_work} bytes")
+
     def set_work(self, workload):
         """Set up the progress bar based on the workload array"""
         if not workload:
             self.logger.warning("Empty workload provided to progress bar")
             return
             
-        self.reset()
-        self.is_processing = True
-        self.workload = workload
-        
-        # Calculate total work for all items
-        self.total_work = sum(self.calculate_total_work(item) for item in workload)
-        
-        self.progress_bar.setMaximum(100)
+        self.start()
+        self.add_work(workload)
         self.logger.info(f"Progress bar initialized with total work: {self.total_work} bytes")
 
     def update_progress(self, completed_item, status):
@@ -104,7 +147,8 @@ class WorkProgress(QWidget):
             'compression_complete': 'compression',
             'upload_complete': 'upload',
             'link_complete': 'link',
-            'upload_progress': 'upload'  # Add handling for progress updates
+            'upload_progress': 'upload',  # Add handling for progress updates
+            'compression_progress': 'compression'
         }
         
         stage = stage_map.get(status)
@@ -119,18 +163,24 @@ class WorkProgress(QWidget):
                 self.logger.debug(f"Skipping duplicate completion for {stage}")
                 return
             completed_item[stage_key] = True
-            
-        # Calculate work done for this stage
-        if status == 'upload_progress':
-            # For upload progress, we calculate partial work based on the stage
-            work_done = self.calculate_stage_work(completed_item, stage)
-            # Adjust work_done based on bytes_uploaded/total_bytes if available
-            if 'bytes_uploaded' in completed_item and 'total_bytes' in completed_item:
-                progress = min(1.0, completed_item['bytes_uploaded'] / completed_item['total_bytes'])
-                work_done = int(work_done * progress)
+            if status == 'compression_complete' and self.encode_item is completed_item:
+                self.clear_encode_status()
+
+        if status == 'compression_progress':
+            self.show_encode_status(completed_item)
+
+        # Calculate work done for this stage; partial updates only count work not yet counted
+        counted_key = f"{stage}_counted"
+        counted = completed_item.get(counted_key, 0)
+        if status.endswith('_progress'):
+            fraction = self.get_stage_fraction(completed_item, status)
+            if fraction is None or completed_item.get(f"{stage}_completed"):
+                return
+            work_done = max(0, int(self.calculate_stage_work(completed_item, stage) * fraction) - counted)
+            completed_item[counted_key] = counted + work_done
         else:
-            # For completion statuses, we count the full work for the stage
-            work_done = self.calculate_stage_work(completed_item, stage)
+            # For completion statuses, we count the rest of the work for the stage
+            work_done = max(0, self.calculate_stage_work(completed_item, stage) - counted)
         
         self.current_progress += work_done
         percentage = min(100, int((self.current_progress / self.total_work) * 100))
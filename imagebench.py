@@ -0,0 +1,97 @@
+"""
+Benchmark image compression on the thread and process backends.
+
+Runs managers.image_compressor.compress_image over a corpus with a thread
+pool and with a process pool of the same size and reports images/second.
+Without --corpus, a synthetic set of phone-photo-sized and screenshot-sized
+images is generated first.
+
+    python imagebench.py --corpus "D:\\Vault\\attachments" --workers 8
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from PIL import Image, ImageDraw
+from managers.image_compressor import compress_image
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp', '.tif', '.tiff')
+
+
+def generate_corpus(directory, photos, screenshots):
+    """Create JPEG photos (4032x3024, noisy) and PNG screenshots (1170x2532, flat UI blocks)"""
+    paths = []
+    for i in range(photos):
+        path = os.path.join(directory, f"photo_{i}.jpg")
+        img = Image.effect_noise((1008, 756), random.uniform(40, 80)).convert('RGB')
+        img.resize((4032, 3024), Image.Resampling.BICUBIC).save(path, 'JPEG', quality=92)
+        paths.append(path)
+    for i in range(screenshots):
+        path = os.path.join(directory, f"screenshot_{i}.png")
+        img = Image.new('RGB', (1170, 2532), (245, 245, 245))
+        draw = ImageDraw.Draw(img)
+        for y in range(0, 2532, 120):
+            color = tuple(random.randint(0, 255) for _ in range(3))
+            draw.rectangle((40, y + 20, random.randint(300, 1130), y + 90), fill=color)
+        img.save(path, 'PNG')
+        paths.append(path)
+    return paths
+
+
+def run_backend(executor_class, paths, output_dir, workers, max_dimension, quality, fast_downscale):
+    """Compress every path with the given executor and return (elapsed, output bytes)"""
+    jobs = [(path, os.path.join(output_dir, f"{i}.jpg")) for i, path in enumerate(paths)]
+    started = time.perf_counter()
+    with executor_class(max_workers=workers) as executor:
+        futures = [executor.submit(compress_image, src, dst, max_dimension, quality, fast_downscale) for src, dst in jobs]
+        output_bytes = sum(future.result()['size'] for future in futures)
+    return time.perf_counter() - started, output_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--corpus', help="Directory of images to compress (searched recursively)")
+    parser.add_argument('--photos', type=int, default=24, help="Synthetic phone photos without --corpus")
+    parser.add_argument('--screenshots', type=int, default=24, help="Synthetic screenshots without --corpus")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--max-dimension', type=int, default=1280)
+    parser.add_argument('--quality', type=int, default=80)
+    parser.add_argument('--exact', action='store_true', help="Disable the reduced-resolution fast path")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='imagebench_')
+    try:
+        if args.corpus:
+            paths = [
+                os.path.join(root, name)
+                for root, _, names in os.walk(args.corpus)
+                for name in names if name.lower().endswith(IMAGE_EXTENSIONS)
+            ]
+        else:
+            print(f"Generating {args.photos} photos and {args.screenshots} screenshots...")
+            paths = generate_corpus(work_dir, args.photos, args.screenshots)
+        if not paths:
+            print("No images found")
+            return
+        input_bytes = sum(os.path.getsize(path) for path in paths)
+        print(f"{len(paths)} images, {input_bytes / (1024 * 1024):.1f} MB, {args.workers} workers\n")
+
+        for name, executor_class in (('thread', ThreadPoolExecutor), ('process', ProcessPoolExecutor)):
+            output_dir = os.path.join(work_dir, name)
+            os.makedirs(output_dir)
+            elapsed, output_bytes = run_backend(
+                executor_class, paths, output_dir, args.workers, args.max_dimension, args.quality,
+                not args.exact
+            )
+            print(f"{name:8s} {len(paths) / elapsed:8.2f} images/s  {elapsed:7.2f}s  "
+                  f"output {output_bytes / (1024 * 1024):.1f} MB")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
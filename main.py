@@ -2,6 +2,7 @@
 
 import sys
 import logging
+import multiprocessing
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtCore import Qt
 from components.main_window import MainWindow
@@ -44,5 +45,7 @@ def main():
     sys.exit(app.exec())
 
 if __name__ == "__main__":
+    # Required for process pools in PyInstaller builds
+    multiprocessing.freeze_support()
     setup_logging()
     main()
\ No newline at end of file
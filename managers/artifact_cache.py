@@ -0,0 +1,224 @@
+# managers/artifact_cache.py
+
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import threading
+from managers.database import open_database
+from utils.logger import Logger
+
+
+def get_artifact_key(content_hash, settings):
+    """
+    Get the cache key of a compressed output
+
+    Args:
+        content_hash (str): Content hash of the source file
+        settings (dict): Effective compression settings (dimensions, quality or CRF, codec, ...)
+
+    Returns:
+        str: Hex key identifying the source content compressed with these settings
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(content_hash.encode())
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def link_or_copy(source, destination):
+    """Hard link a file, copying it when linking is not possible (e.g. across drives)"""
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+class ArtifactCache:
+    """
+    Size-bounded cache of compressed outputs, keyed by source content and settings.
+
+    Outputs are stored as files in the cache directory with an SQLite index
+    of their size, last use and the compression results needed to fill in a
+    workload item. When the cache grows past its size limit the least
+    recently used outputs are evicted. Hits and misses are counted per run.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS artifacts (
+            key TEXT PRIMARY KEY,
+            filename TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS artifacts_last_used ON artifacts(last_used);
+    """
+
+    def __init__(self, directory, max_bytes):
+        """
+        Open (or create) the cache
+
+        Args:
+            directory (str): Directory holding the cached outputs and their index
+            max_bytes (int): Total size of cached outputs to keep
+        """
+        self.logger = Logger()
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = open_database(os.path.join(directory, 'artifacts.db'), self.SCHEMA)
+        self.reset_stats()
+
+    def close(self):
+        """Close the index database"""
+        with self._lock:
+            self._conn.close()
+
+    def reset_stats(self):
+        """Reset the hit and miss statistics"""
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'hit_bytes': 0, 'time_saved': 0.0}
+
+    def get_stats(self):
+        """
+        Get the statistics of this run along with the current cache size
+
+        Returns:
+            dict: Counters plus 'hit_rate', 'entries' and 'size'
+        """
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM artifacts").fetchone()
+            stats = dict(self.stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else None
+        stats['entries'] = entries
+        stats['size'] = size
+        return stats
+
+    def fetch(self, key, destination):
+        """
+        Place the cached output for a key at destination
+
+        Args:
+            key (str): Cache key, see get_artifact_key
+            destination (str): Path the output is linked or copied to
+
+        Returns:
+            dict: Compression results stored with the output, or None on a miss
+        """
+        entry = self._lookup(key)
+        if entry is None:
+            return None
+        path, size, data = entry
+        link_or_copy(path, destination)
+        self._record_hit(key, size, data)
+        return data
+
+    def read(self, key):
+        """
+        Read the cached output for a key into memory
+
+        Args:
+            key (str): Cache key, see get_artifact_key
+
+        Returns:
+            tuple: (dict, bytes) - (Compression results, Output content), or None on a miss
+        """
+        entry = self._lookup(key)
+        if entry is None:
+            return None
+        path, size, data = entry
+        with open(path, 'rb') as f:
+            content = f.read()
+        self._record_hit(key, size, data)
+        return data, content
+
+    def store(self, key, source, data, extension=None):
+        """
+        Add a compressed output to the cache, evicting the least recently used outputs past the size limit
+
+        Args:
+            key (str): Cache key, see get_artifact_key
+            source (str or bytes): Compressed output file, which is linked or copied, not moved, or its content
+            data (dict): JSON-serializable compression results returned by fetch
+            extension (str, optional): Output extension with the dot, needed when source is bytes
+        """
+        in_memory = isinstance(source, bytes)
+        size = len(source) if in_memory else os.path.getsize(source)
+        if size > self.max_bytes:
+            return
+        if not in_memory:
+            extension = os.path.splitext(source)[1]
+        filename = f"{key}{extension}"
+        # Written under a temporary name so a crash never leaves a truncated output under the key
+        temp_path = os.path.join(self.directory, f".{uuid.uuid4().hex}{extension}")
+        if in_memory:
+            with open(temp_path, 'wb') as f:
+                f.write(source)
+        else:
+            link_or_copy(source, temp_path)
+        os.replace(temp_path, os.path.join(self.directory, filename))
+
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO artifacts (key, filename, size, data, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, filename, size, json.dumps(data), now, now)
+            )
+            self.stats['stores'] += 1
+        self._evict()
+
+    def _lookup(self, key):
+        """Get the path, size and results of a cached output, counting a miss if it is absent or damaged"""
+        with self._lock:
+            row = self._conn.execute("SELECT filename, size, data FROM artifacts WHERE key = ?", (key,)).fetchone()
+        path = row and os.path.join(self.directory, row[0])
+        if row is None or not os.path.exists(path) or os.path.getsize(path) != row[1]:
+            if row is not None:
+                self._remove(key, row[0])
+            with self._lock:
+                self.stats['misses'] += 1
+            return None
+        return path, row[1], json.loads(row[2])
+
+    def _record_hit(self, key, size, data):
+        """Mark an output as just used and count the hit"""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE artifacts SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.stats['hits'] += 1
+            self.stats['hit_bytes'] += size
+            self.stats['time_saved'] += data.get('compression_time', 0.0)
+
+    def _evict(self):
+        """Remove least recently used outputs until the cache fits in max_bytes"""
+        with self._lock:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            victims = []
+            for key, filename, size in self._conn.execute(
+                "SELECT key, filename, size FROM artifacts ORDER BY last_used"
+            ):
+                if total <= self.max_bytes:
+                    break
+                victims.append((key, filename))
+                total -= size
+            self.stats['evictions'] += len(victims)
+        for key, filename in victims:
+            self._remove(key, filename)
+
+    def _remove(self, key, filename):
+        """Drop an entry and its file"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM artifacts WHERE key = ?", (key,))
+        try:
+            os.remove(os.path.join(self.directory, filename))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.logger.error(f"Failed to remove cached output {filename}: {e}")
@@ -0,0 +1,376 @@
+# managers/compression_executor.py
+
+import os
+import time
+from collections import deque
+from PyQt6.QtCore import QObject, pyqtSignal, QThreadPool
+from managers.compression_worker import CompressionStepTask, CompressionTask
+from managers.config_manager import ConfigManager
+from managers.image_compressor import estimate_decode_memory
+from managers.video_compressor import ENCODE_AUDIO, REMUX
+from utils.logger import Logger
+
+
+class CompressionExecutor(QObject):
+    """
+    Single compression queue that budgets CPU cores across images and videos.
+
+    Each image job costs one core; each video job runs ffmpeg with an
+    explicit thread count and costs that many cores. Jobs start while their
+    cost fits the free budget, and at most 'max_video_jobs' videos run at
+    once. Images take whatever the running videos leave free, so they pick
+    up the slack as soon as videos finish; while a video is waiting for its
+    cores, no new images start, so a steady stream of images cannot starve it.
+    Videos whose metadata was probed at scan time and that will only be
+    stream-copied cost a single core, since ffmpeg does no encoding for them.
+
+    Images are also admitted against a memory budget, using the decode
+    footprint estimated from the header probed at scan time. An image whose
+    estimate exceeds the whole budget is decoded at reduced resolution and,
+    if still too large, runs with no other image in flight.
+
+    Long videos that FileManager splits into segments come back with
+    item['segment_plan'] set. Their segment encodes are queued ahead of
+    everything else, each costing 'video_threads' cores, so one long video
+    spreads across the whole budget instead of a single ffmpeg process; once
+    every segment is encoded the join runs as a one-core step and the video
+    is reported finished.
+    """
+
+    progress = pyqtSignal(dict, str)  # item, status
+    error = pyqtSignal(str)
+    compression_finished = pyqtSignal(dict)  # item, with 'error' set on failure
+
+    DEFAULT_IMAGE_MEMORY = 64 * 1024 * 1024  # Assumed for images whose header could not be read
+
+    def __init__(self, file_manager):
+        super().__init__()
+        self.file_manager = file_manager
+        self.config_manager = ConfigManager()
+        self.logger = Logger()
+
+        config = self.config_manager.get('compression', {})
+        self.cores = max(1, config.get('cores') or os.cpu_count() or 1)
+        self.max_video_jobs = max(1, config.get('max_video_jobs') or self.cores // 4)
+        # By default the video jobs together leave about one job's share of cores to images
+        video_threads = config.get('video_threads') or self.cores // (self.max_video_jobs + 1)
+        self.video_threads = max(1, min(video_threads, self.cores))
+        self.memory_budget = config.get('memory_budget_mb', 2048) * 1024 * 1024
+
+        # Video jobs hold a pool thread while ffmpeg runs, so the pool never limits admission
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(self.cores + self.max_video_jobs)
+        self.reset()
+
+    def reset(self):
+        """Drop queued jobs and reset the statistics"""
+        self.queues = {'image': deque(), 'video': deque()}
+        self.running = {'image': 0, 'video': 0}
+        self.segment_queue = deque()  # (item, step, index)
+        self.segmented = {}  # id(item) -> pending steps and timing of a segmented video
+        self.cores_used = 0
+        self.memory_used = 0
+        self.peak_memory = 0
+        self.stats = {
+            kind: {'jobs': 0, 'failed': 0, 'bytes': 0, 'run_time': 0.0, 'wait_time': 0.0, 'max_latency': 0.0}
+            for kind in self.queues
+        }
+        self.video_paths = {}
+        self.video_work = {'encoded': [0.0, 0.0], 'copied': [0.0, 0.0]}  # pixels, seconds
+        self.busy_since = None
+        self.busy_time = 0.0
+        self.file_manager.reset_cache_stats()
+
+    def submit(self, item):
+        """Queue a workload item for compression"""
+        kind = 'video' if item['type'] == 'video' else 'image'
+        memory = self._estimate_memory(item) if kind == 'image' else 0
+        if kind == 'video' and item.get('video_info'):
+            item['planned_video_path'], _ = self.file_manager.get_video_path(item['video_info'])
+        self.queues[kind].append((item, time.monotonic(), memory))
+        self._dispatch()
+
+    def _estimate_memory(self, item):
+        """Estimate an image job's peak memory, switching oversized JPEGs to reduced decoding"""
+        info = item.get('image_info')
+        if not info:
+            return self.DEFAULT_IMAGE_MEMORY
+        fast_downscale = getattr(self.file_manager, 'fast_downscale', True)
+        memory = estimate_decode_memory(info, fast_downscale=fast_downscale)
+        if memory <= self.memory_budget:
+            return memory
+
+        # Only JPEGs can be decoded at a reduced size (draft mode); other formats are always decoded in full
+        if info.get('format') == 'JPEG':
+            item['reduced_decode'] = True
+            memory = estimate_decode_memory(info, fast_downscale=fast_downscale, reduced_decode=True)
+            if memory <= self.memory_budget:
+                self.logger.info(
+                    f"Image {item['path']} ({info['width']}x{info['height']}) exceeds the memory budget, "
+                    f"using reduced decoding (~{memory / (1024 * 1024):.0f} MB)"
+                )
+                return memory
+        self.logger.info(
+            f"Image {item['path']} ({info['width']}x{info['height']}) exceeds the memory budget, "
+            f"running it alone (~{memory / (1024 * 1024):.0f} MB)"
+        )
+        return memory
+
+    def queue_depth(self):
+        """Get the number of jobs waiting for cores"""
+        return sum(len(queue) for queue in self.queues.values()) + len(self.segment_queue)
+
+    def get_stats(self):
+        """
+        Get throughput and per-job latency of the compression jobs
+
+        Returns:
+            dict: Per-type job counts, average run and wait times, and overall jobs/s and MB/s
+        """
+        busy_time = self.busy_time
+        if self.busy_since is not None:
+            busy_time += time.monotonic() - self.busy_since
+
+        stats = {
+            'cores': self.cores,
+            'cores_used': self.cores_used,
+            'memory_used': self.memory_used,
+            'peak_memory': self.peak_memory,
+            'video_threads': self.video_threads,
+            'queued': {kind: len(queue) for kind, queue in self.queues.items()},
+            'running': dict(self.running),
+            'queued_segments': len(self.segment_queue),
+            'segmented_videos': len(self.segmented),
+            'busy_time': busy_time
+        }
+        total_jobs = 0
+        total_bytes = 0
+        for kind, kind_stats in self.stats.items():
+            jobs = kind_stats['jobs']
+            stats[kind] = dict(kind_stats)
+            stats[kind]['avg_run_time'] = kind_stats['run_time'] / jobs if jobs else 0.0
+            stats[kind]['avg_wait_time'] = kind_stats['wait_time'] / jobs if jobs else 0.0
+            total_jobs += jobs
+            total_bytes += kind_stats['bytes']
+        stats['video_paths'] = dict(self.video_paths)
+        stats['video_time_saved'] = self.estimate_video_time_saved()
+        stats['jobs_per_second'] = total_jobs / busy_time if busy_time else 0.0
+        stats['mb_per_second'] = total_bytes / (1024 * 1024) / busy_time if busy_time else 0.0
+        return stats
+
+    def estimate_video_time_saved(self):
+        """
+        Estimate the encoding time saved by videos that were stream-copied
+
+        Uses the encoding speed (pixels per second) measured on this run's
+        full encodes, so it is None until at least one video was encoded.
+        """
+        encoded_pixels, encoded_time = self.video_work['encoded']
+        copied_pixels, copied_time = self.video_work['copied']
+        if not copied_pixels or not encoded_pixels or not encoded_time:
+            return None
+        return max(0.0, copied_pixels / (encoded_pixels / encoded_time) - copied_time)
+
+    def log_stats(self):
+        """Log compression throughput and latency for tuning the core budget"""
+        stats = self.get_stats()
+        for kind in self.queues:
+            kind_stats = stats[kind]
+            if kind_stats['jobs']:
+                self.logger.info(
+                    f"Compression {kind}s: {kind_stats['jobs']} jobs ({kind_stats['failed']} failed), "
+                    f"avg run {kind_stats['avg_run_time']:.2f}s, avg wait {kind_stats['avg_wait_time']:.2f}s, "
+                    f"max latency {kind_stats['max_latency']:.2f}s"
+                )
+        self.logger.info(
+            f"Compression: {stats['jobs_per_second']:.2f} jobs/s, {stats['mb_per_second']:.2f} MB/s "
+            f"on {self.cores} cores ({self.max_video_jobs} video jobs x {self.video_threads} threads), "
+            f"peak image memory {self.peak_memory / (1024 * 1024):.0f} MB"
+        )
+        if self.video_paths:
+            paths = ', '.join(f"{path} {count}" for path, count in sorted(self.video_paths.items()))
+            saved = stats['video_time_saved']
+            saved_text = f", ~{saved:.0f}s of encoding saved" if saved is not None else ""
+            self.logger.info(f"Video paths: {paths}{saved_text}")
+        cache_stats = self.file_manager.get_cache_stats()
+        if cache_stats and cache_stats['hit_rate'] is not None:
+            self.logger.info(
+                f"Compressed output cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+                f"({cache_stats['hit_rate']:.0%}), ~{cache_stats['time_saved']:.0f}s of compression saved, "
+                f"{cache_stats['evictions']} evicted, {cache_stats['entries']} outputs "
+                f"({cache_stats['size'] / (1024 * 1024):.0f} MB) cached"
+            )
+
+    def clear(self):
+        """Drop queued jobs; running jobs finish on their own"""
+        for queue in self.queues.values():
+            queue.clear()
+        for item, _, _ in self.segment_queue:
+            state = self.segmented[id(item)]
+            state['pending'] -= 1
+            state['cancelled'] = True
+        self.segment_queue.clear()
+        # Videos with no step still running are dropped now, the others when their steps finish
+        for key, state in list(self.segmented.items()):
+            if state['pending'] == 0:
+                self.file_manager.discard_segmented_video(state['item'])
+                del self.segmented[key]
+
+    def cancel(self):
+        """Drop queued jobs and kill the ffmpeg processes of running video jobs"""
+        self.clear()
+        self.file_manager.cancel_video_compression()
+
+    def _next_job(self):
+        """Pick the type and core cost of the next job, or None if nothing may start"""
+        free = self.cores - self.cores_used
+        if self.segment_queue:
+            # Steps of videos already started finish first, so their outputs appear sooner
+            cost = min(self.video_threads, self.cores) if self.segment_queue[0][1] == 'segment' else 1
+            if free >= cost or self.cores_used == 0:
+                return 'segment', cost
+            return None
+        if self.queues['video'] and self.running['video'] < self.max_video_jobs:
+            item = self.queues['video'][0][0]
+            cost = 1 if item.get('planned_video_path') in (REMUX, ENCODE_AUDIO) else min(self.video_threads, self.cores)
+            if free >= cost or self.cores_used == 0:
+                return 'video', cost
+            # Let running images drain so the waiting video gets its cores
+            return None
+        if self.queues['image'] and free >= 1:
+            _, _, memory = self.queues['image'][0]
+            # An image larger than the whole budget still runs once no other image is in flight
+            if self.memory_used + memory <= self.memory_budget or self.memory_used == 0:
+                return 'image', 1
+        return None
+
+    def _dispatch(self):
+        """Start queued jobs while the core budget allows"""
+        job = self._next_job()
+        while job is not None:
+            kind, cost = job
+            if kind == 'segment':
+                self._start_step(cost)
+                job = self._next_job()
+                continue
+            item, submitted, memory = self.queues[kind].popleft()
+            self.running[kind] += 1
+            self.cores_used += cost
+            self.memory_used += memory
+            self.peak_memory = max(self.peak_memory, self.memory_used)
+            if self.busy_since is None:
+                self.busy_since = time.monotonic()
+
+            threads = cost if kind == 'video' else None
+            started = time.monotonic()
+            task = CompressionTask(item, self.file_manager, threads=threads)
+            task.signals.progress.connect(self.progress.emit)
+            task.signals.error.connect(self.error.emit)
+            task.signals.finished.connect(
+                lambda item=item, kind=kind, cost=cost, memory=memory, submitted=submitted, started=started:
+                    self._on_finished(item, kind, cost, memory, submitted, started)
+            )
+            self.pool.start(task)
+            job = self._next_job()
+
+    def _start_step(self, cost):
+        """Start the next segment encode or join of a segmented video"""
+        item, step, index = self.segment_queue.popleft()
+        self.cores_used += cost
+        if self.busy_since is None:
+            self.busy_since = time.monotonic()
+
+        if step == 'segment':
+            task = CompressionStepTask(
+                item,
+                lambda report: self.file_manager.encode_segment(item, index, threads=cost, progress_callback=report),
+                f"segment {index}"
+            )
+        else:
+            task = CompressionStepTask(item, lambda report: self.file_manager.finish_segmented_video(item), "join")
+        task.signals.progress.connect(self.progress.emit)
+        task.signals.error.connect(self.error.emit)
+        task.signals.finished.connect(
+            lambda item=item, step=step, cost=cost: self._on_step_finished(item, step, cost)
+        )
+        self.pool.start(task)
+
+    def _on_finished(self, item, kind, cost, memory, submitted, started):
+        """Record the job's timing, free its cores and memory and start the next jobs"""
+        now = time.monotonic()
+        self.running[kind] -= 1
+        self.cores_used -= cost
+        self.memory_used -= memory
+
+        if 'segment_plan' in item and not item.get('error'):
+            # Splitting is done; the video is reported once its segments are encoded and joined
+            count = len(item['segment_plan']['segments'])
+            self.segmented[id(item)] = {'item': item, 'pending': count, 'submitted': submitted, 'started': started}
+            self.segment_queue.extend((item, 'segment', index) for index in range(count))
+            self._update_busy(now)
+            self._dispatch()
+            return
+
+        self._record_job(item, kind, submitted, started, now)
+        self._update_busy(now)
+        self.compression_finished.emit(item)
+        self._dispatch()
+
+    def _on_step_finished(self, item, step, cost):
+        """Free a step's cores and queue the join, or finish the video once nothing is pending"""
+        now = time.monotonic()
+        self.cores_used -= cost
+        state = self.segmented.get(id(item))
+        if state is None:
+            # The executor was reset while this step ran
+            self.file_manager.discard_segmented_video(item)
+            self._update_busy(now)
+            return
+        state['pending'] -= 1
+
+        if step == 'segment' and item.get('error'):
+            # Drop the failed video's queued segments; running ones still report back
+            remaining = deque(entry for entry in self.segment_queue if entry[0] is not item)
+            state['pending'] -= len(self.segment_queue) - len(remaining)
+            self.segment_queue = remaining
+
+        if state['pending'] == 0:
+            if step == 'segment' and not item.get('error') and not state.get('cancelled'):
+                state['pending'] = 1
+                self.segment_queue.append((item, 'join', None))
+            else:
+                if state.get('cancelled') and not item.get('error'):
+                    item['error'] = f"Compression of {item['path']} was cancelled"
+                    item['status'] = 'failed'
+                # A no-op after a successful join, which removes the plan itself
+                self.file_manager.discard_segmented_video(item)
+                del self.segmented[id(item)]
+                self._record_job(item, 'video', state['submitted'], state['started'], now)
+                if not item.get('error'):
+                    self.progress.emit(item, 'compression_complete')
+                self.compression_finished.emit(item)
+
+        self._update_busy(now)
+        self._dispatch()
+
+    def _record_job(self, item, kind, submitted, started, now):
+        """Add a finished job to the statistics"""
+        kind_stats = self.stats[kind]
+        kind_stats['jobs'] += 1
+        kind_stats['bytes'] += item.get('filesize', 0)
+        kind_stats['run_time'] += now - started
+        kind_stats['wait_time'] += started - submitted
+        kind_stats['max_latency'] = max(kind_stats['max_latency'], now - submitted)
+        if item.get('error'):
+            kind_stats['failed'] += 1
+        elif kind == 'video' and 'video_path' in item and not item.get('compression_cached'):
+            self.video_paths[item['video_path']] = self.video_paths.get(item['video_path'], 0) + 1
+            work = self.video_work['copied' if item['video_path'] in (REMUX, ENCODE_AUDIO) else 'encoded']
+            work[0] += item.get('encode_work', 0)
+            work[1] += item.get('compression_time', 0)
+
+    def _update_busy(self, now):
+        """Close the busy period once no job holds cores"""
+        if self.cores_used == 0 and self.busy_since is not None:
+            self.busy_time += now - self.busy_since
+            self.busy_since = None
@@ -70,6 +70,11 @@ class ConfigManager:
             return self.config.get(key, default)
         return self.confidential_config.get(key, default)
 
+    def get_data_path(self, filename):
+        """Get the path of an application data file stored next to config.yaml"""
+        config_path = os.getenv("CONFIG_PATH", "config.yaml")
+        return os.path.join(os.path.dirname(os.path.abspath(config_path)), filename)
+
     def get_ui_font(self):
         return QFont(self.ui_font_family, self.ui_font_size)
 
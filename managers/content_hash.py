@@ -0,0 +1,75 @@
+# managers/content_hash.py
+
+"""
+Hashing of files uploaded to S3.
+
+SHA-256 names content-addressed objects, and compute_s3_etag predicts the
+ETag of an upload so local files can be compared with listed objects.
+Files are read in large chunks; hashlib releases the GIL while it hashes
+each chunk, so upload threads hash in parallel. Outputs compressed in
+memory are passed as bytes instead of a path.
+"""
+
+import hashlib
+import io
+import os
+from s3transfer.utils import ChunksizeAdjuster
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def open_source(source):
+    """Open a file path for reading, or wrap in-memory content (bytes) in a file object"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    return open(source, 'rb')
+
+
+def get_source_size(source):
+    """Get the size of a file path or of in-memory content"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return len(source)
+    return os.path.getsize(source)
+
+
+def hash_file(path, chunk_size=HASH_CHUNK_SIZE, algorithm='sha256'):
+    """
+    Get the hash of a file's content (path or bytes), SHA-256 by default
+
+    Returns:
+        str: Hex digest, or None if the file cannot be read
+    """
+    digest = hashlib.new(algorithm)
+    try:
+        with open_source(path) as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def compute_s3_etag(path, multipart_threshold, multipart_chunksize):
+    """
+    Get the ETag S3 assigns to a file (path or bytes) uploaded with the given transfer settings
+
+    Files below the multipart threshold get the MD5 of their content; larger
+    files get the MD5 of the concatenated part MD5s followed by '-<parts>',
+    with the part size adjusted as the transfer manager adjusts it. Objects
+    encrypted with SSE-KMS have other ETags, so they never match.
+
+    Returns:
+        str: ETag without quotes, or None if the file cannot be read
+    """
+    try:
+        size = get_source_size(path)
+        if size < multipart_threshold:
+            return hash_file(path, algorithm='md5')
+        part_size = ChunksizeAdjuster().adjust_chunksize(multipart_chunksize, size)
+        part_digests = []
+        with open_source(path) as f:
+            for part in iter(lambda: f.read(part_size), b''):
+                part_digests.append(hashlib.md5(part).digest())
+    except OSError:
+        return None
+    return f"{hashlib.md5(b''.join(part_digests)).hexdigest()}-{len(part_digests)}"
@@ -0,0 +1,30 @@
+# managers/database.py
+
+"""
+SQLite setup shared by the vault index and the other persistent stores.
+
+Every store keeps one connection that its threads share under a lock, in
+WAL mode with synchronous=NORMAL so commits stay cheap and a crash loses
+at most the last transactions, never the database.
+"""
+
+import sqlite3
+
+
+def open_database(path, schema):
+    """
+    Open (or create) a SQLite database and apply its schema
+
+    Args:
+        path (str): Path of the SQLite database file
+        schema (str): CREATE statements, run with executescript
+
+    Returns:
+        sqlite3.Connection: Connection usable from any thread; callers serialise access with their own lock
+    """
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(schema)
+    conn.commit()
+    return conn
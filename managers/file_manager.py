@@ -1,15 +1,31 @@
 # managers/file_manager.py
 
 import os
+import time
 import random
 import string
-from PIL import Image
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import ffmpeg
 import shutil
+import tempfile
 from datetime import datetime
+from managers.artifact_cache import ArtifactCache, get_artifact_key
 from managers.config_manager import ConfigManager
+from managers.image_compressor import compress_image, probe_image
+from managers.video_compressor import (
+    ENCODE, ENCODE_AUDIO, ENCODE_VIDEO, REMUX, FfmpegProcesses, choose_video_path, concat_segments,
+    encode_video_segment, extract_audio, get_encode_work, get_video_info, probe_video, run_ffmpeg, split_video
+)
+from managers.vault_scanner import VaultScanner
+from managers.vault_index import VaultIndex, compute_file_hash
 from utils.logger import Logger
 
+IMAGE_MAX_DIMENSION = 1280
+IMAGE_QUALITY = 80
+VIDEO_MAX_DIMENSION = 1080
+VIDEO_CRF = 28
+
 class FileManager:
     def __init__(self):
         self.config_manager = ConfigManager()
@@ -17,6 +33,82 @@ class FileManager:
         self.vault_path = None
         self.image_extensions = [".jpeg", ".jpg", ".png", ".gif", ".bmp", ".tiff", ".tif", ".webp", ".heif", ".heic", ".svg"]
         self.video_extensions = [".mp4", ".mov", ".avi", ".mkv", ".flv", ".wmv", ".m4v", ".webm", ".mpeg", ".3gp", ".ogv"]
+        scan_workers = self.config_manager.get('scan', {}).get('workers')
+        self.scanner = VaultScanner(self.image_extensions, self.video_extensions, scan_workers)
+        self.snapshot = None
+        self._vault_index = None
+        self._vault_index_enabled = self.config_manager.get('vault_index', {}).get('enabled', True)
+        compression_config = self.config_manager.get('compression', {})
+        self.image_backend = compression_config.get('image_backend', 'thread')
+        self.fast_downscale = compression_config.get('fast_downscale', True)
+        self._image_pool = None
+        self._image_pool_lock = threading.Lock()
+        self.video_progress_interval = compression_config.get('video_progress_interval', 1.0)
+        self.in_memory_images = compression_config.get('in_memory_images', True)
+        self.memory_output_max = compression_config.get('memory_output_max_mb', 8) * 1024 * 1024
+        self.memory_outputs_budget = compression_config.get('memory_outputs_budget_mb', 512) * 1024 * 1024
+        self.memory_outputs_bytes = 0
+        self._memory_outputs_lock = threading.Lock()
+        self._spill_dir = None
+        self.ffmpeg_processes = FfmpegProcesses()
+        self.dedup_enabled = self.config_manager.get('dedup', {}).get('enabled', True)
+        self._artifact_cache = None
+        self._artifact_cache_enabled = self.config_manager.get('artifact_cache', {}).get('enabled', True)
+        self._artifact_cache_lock = threading.Lock()
+
+    @property
+    def vault_index(self):
+        """Lazy initialization of the persistent vault index, or None if disabled"""
+        if self._vault_index is None and self._vault_index_enabled:
+            index_config = self.config_manager.get('vault_index', {})
+            db_path = self.config_manager.get_data_path(index_config.get('file', 'vault_index.db'))
+            try:
+                self._vault_index = VaultIndex(db_path, self.scanner.max_workers)
+            except Exception as e:
+                self.logger.error(f"Cannot open vault index {db_path}, falling back to full scans: {e}")
+                self._vault_index_enabled = False
+        return self._vault_index
+
+    @property
+    def artifact_cache(self):
+        """Lazy initialization of the compressed output cache, or None if disabled"""
+        with self._artifact_cache_lock:
+            if self._artifact_cache is None and self._artifact_cache_enabled:
+                cache_config = self.config_manager.get('artifact_cache', {})
+                directory = cache_config.get('directory') or self.config_manager.get_data_path('artifact_cache')
+                try:
+                    self._artifact_cache = ArtifactCache(directory, cache_config.get('max_size_mb', 10240) * 1024 * 1024)
+                except Exception as e:
+                    self.logger.error(f"Cannot open compressed output cache {directory}, compressing everything: {e}")
+                    self._artifact_cache_enabled = False
+            return self._artifact_cache
+
+    @property
+    def spill_dir(self):
+        """Private temporary directory, outside the vault, for in-memory outputs that do not fit in memory"""
+        with self._memory_outputs_lock:
+            if self._spill_dir is None:
+                self._spill_dir = tempfile.mkdtemp(
+                    prefix='vaultmanager_outputs_', dir=self.config_manager.get('compression', {}).get('spill_directory')
+                )
+            return self._spill_dir
+
+    def remove_spill_dir(self):
+        """Delete the spill directory with any outputs still in it, such as those whose upload failed"""
+        with self._memory_outputs_lock:
+            spill_dir, self._spill_dir = self._spill_dir, None
+        if spill_dir is not None:
+            shutil.rmtree(spill_dir, ignore_errors=True)
+            self.logger.info(f"Removed spill directory {spill_dir}")
+
+    @property
+    def image_pool(self):
+        """Lazy initialization of the process pool used by the 'process' image backend"""
+        with self._image_pool_lock:
+            if self._image_pool is None:
+                workers = self.config_manager.get('compression', {}).get('cores') or os.cpu_count() or 1
+                self._image_pool = ProcessPoolExecutor(max_workers=workers)
+            return self._image_pool
 
     def set_vault_path(self, path):
         """Set the vault path"""
@@ -43,75 +135,314 @@ class FileManager:
         # Create new filename with specified extension
         return f"{random_prefix}_{base_filename}.{new_extension}"
 
+    def scan_vault(self, directory):
+        """Walk the vault once and keep the snapshot for every later phase"""
+        self.vault_path = directory
+        if self.vault_index is not None:
+            self.snapshot = self.vault_index.refresh(directory, self.scanner)
+        else:
+            self.snapshot = self.scanner.scan(directory)
+        return self.snapshot
+
+    def get_snapshot(self, directory=None):
+        """Get the current vault snapshot, scanning only if none exists for the directory"""
+        directory = directory or self.vault_path
+        if self.snapshot is None or os.path.normpath(self.snapshot.root) != os.path.normpath(directory):
+            return self.scan_vault(directory)
+        return self.snapshot
+
     def get_media_workload(self, directory):
         """Get list of all media files with their information"""
         self.vault_path = directory  # Update vault path when getting workload
-        workload = []
-
-        for root, _, files in os.walk(directory):
-            for file in files:
-                file_lower = file.lower()
-                file_path = os.path.join(root, file)
-                file_size = os.path.getsize(file_path)
-
-                if any(file_lower.endswith(ext) for ext in self.image_extensions):
-                    workload.append({
-                        'path': file_path,
-                        'original_path': file_path,
-                        'filename': file,
-                        'filesize': file_size,
-                        'type': 'image'
-                    })
-                elif any(file_lower.endswith(ext) for ext in self.video_extensions):
-                    workload.append({
-                        'path': file_path,
-                        'original_path': file_path,
-                        'filename': file,
-                        'filesize': file_size,
-                        'type': 'video'
-                    })
-
-        return workload
-
-    def compress_single_file(self, item):
-        """Compress a single media file (image or video)"""
+        snapshot = self.get_snapshot(directory)
+        migrations = self.vault_index.get_migrations(directory) if self.vault_index is not None else {}
+        return [self._create_workload_item(entry, migrations) for entry in snapshot.media]
+
+    def iter_media_workload(self, directory):
+        """
+        Yield workload items while the vault is scanned, keeping the final snapshot
+
+        With the vault index the refresh completes first (it only lists changed
+        directories); without it, items are yielded as the walk finds them.
+        """
+        self.vault_path = directory
+        if self.vault_index is not None:
+            snapshot = self.scan_vault(directory)
+            migrations = self.vault_index.get_migrations(directory)
+            for entry in snapshot.media:
+                yield self._create_workload_item(entry, migrations)
+            return
+
+        started = time.perf_counter()
+        entries = []
+        for entry in self.scanner.iter_scan(directory):
+            entries.append(entry)
+            if entry.kind in ('image', 'video'):
+                yield self._create_workload_item(entry, {})
+        self.snapshot = self.scanner.build_snapshot(directory, entries, time.perf_counter() - started)
+
+    def _create_workload_item(self, entry, migrations):
+        """Create the workload dict for a media entry, noting uploads from earlier runs"""
+        item = {
+            'path': entry.path,
+            'original_path': entry.path,
+            'filename': entry.name,
+            'filesize': entry.size,
+            'mtime_ns': entry.mtime_ns,
+            'type': entry.kind
+        }
+        migration = migrations.get(entry.path)
+        if migration and (migration['size'], migration['mtime_ns']) == (entry.size, entry.mtime_ns):
+            # Uploaded by an earlier run; only link replacement and deletion remain
+            item['migration_state'] = migration['migration_state']
+            item['s3_key'] = migration['s3_key']
+            item['cloudfront_url'] = migration['cloudfront_url']
+            item['upload_status'] = 'success'
+        return item
+
+    def probe_media(self, items):
+        """
+        Read image headers and video metadata of workload items without decoding them
+
+        Results are cached in the vault index by path, size and mtime, so only
+        new or changed files are opened. Sets item['image_info'] (width,
+        height, mode, format) for images Pillow can read and
+        item['video_info'] (see video_compressor.get_video_info) for videos
+        ffprobe can read.
+        """
+        # Files uploaded by an earlier run are not compressed again, so they need no probe
+        pending = [item for item in items if item.get('upload_status') != 'success']
+        self._probe_items([item for item in pending if item['type'] == 'image'], 'image', 'image_info', probe_image)
+        self._probe_items([item for item in pending if item['type'] == 'video'], 'video', 'video_info', probe_video)
+
+    def hash_media(self, items):
+        """
+        Set item['content_hash'] so identical files can be deduplicated and compressed outputs cached
+
+        Hashes are kept in the vault index and only computed for new or
+        changed files, in parallel (hashlib releases the GIL per chunk). Files
+        uploaded by an earlier run are hashed too, so new copies of them can
+        reuse their URL. Does nothing when deduplication and the output cache
+        are both disabled.
+        """
+        if not self.dedup_enabled and not self._artifact_cache_enabled:
+            return
+        pending = [item for item in items if 'content_hash' not in item]
+        if not pending:
+            return
+
+        get_hash = self.vault_index.get_content_hash if self.vault_index is not None else compute_file_hash
+
+        def hash_item(item):
+            try:
+                return get_hash(item['path'])
+            except OSError as e:
+                self.logger.error(f"Failed to hash {item['path']}: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.scanner.max_workers) as executor:
+            hashes = list(executor.map(hash_item, pending))
+        for item, content_hash in zip(pending, hashes):
+            if content_hash is not None:
+                item['content_hash'] = content_hash
+
+    def _probe_items(self, items, kind, key, probe):
+        """Set item[key] from the probe cache, probing the rest in parallel"""
+        pending = [item for item in items if key not in item]
+        if not pending:
+            return
+
+        files = [(item['path'], item['filesize'], item.get('mtime_ns')) for item in pending]
+        cached = {}
+        if self.vault_index is not None:
+            try:
+                cached = self.vault_index.get_probes(kind, files)
+            except Exception as e:
+                self.logger.error(f"Failed to read cached {kind} probes: {e}")
+
+        missing = [item for item in pending if item['path'] not in cached]
+        if missing:
+            # ffprobe runs as a subprocess, so threads probe videos in parallel as well
+            with ThreadPoolExecutor(max_workers=self.scanner.max_workers) as executor:
+                probed = list(executor.map(probe, [item['path'] for item in missing]))
+            results = []
+            for item, info in zip(missing, probed):
+                if info is not None:
+                    cached[item['path']] = info
+                    results.append((item['path'], item['filesize'], item.get('mtime_ns'), info))
+            if self.vault_index is not None and results:
+                try:
+                    self.vault_index.store_probes(kind, results)
+                except Exception as e:
+                    self.logger.error(f"Failed to cache {kind} probes: {e}")
+
+        for item in pending:
+            if item['path'] in cached:
+                item[key] = cached[item['path']]
+
+    def record_migration(self, item, state):
+        """Persist the migration state of a workload item in the vault index"""
+        if self.vault_index is None:
+            return
+        try:
+            if state == 'uploaded':
+                self.vault_index.record_upload(item['original_path'], item.get('s3_key'), item.get('cloudfront_url'))
+            else:
+                self.vault_index.set_migration_state(item['original_path'], state)
+        except Exception as e:
+            self.logger.error(f"Failed to record {state} state for {item['original_path']}: {e}")
+
+    def compress_single_file(self, item, threads=None, progress_callback=None):
+        """
+        Compress a single media file (image or video)
+
+        Args:
+            item (dict): Workload item
+            threads (int, optional): ffmpeg threads for videos; None lets ffmpeg use every core
+            progress_callback (callable, optional): Called with run_ffmpeg progress reports while a video encodes
+
+        An output cached for the same content and settings is reused instead;
+        item['compression_cached'] is then set.
+        """
+        if item['type'] not in ('image', 'video'):
+            raise ValueError(f"Unsupported media type: {item['type']}")
+        if self._fetch_cached_output(item):
+            return
         if item['type'] == 'image':
             self.compress_single_image(item)
-        elif item['type'] == 'video':
-            self.compress_single_video(item)
         else:
-            raise ValueError(f"Unsupported media type: {item['type']}")
+            self.compress_single_video(item, threads=threads or 0, progress_callback=progress_callback)
+        # Segmented videos are cached once finish_segmented_video joins them
+        if 'segment_plan' not in item:
+            self._store_cached_output(item)
+
+    def get_output_settings(self, item):
+        """
+        Get the settings that determine an item's compressed output, used in its cache key
+
+        Returns:
+            dict: Effective settings, or None if they cannot be known before compressing
+        """
+        if item['type'] == 'image':
+            # reduced_decode is set by the compression executor for images beyond the memory budget
+            return {
+                'type': 'image', 'codec': 'jpeg', 'max_dimension': IMAGE_MAX_DIMENSION, 'quality': IMAGE_QUALITY,
+                'fast_downscale': self.fast_downscale, 'reduced_decode': item.get('reduced_decode', False)
+            }
+        info = item.get('video_info')
+        if not info:
+            return None
+        video_path, _ = self.get_video_path(info)
+        return {
+            'type': 'video', 'path': video_path, 'vcodec': 'libx264', 'preset': 'fast', 'acodec': 'aac',
+            'max_dimension': VIDEO_MAX_DIMENSION, 'crf': VIDEO_CRF
+        }
 
-    def compress_single_image(self, item, max_dimension=1280, quality=80):
-        """Compress a single image file"""
+    def get_cache_stats(self):
+        """Get the compressed output cache statistics (see ArtifactCache.get_stats), or None if disabled"""
+        cache = self.artifact_cache
+        return cache.get_stats() if cache is not None else None
+
+    def reset_cache_stats(self):
+        """Reset the compressed output cache statistics for a new run"""
+        if self._artifact_cache is not None:
+            self._artifact_cache.reset_stats()
+
+    def _fetch_cached_output(self, item):
+        """Place a cached output for the item next to the original, returning whether one was found"""
+        cache = self.artifact_cache
+        settings = self.get_output_settings(item) if cache is not None and 'content_hash' in item else None
+        if settings is None:
+            return False
+
+        started = time.perf_counter()
+        key = get_artifact_key(item['content_hash'], settings)
+        item['artifact_key'] = key
+        in_memory = item['type'] == 'image' and self.in_memory_images
+        new_filename = self.generate_processed_filename(item['filename'], 'jpg' if item['type'] == 'image' else 'mp4')
+        new_path = os.path.join(os.path.dirname(item['path']), new_filename)
+        try:
+            if in_memory:
+                cached = cache.read(key)
+                data = cached and cached[0]
+            else:
+                data = cache.fetch(key, new_path)
+        except Exception as e:
+            self.logger.error(f"Failed to read cached output of {item['path']}: {e}")
+            return False
+        if data is None:
+            return False
+
+        self.logger.info(f"Reusing cached compressed output for {item['path']}")
+        item['compressed_filename'] = new_filename
+        if in_memory:
+            self._hold_output(item, cached[1])
+        else:
+            item['processed_path'] = new_path
+        item['compressed_size'] = data['compressed_size']
+        if 'dimensions' in data:
+            item['dimensions'] = tuple(data['dimensions'])
+        if 'video_path' in data:
+            item['video_path'] = data['video_path']
+        item['compression_cached'] = True
+        item['compression_time'] = time.perf_counter() - started
+        return True
+
+    def _store_cached_output(self, item):
+        """Add an item's compressed output to the cache"""
+        key = item.get('artifact_key')
+        source = item.get('compressed_data', item.get('processed_path'))
+        if key is None or source is None:
+            return
+        data = {'compressed_size': item['compressed_size'], 'compression_time': item.get('compression_time', 0.0)}
+        for field in ('dimensions', 'video_path'):
+            if field in item:
+                data[field] = item[field]
+        try:
+            self.artifact_cache.store(key, source, data, extension=os.path.splitext(item['compressed_filename'])[1])
+        except Exception as e:
+            self.logger.error(f"Failed to cache compressed output of {item['path']}: {e}")
+
+    def compress_single_image(self, item, max_dimension=IMAGE_MAX_DIMENSION, quality=IMAGE_QUALITY):
+        """
+        Compress a single image file
+
+        With 'compression.in_memory_images' the JPEG is encoded in memory and
+        kept in item['compressed_data'] for the upload (see _hold_output), so
+        nothing is written into the vault; otherwise it is saved next to the
+        original as item['processed_path'].
+        """
         original_path = item['path']
         self.logger.info(f"Starting to process image: {original_path}")
 
         new_filename = self.generate_processed_filename(item['filename'], 'jpg')
-        new_path = os.path.join(os.path.dirname(original_path), new_filename)
+        new_path = None if self.in_memory_images else os.path.join(os.path.dirname(original_path), new_filename)
 
         try:
-            with Image.open(original_path) as img:
-                # Check if resizing is needed
-                width, height = img.size
-                if width > max_dimension or height > max_dimension:
-                    aspect_ratio = width / height
-                    if width > height:
-                        new_width = max_dimension
-                        new_height = int(new_width / aspect_ratio)
-                    else:
-                        new_height = max_dimension
-                        new_width = int(new_height * aspect_ratio)
-                    img_resized = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                else:
-                    img_resized = img
-
-                img_resized = img_resized.convert('RGB')
-                img_resized.save(new_path, 'JPEG', quality=quality)
-                self.logger.info(f"Compressed and saved image: {new_path}")
-                # Update item with compressed file info
-                item['compressed_filename'] = new_filename
+            started = time.perf_counter()
+            # The process backend keeps Pillow's Python-level work off this process's GIL
+            if self.image_backend == 'process':
+                result = self.image_pool.submit(
+                    compress_image, original_path, new_path, max_dimension, quality, self.fast_downscale,
+                    item.get('reduced_decode', False)
+                ).result()
+            else:
+                result = compress_image(
+                    original_path, new_path, max_dimension, quality, self.fast_downscale,
+                    item.get('reduced_decode', False)
+                )
+            fast_note = " (reduced decode)" if result['fast_path'] else ""
+            # Update item with compressed file info
+            item['compressed_filename'] = new_filename
+            if new_path is None:
+                self._hold_output(item, result['data'])
+                self.logger.info(f"Compressed image in memory: {original_path} -> {new_filename}{fast_note}")
+            else:
                 item['processed_path'] = new_path
+                self.logger.info(f"Compressed and saved image: {new_path}{fast_note}")
+            item['compressed_size'] = result['size']
+            item['dimensions'] = (result['width'], result['height'])
+            item['compression_time'] = time.perf_counter() - started
         except Exception as e:
             # Clean up partially processed file if it exists
             if new_path and os.path.exists(new_path):
@@ -122,8 +453,17 @@ class FileManager:
                     self.logger.error(f"Failed to clean up partial file {new_path}: {cleanup_error}")
             raise e
 
-    def compress_single_video(self, item, max_dimension=1080, crf=28):
-        """Compress a single video file"""
+    def compress_single_video(self, item, max_dimension=VIDEO_MAX_DIMENSION, crf=VIDEO_CRF, threads=0,
+                              progress_callback=None):
+        """
+        Compress a single video file with the given number of ffmpeg threads (0 for all cores)
+
+        Videos that are already H.264/AAC within the limits are only remuxed;
+        item['video_path'] records the path taken (see video_compressor) and
+        item['encode_work'] and item['compression_time'] let the run estimate
+        the encoding time saved. progress_callback receives run_ffmpeg
+        progress reports, and cancel_video_compression stops the encode.
+        """
         original_path = item['path']
         self.logger.info(f"Starting to process video: {original_path}")
 
@@ -131,46 +471,64 @@ class FileManager:
         new_path = os.path.join(os.path.dirname(original_path), new_filename)
 
         try:
-            # Get video dimensions
-            probe = ffmpeg.probe(original_path)
-            video_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'video'), None)
-            if video_stream is None:
-                raise ValueError("No video stream found")
-
-            width = int(video_stream['width'])
-            height = int(video_stream['height'])
-
-            # Calculate new dimensions
-            if width > max_dimension or height > max_dimension:
-                if width > height:
-                    new_width = max_dimension
-                    new_height = int(height * (max_dimension / width))
-                else:
-                    new_height = max_dimension
-                    new_width = int(width * (max_dimension / height))
+            started = time.perf_counter()
+            # Get video dimensions, codecs and bitrate, usually probed at scan time
+            info = item.get('video_info') or get_video_info(ffmpeg.probe(original_path))
+            width = info['width']
+            height = info['height']
+
+            video_config = self.config_manager.get('compression', {})
+            video_path, reason = self.get_video_path(info)
 
-                # Ensure dimensions are even
-                new_width = new_width + (new_width % 2)
-                new_height = new_height + (new_height % 2)
+            output_args = {'movflags': '+faststart'}
+            if video_path in (REMUX, ENCODE_AUDIO):
+                output_args['vcodec'] = 'copy'
             else:
-                new_width = width + (width % 2)
-                new_height = height + (height % 2)
+                # Calculate new dimensions
+                if width > max_dimension or height > max_dimension:
+                    if width > height:
+                        new_width = max_dimension
+                        new_height = int(height * (max_dimension / width))
+                    else:
+                        new_height = max_dimension
+                        new_width = int(width * (max_dimension / height))
+
+                    # Ensure dimensions are even
+                    new_width = new_width + (new_width % 2)
+                    new_height = new_height + (new_height % 2)
+                else:
+                    new_width = width + (width % 2)
+                    new_height = height + (height % 2)
+
+                output_args.update({
+                    'vf': f'scale={new_width}:{new_height}',
+                    'vcodec': 'libx264',
+                    'crf': str(crf),
+                    'preset': 'fast',
+                    'threads': threads
+                })
+            output_args['acodec'] = 'copy' if video_path in (REMUX, ENCODE_VIDEO) else 'aac'
+
+            if (video_path in (ENCODE_VIDEO, ENCODE) and video_config.get('segment_encoding', False)
+                    and info['duration'] >= video_config.get('segment_min_duration', 600)):
+                # The executor encodes the segments in parallel and calls finish_segmented_video
+                self.prepare_segmented_video(item, info, new_width, new_height, crf, new_filename, new_path,
+                                             video_path, started, video_config.get('segment_seconds', 60))
+                return
 
             # Compress video
+            self.logger.info(f"Video path for {original_path}: {video_path} ({reason})")
             stream = ffmpeg.input(original_path)
-            stream = ffmpeg.output(stream, new_path,
-                                   vf=f'scale={new_width}:{new_height}',
-                                   vcodec='libx264',
-                                   crf=str(crf),
-                                   acodec='aac',
-                                   preset='fast',
-                                   movflags='+faststart',
-                                   threads=0)  # Use all available CPU cores
-            ffmpeg.run(stream, capture_stdout=True, capture_stderr=True)
+            stream = ffmpeg.output(stream, new_path, **output_args)
+            run_ffmpeg(stream, **self._ffmpeg_run_args(item, info['duration'], progress_callback))
             self.logger.info(f"Compressed and saved video: {new_path}")
             # Update item with compressed file info
             item['compressed_filename'] = new_filename
             item['processed_path'] = new_path
+            item['compressed_size'] = os.path.getsize(new_path)
+            item['video_path'] = video_path
+            item['encode_work'] = get_encode_work(info)
+            item['compression_time'] = time.perf_counter() - started
 
         except ffmpeg.Error as e:
             error_message = f"FFmpeg error: {e.stderr.decode() if e.stderr else str(e)}"
@@ -192,17 +550,196 @@ class FileManager:
                     self.logger.error(f"Failed to clean up partial file {new_path}: {cleanup_error}")
             raise e
 
+    def _hold_output(self, item, data):
+        """
+        Keep an output compressed in memory in item['compressed_data'] until it is uploaded
+
+        Outputs above 'compression.memory_output_max_mb', or beyond
+        'compression.memory_outputs_budget_mb' held in total, are written to
+        the private spill directory instead and set item['processed_path'].
+        """
+        with self._memory_outputs_lock:
+            keep = (len(data) <= self.memory_output_max
+                    and self.memory_outputs_bytes + len(data) <= self.memory_outputs_budget)
+            if keep:
+                self.memory_outputs_bytes += len(data)
+        if keep:
+            item['compressed_data'] = data
+            return
+        spill_path = os.path.join(self.spill_dir, item['compressed_filename'])
+        with open(spill_path, 'wb') as f:
+            f.write(data)
+        item['processed_path'] = spill_path
+
+    def release_output(self, item):
+        """Free an item's in-memory output once it is no longer needed (after its upload)"""
+        data = item.pop('compressed_data', None)
+        if data is not None:
+            with self._memory_outputs_lock:
+                self.memory_outputs_bytes -= len(data)
+
+    def get_video_path(self, info):
+        """
+        Decide how a video is converted, following the stream copy settings
+
+        Args:
+            info (dict): Result of video_compressor.get_video_info
+
+        Returns:
+            tuple: (str, str) - (Path, Reason), see video_compressor.choose_video_path
+        """
+        video_config = self.config_manager.get('compression', {})
+        if not video_config.get('video_stream_copy', True):
+            return ENCODE, "stream copy disabled"
+        return choose_video_path(info, max_bits_per_pixel=video_config.get('video_copy_max_bits_per_pixel', 0.15))
+
+    def prepare_segmented_video(self, item, info, width, height, crf, new_filename, new_path, video_path,
+                                started, segment_seconds):
+        """
+        Split a long video at keyframes and set item['segment_plan'] for parallel encoding
+
+        The audio track is extracted once up front; the video segments are then
+        encoded independently with encode_segment and joined by
+        finish_segmented_video.
+        """
+        work_dir = tempfile.mkdtemp(prefix='vaultmanager_segments_')
+        try:
+            segments = split_video(item['path'], work_dir, segment_seconds, **self._ffmpeg_run_args(item))
+            if not segments:
+                raise ValueError("Splitting produced no segments")
+            audio_path = None
+            if info['audio_codec']:
+                audio_path = os.path.join(work_dir, 'audio.m4a')
+                extract_audio(item['path'], audio_path, copy=video_path == ENCODE_VIDEO,
+                              **self._ffmpeg_run_args(item))
+        except Exception:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            raise
+
+        self.logger.info(
+            f"Video path for {item['path']}: {video_path}, split into {len(segments)} segments "
+            f"of ~{segment_seconds}s ({info['duration']:.0f}s total)"
+        )
+        item['segment_plan'] = {
+            'work_dir': work_dir,
+            'segments': segments,
+            'encoded': [os.path.join(work_dir, f"encoded_{i:05d}.mp4") for i in range(len(segments))],
+            'audio': audio_path,
+            'width': width,
+            'height': height,
+            'crf': crf,
+            'new_filename': new_filename,
+            'new_path': new_path,
+            'video_path': video_path,
+            'encode_work': get_encode_work(info),
+            'started': started,
+            'duration': info['duration'],
+            'segment_seconds': segment_seconds,
+            'segment_done': [0.0] * len(segments),  # Seconds of each segment encoded so far
+            'encode_started': None
+        }
+
+    def encode_segment(self, item, index, threads=0, progress_callback=None):
+        """
+        Encode one segment of a video prepared by prepare_segmented_video
+
+        progress_callback receives the progress of the whole video, combined
+        from every segment encoded so far, rather than of this segment.
+        """
+        plan = item['segment_plan']
+        if plan['encode_started'] is None:
+            plan['encode_started'] = time.monotonic()
+        # Keyframe-aligned segments are only about segment_seconds long
+        expected = max(1.0, min(plan['segment_seconds'], plan['duration'] - index * plan['segment_seconds']))
+
+        def on_progress(progress):
+            if progress['out_time'] is not None:
+                plan['segment_done'][index] = min(expected, progress['out_time'])
+            if progress_callback:
+                progress_callback(self._get_segmented_progress(plan))
+
+        try:
+            encode_video_segment(plan['segments'][index], plan['encoded'][index], plan['width'], plan['height'],
+                                 crf=plan['crf'], threads=threads,
+                                 **self._ffmpeg_run_args(item, expected, on_progress))
+            plan['segment_done'][index] = expected
+        except ffmpeg.Error as e:
+            raise Exception(f"FFmpeg error on segment {index}: {e.stderr.decode() if e.stderr else str(e)}")
+
+    def finish_segmented_video(self, item):
+        """Join the encoded segments and audio into the output MP4 and remove the work directory"""
+        plan = item['segment_plan']
+        try:
+            concat_segments(plan['encoded'], plan['audio'], plan['new_path'], plan['work_dir'],
+                            **self._ffmpeg_run_args(item))
+            self.logger.info(f"Compressed and saved video: {plan['new_path']} ({len(plan['segments'])} segments)")
+            item['compressed_filename'] = plan['new_filename']
+            item['processed_path'] = plan['new_path']
+            item['compressed_size'] = os.path.getsize(plan['new_path'])
+            item['video_path'] = plan['video_path']
+            item['encode_work'] = plan['encode_work']
+            item['compression_time'] = time.perf_counter() - plan['started']
+            self._store_cached_output(item)
+        except ffmpeg.Error as e:
+            if os.path.exists(plan['new_path']):
+                os.remove(plan['new_path'])
+            raise Exception(f"FFmpeg error: {e.stderr.decode() if e.stderr else str(e)}")
+        finally:
+            self.discard_segmented_video(item)
+
+    def _get_segmented_progress(self, plan):
+        """Combine the progress of a segmented video's segments into one report"""
+        done = sum(plan['segment_done'])
+        elapsed = time.monotonic() - plan['encode_started']
+        speed = done / elapsed if elapsed > 0 else None
+        report = {'out_time': done, 'fps': None, 'speed': speed, 'fraction': None, 'eta': None}
+        if plan['duration']:
+            report['fraction'] = min(1.0, done / plan['duration'])
+            if speed:
+                report['eta'] = max(0.0, plan['duration'] - done) / speed
+        return report
+
+    def _ffmpeg_run_args(self, item, duration=None, progress_callback=None):
+        """Get the run_ffmpeg arguments that report an item's progress and register it for cancellation"""
+        return {
+            'duration': duration,
+            'on_progress': progress_callback,
+            'interval': self.video_progress_interval,
+            'processes': self.ffmpeg_processes,
+            'owner': item
+        }
+
+    def cancel_video_compression(self, item=None):
+        """
+        Cancel running video encodes by killing their ffmpeg processes
+
+        The cancelled compression fails with FfmpegCancelled and cleans up
+        its partial output as any other failure does.
+
+        Args:
+            item (dict, optional): Workload item to cancel; None cancels every running encode
+
+        Returns:
+            int: Number of ffmpeg processes killed
+        """
+        killed = self.ffmpeg_processes.kill(item)
+        if killed:
+            self.logger.info(f"Cancelled {killed} running ffmpeg process(es)")
+        return killed
+
+    def discard_segmented_video(self, item):
+        """Remove a segmented video's work directory and plan"""
+        plan = item.pop('segment_plan', None)
+        if plan:
+            shutil.rmtree(plan['work_dir'], ignore_errors=True)
+
     def get_relative_path(self, file_path):
         """Get the path of a file relative to the vault root"""
         return os.path.relpath(file_path, self.vault_path)
 
     def get_markdown_files(self):
         """Get all markdown files in the vault"""
-        markdown_files = []
-        for root, _, files in os.walk(self.vault_path):
-            for file in files:
-                if file.lower().endswith('.md'):
-                    markdown_files.append(os.path.join(root, file))
+        markdown_files = [entry.path for entry in self.get_snapshot().markdown]
         self.logger.info(f"Found {len(markdown_files)} markdown files in vault")
         return markdown_files
 
@@ -0,0 +1,161 @@
+# managers/image_compressor.py
+
+"""
+Image compression that runs without Qt or manager state.
+
+Takes only paths and settings and returns plain data, so it can run in
+the calling thread or in a worker process of the image process pool.
+"""
+
+import io
+import os
+import threading
+from PIL import Image
+
+# Quality guard for the fast path: JPEG draft decoding stops at this multiple
+# of the output size, and the final LANCZOS pass always works from at least
+# this much oversampling
+DRAFT_OVERSAMPLE = 2
+# Integer pre-reduction in resize() keeps this multiple of the output size;
+# 3.0 is indistinguishable from a full LANCZOS resample in practice
+REDUCING_GAP = 3.0
+# Scale denominators JPEG draft decoding can produce, largest first
+DRAFT_SCALES = (8, 4, 2)
+
+# Per-thread encode buffer, reused so encoding in memory does not grow a new buffer for every image
+_buffers = threading.local()
+
+
+def encode_to_buffer(img, quality):
+    """Encode an image as JPEG in this thread's reusable buffer and return the bytes"""
+    buffer = getattr(_buffers, 'buffer', None)
+    if buffer is None:
+        buffer = _buffers.buffer = io.BytesIO()
+    # Rewinding without truncating keeps the allocation; only the bytes written now are returned
+    buffer.seek(0)
+    img.save(buffer, 'JPEG', quality=quality)
+    size = buffer.tell()
+    with buffer.getbuffer() as view:
+        return bytes(view[:size])
+
+
+def probe_image(path):
+    """
+    Read an image's dimensions, mode and format from its header without decoding it
+
+    Returns:
+        dict: width, height, mode and format, or None if Pillow cannot read the file
+    """
+    try:
+        with Image.open(path) as img:
+            width, height = img.size
+            return {'width': width, 'height': height, 'mode': img.mode, 'format': img.format}
+    except Exception:
+        return None
+
+
+def get_target_size(width, height, max_dimension):
+    """Get the output size of an image fitted into max_dimension"""
+    if width <= max_dimension and height <= max_dimension:
+        return width, height
+    aspect_ratio = width / height
+    if width > height:
+        return max_dimension, int(max_dimension / aspect_ratio)
+    return int(max_dimension * aspect_ratio), max_dimension
+
+
+def estimate_decode_memory(info, max_dimension=1280, fast_downscale=True, reduced_decode=False):
+    """
+    Estimate the peak memory of compressing an image from its probed header
+
+    Pillow holds one byte per pixel for 1, L and P images, two for 16-bit
+    grayscale and four for everything else (RGB is padded to four). The
+    estimate covers the decoded image (at draft scale where the fast path
+    applies), the integer pre-reduction and the resized and converted output.
+
+    Args:
+        info (dict): Result of probe_image
+        max_dimension (int): Longest side of the output
+        fast_downscale (bool): Whether the fast path is enabled
+        reduced_decode (bool): Whether decoding at the output size is forced
+
+    Returns:
+        int: Estimated bytes
+    """
+    width, height = info['width'], info['height']
+    bytes_per_pixel = 1 if info['mode'] in ('1', 'L', 'P') else 2 if info['mode'].startswith('I;16') else 4
+    target_width, target_height = get_target_size(width, height, max_dimension)
+
+    decoded_width, decoded_height = width, height
+    oversample = 1 if reduced_decode else DRAFT_OVERSAMPLE
+    if info.get('format') == 'JPEG' and (fast_downscale or reduced_decode):
+        for scale in DRAFT_SCALES:
+            if width // scale >= target_width * oversample and height // scale >= target_height * oversample:
+                decoded_width, decoded_height = width // scale, height // scale
+                break
+
+    decoded = decoded_width * decoded_height * bytes_per_pixel
+    output = target_width * target_height * 4
+    return int(decoded * 1.25) + 2 * output
+
+
+def compress_image(original_path, new_path, max_dimension=1280, quality=80, fast_downscale=True,
+                   reduced_decode=False):
+    """
+    Downscale an image to fit max_dimension and save it as JPEG
+
+    With fast_downscale, sources much larger than the output take the fast
+    path: JPEGs are decoded directly at 1/2, 1/4 or 1/8 scale (Image.draft)
+    and the resize first reduces by an integer factor (reducing_gap). Other
+    images use a full decode and a plain LANCZOS resize. reduced_decode,
+    used for images too large for the memory budget, drops the oversampling
+    guard so JPEGs decode at the smallest scale that still covers the output.
+
+    Args:
+        original_path (str): Source image
+        new_path (str): Destination JPEG path, or None to encode in memory
+        max_dimension (int): Longest side of the output
+        quality (int): JPEG quality
+        fast_downscale (bool): Allow the reduced-resolution fast path
+        reduced_decode (bool): Decode JPEGs as close to the output size as possible
+
+    Returns:
+        dict: Output path, size in bytes, width, height and whether the fast path was used;
+            'data' holds the JPEG bytes when encoded in memory
+    """
+    fast_path = False
+    with Image.open(original_path) as img:
+        # Check if resizing is needed
+        width, height = img.size
+        if width > max_dimension or height > max_dimension:
+            new_width, new_height = get_target_size(width, height, max_dimension)
+
+            oversample = 1 if reduced_decode else DRAFT_OVERSAMPLE
+            fast_path = (fast_downscale or reduced_decode) and width >= new_width * oversample
+            if fast_path:
+                if img.format == 'JPEG':
+                    # Only scales that leave at least oversample x the output size are chosen
+                    img.draft('RGB', (new_width * oversample, new_height * oversample))
+                img_resized = img.resize((new_width, new_height), Image.Resampling.LANCZOS,
+                                         reducing_gap=REDUCING_GAP)
+            else:
+                img_resized = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        else:
+            img_resized = img
+
+        img_resized = img_resized.convert('RGB')
+        data = None
+        if new_path is None:
+            data = encode_to_buffer(img_resized, quality)
+        else:
+            img_resized.save(new_path, 'JPEG', quality=quality)
+        output_width, output_height = img_resized.size
+
+    return {
+        'path': new_path,
+        'size': len(data) if data is not None else os.path.getsize(new_path),
+        'width': output_width,
+        'height': output_height,
+        'fast_path': fast_path,
+        'data': data
+    }
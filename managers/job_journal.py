@@ -0,0 +1,127 @@
+# managers/job_journal.py
+
+import os
+import json
+import time
+from utils.logger import Logger
+
+# Item fields written with each event, so a resumed run can restore them
+EVENT_FIELDS = {
+    'compressed': ('processed_path', 'compressed_filename', 'compressed_size', 'filesize', 'mtime_ns'),
+    'uploaded': ('s3_key', 'cloudfront_url'),
+}
+
+
+class JobJournal:
+    """
+    Append-only JSONL journal of the stage transitions of each workload item.
+
+    Every line is one event ({'event', 'path', 'time', ...}); a run starts
+    with 'run_started' and ends with 'run_finished'. Lines are flushed as
+    they are written, so an application crash loses nothing, and fsync'd at
+    most every fsync_interval seconds, so a power loss or sleep loses at most
+    that much. A run without 'run_finished' can be resumed: load() replays
+    the journal into the last known state of each file. A new run that does
+    not resume truncates the journal.
+    """
+
+    def __init__(self, path, fsync_interval=0.5):
+        """
+        Args:
+            path (str): Journal file
+            fsync_interval (float): Maximum seconds between fsyncs
+        """
+        self.logger = Logger()
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self._file = None
+        self._last_sync = 0.0
+        self._pending = 0
+
+    def load(self):
+        """
+        Replay the journal
+
+        Torn lines from a crash mid-write are skipped.
+
+        Returns:
+            tuple: (bool, dict, float) - (Whether the last run is unfinished,
+                path -> {'state': last event, plus the fields recorded with it},
+                start time of the last run or None)
+        """
+        states = {}
+        unfinished = False
+        started_at = None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    event = record.pop('event', None)
+                    if event == 'run_started':
+                        unfinished, started_at = True, record.get('time')
+                    elif event == 'run_finished':
+                        unfinished = False
+                    elif 'path' in record:
+                        state = states.setdefault(record.pop('path'), {})
+                        record.pop('time', None)
+                        state.update(record)
+                        state['state'] = event
+        except FileNotFoundError:
+            pass
+        return unfinished, states, started_at
+
+    def start_run(self, resume=False, **details):
+        """Open the journal for a run, truncating it unless the previous run is resumed"""
+        self.close()
+        self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+        if resume and self._file.tell() > 0:
+            # Terminate a line torn by the crash so the first new event stays readable
+            self._file.write('\n')
+        self._write({'event': 'run_started', 'time': time.time(), 'resume': resume, **details})
+        self.sync()
+
+    def record(self, item, event):
+        """Append an item's transition to the given state"""
+        if self._file is None:
+            return
+        record = {'event': event, 'path': item['original_path'], 'time': time.time()}
+        for field in EVENT_FIELDS.get(event, ()):
+            if field in item:
+                record[field] = item[field]
+        self._write(record)
+
+    def finish_run(self):
+        """Mark the run complete and close the journal"""
+        if self._file is None:
+            return
+        self._write({'event': 'run_finished', 'time': time.time()})
+        self.close()
+
+    def sync(self):
+        """Force written events to disk"""
+        if self._file is not None and self._pending:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        """Sync and close the journal"""
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def _write(self, record):
+        """Append one line, fsyncing if the last sync is older than the interval"""
+        try:
+            self._file.write(json.dumps(record) + '\n')
+            self._file.flush()
+            self._pending += 1
+            if time.monotonic() - self._last_sync >= self.fsync_interval:
+                self.sync()
+        except OSError as e:
+            self.logger.error(f"Failed to write job journal {self.path}: {e}")
@@ -0,0 +1,192 @@
+# managers/link_index.py
+
+import os
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from managers.link_lexer import iter_links, link_basename
+from managers.database import open_database
+from utils.logger import Logger
+
+# Bump when the lexer changes which links it finds, so every note is re-tokenized
+TOKENIZER_VERSION = 2
+
+
+def tokenize_note(content):
+    """
+    Find every link in a note's raw bytes
+
+    Returns:
+        list: (basename, start, end) tuples with byte offsets of each link
+    """
+    text = content.decode('utf-8', errors='replace')
+    links = []
+    position = 0
+    byte_position = 0
+    for link in iter_links(text):
+        # Convert character offsets to byte offsets incrementally; starts only move forward,
+        # but a link nested in another's label starts before the outer link ends
+        start = byte_position + len(text[position:link.start].encode('utf-8'))
+        end = start + len(text[link.start:link.end].encode('utf-8'))
+        position, byte_position = link.start, start
+        basename = link_basename(link)
+        if basename:
+            links.append((basename, start, end))
+    return links
+
+
+class LinkIndex:
+    """
+    Persistent reverse index from attachment names to the notes linking them.
+
+    Notes are tokenized once and re-tokenized only when their size, mtime and
+    content hash say they changed, so finding the notes that embed a batch of
+    attachments is a lookup instead of a full-vault scan.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS notes (
+            path TEXT PRIMARY KEY,
+            root TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            content_hash TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS notes_root ON notes(root);
+        CREATE TABLE IF NOT EXISTS links (
+            note_path TEXT NOT NULL,
+            target TEXT NOT NULL,
+            start INTEGER NOT NULL,
+            end INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS links_target ON links(target);
+        CREATE INDEX IF NOT EXISTS links_note ON links(note_path);
+        CREATE TABLE IF NOT EXISTS link_index_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, db_path, max_workers=None):
+        """
+        Open (or create) the link index tables
+
+        Args:
+            db_path (str): Path of the SQLite database file
+            max_workers (int, optional): Threads used to stat and read notes
+        """
+        self.logger = Logger()
+        self.db_path = db_path
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self._lock = threading.Lock()
+        self._conn = open_database(db_path, self.SCHEMA)
+        self._check_tokenizer_version()
+
+    def _check_tokenizer_version(self):
+        """Drop the indexed links if they were found by an older version of the lexer"""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT value FROM link_index_meta WHERE key = 'tokenizer_version'").fetchone()
+            if row and int(row[0]) == TOKENIZER_VERSION:
+                return
+            self._conn.execute("DELETE FROM notes")
+            self._conn.execute("DELETE FROM links")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO link_index_meta (key, value) VALUES ('tokenizer_version', ?)",
+                (str(TOKENIZER_VERSION),)
+            )
+        if row:
+            self.logger.info("Link lexer changed, every note will be re-tokenized")
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def update(self, root, note_paths):
+        """
+        Re-tokenize the notes that changed since the last update
+
+        Args:
+            root (str): Vault directory
+            note_paths (list): Paths of every markdown file currently in the vault
+        """
+        started = time.perf_counter()
+        root = os.path.normpath(root)
+        with self._lock:
+            known = {
+                path: (size, mtime_ns, content_hash)
+                for path, size, mtime_ns, content_hash in self._conn.execute(
+                    "SELECT path, size, mtime_ns, content_hash FROM notes WHERE root = ?", (root,)
+                )
+            }
+
+        def refresh_note(path):
+            """Stat a note and tokenize it if it changed; returns None when unchanged"""
+            try:
+                stat = os.stat(path)
+                previous = known.get(path)
+                if previous and previous[:2] == (stat.st_size, stat.st_mtime_ns):
+                    return None
+                with open(path, 'rb') as f:
+                    content = f.read()
+            except OSError as e:
+                self.logger.warning(f"Cannot index links in {path}: {e}")
+                return None
+            content_hash = hashlib.blake2b(content, digest_size=20).hexdigest()
+            if previous and previous[2] == content_hash:
+                return path, stat.st_size, stat.st_mtime_ns, content_hash, None
+            return path, stat.st_size, stat.st_mtime_ns, content_hash, tokenize_note(content)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            updates = [result for result in executor.map(refresh_note, note_paths) if result]
+
+        current = set(note_paths)
+        removed = [path for path in known if path not in current]
+        retokenized = 0
+        with self._lock, self._conn:
+            for path in removed:
+                self._conn.execute("DELETE FROM notes WHERE path = ?", (path,))
+                self._conn.execute("DELETE FROM links WHERE note_path = ?", (path,))
+            for path, size, mtime_ns, content_hash, links in updates:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO notes (path, root, size, mtime_ns, content_hash) VALUES (?, ?, ?, ?, ?)",
+                    (path, root, size, mtime_ns, content_hash)
+                )
+                if links is None:
+                    continue
+                retokenized += 1
+                self._conn.execute("DELETE FROM links WHERE note_path = ?", (path,))
+                self._conn.executemany(
+                    "INSERT INTO links (note_path, target, start, end) VALUES (?, ?, ?, ?)",
+                    [(path, basename, start, end) for basename, start, end in links]
+                )
+
+        elapsed = time.perf_counter() - started
+        self.logger.info(
+            f"Updated link index in {elapsed:.2f}s: {len(note_paths)} notes, "
+            f"{retokenized} re-tokenized, {len(removed)} removed"
+        )
+
+    def find_notes(self, filenames):
+        """
+        Find the notes that link to any of the given attachments
+
+        Args:
+            filenames (iterable): Attachment file names
+
+        Returns:
+            dict: Maps note path to a list of (filename, start, end) byte ranges
+        """
+        filenames = list(set(filenames))
+        notes = {}
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(filenames), 500):
+                batch = filenames[i:i + 500]
+                placeholders = ','.join('?' * len(batch))
+                for note_path, target, start, end in self._conn.execute(
+                    f"SELECT note_path, target, start, end FROM links WHERE target IN ({placeholders})", batch
+                ):
+                    notes.setdefault(note_path, []).append((target, start, end))
+        return notes
@@ -0,0 +1,272 @@
+# managers/link_lexer.py
+
+"""
+Single-pass lexer for the links in a markdown note.
+
+Finds every wikilink, embed, markdown link and image in one left-to-right
+pass, skipping fenced code blocks and inline code. Links in YAML
+frontmatter (Obsidian properties such as cover: "[[a.png]]") are real
+references and are lexed too, flagged with frontmatter=True.
+Brackets and parentheses are matched per line with a stack, so labels may
+nest (a linked image is a link whose label is an image) and bare
+destinations may hold balanced parentheses, and a note is still lexed in
+linear time even when it is full of unbalanced brackets or backticks.
+
+    >>> [(link.target, link.embed) for link in iter_links('[![img](a.png)](https://x.com/b)')]
+    [('https://x.com/b', False), ('a.png', True)]
+    >>> [link.target for link in iter_links('![a](my file (1).png)')]
+    ['my file (1).png']
+    >>> [link.target for link in iter_links('[a](x.png "A title")')]
+    ['x.png']
+    >>> [len(link.target) for link in iter_links('[a](x' + ' ' * 100000 + '")')]
+    [100002]
+    >>> rewrite_links('[![img](a.png)](https://x.com/b)',
+    ...               lambda link: '![img](https://cdn/a.jpg)' if link.target == 'a.png' else None)
+    ('[![img](https://cdn/a.jpg)](https://x.com/b)', 1)
+    >>> [(link.target, link.frontmatter) for link in iter_links('---\\ncover: "[[a.png]]"\\n---\\n![[b.png]]')]
+    [('a.png', True), ('b.png', False)]
+"""
+
+import re
+from collections import namedtuple
+from urllib.parse import unquote
+
+# style is 'wiki' for [[...]] and 'markdown' for [...](...); label is the
+# wikilink alias or the markdown link text; subpath keeps its leading '#';
+# frontmatter is True for links in the YAML frontmatter.
+Link = namedtuple('Link', ['start', 'end', 'embed', 'style', 'target', 'subpath', 'label', 'frontmatter'])
+
+LINK_START_PATTERN = re.compile(r'\[')
+BACKTICK_PATTERN = re.compile(r'`+')
+# Escaped characters are matched whole so they never count as delimiters
+PAIR_PATTERN = re.compile(r'\\.|[\[\]()]')
+FENCE_PATTERN = re.compile(r' {0,3}(`{3,}|~{3,})')
+
+
+def iter_links(text):
+    """
+    Yield every link in a note in document order
+
+    Args:
+        text (str): Note content
+
+    Yields:
+        Link: One token per link, with character offsets into text
+    """
+    lines = text.splitlines(keepends=True)
+    index = _frontmatter_end(lines)
+    offset = 0
+    for line in lines[:index]:
+        yield from _iter_line_links(line, offset, frontmatter=True)
+        offset += len(line)
+    fence = None
+
+    for line in lines[index:]:
+        fence_match = FENCE_PATTERN.match(line)
+        if fence is not None:
+            if fence_match and fence_match.group(1)[0] == fence[0] and len(fence_match.group(1)) >= len(fence) \
+                    and not line[fence_match.end():].strip():
+                fence = None
+        elif fence_match and not (fence_match.group(1)[0] == '`' and '`' in line[fence_match.end():]):
+            fence = fence_match.group(1)
+        else:
+            yield from _iter_line_links(line, offset)
+        offset += len(line)
+
+
+def _frontmatter_end(lines):
+    """Get the index of the first line after YAML frontmatter, or 0 if there is none"""
+    if not lines or lines[0].rstrip('\r\n') != '---':
+        return 0
+    for i in range(1, len(lines)):
+        if lines[i].rstrip('\r\n') in ('---', '...'):
+            return i + 1
+    return 0
+
+
+def _iter_line_links(line, offset, frontmatter=False):
+    """Yield the links in a single line outside of inline code"""
+    code_spans = _code_spans(line)
+    bracket_pairs, paren_pairs = _match_pairs(line, code_spans)
+
+    close_bracket = -1  # First ']' at or after the current position, for wikilinks
+    close_angle = -1    # First '>' at or after the current position, for <...> destinations
+    resume = 0
+    span_index = 0
+    destinations = []   # (start, end) of destinations of links whose labels are still being lexed
+
+    for token in LINK_START_PATTERN.finditer(line):
+        start = token.start()
+        if start < resume:
+            continue
+        while span_index < len(code_spans) and code_spans[span_index][1] <= start:
+            span_index += 1
+        if span_index < len(code_spans) and code_spans[span_index][0] <= start:
+            resume = code_spans[span_index][1]
+            continue
+        destinations = [(begin, end) for begin, end in destinations if end > start]
+        if any(begin <= start for begin, _ in destinations):
+            continue
+
+        if start > 0 and line[start - 1] == '\\':
+            continue
+        embed = start > 0 and line[start - 1] == '!'
+        link_start = start - 1 if embed else start
+
+        if line.startswith('[[', start):
+            if close_bracket < start:
+                close_bracket = line.find(']', start)
+                if close_bracket == -1:
+                    # No closing bracket anywhere further on this line
+                    return
+            end = close_bracket
+            if end > start + 2 and line.startswith(']]', end):
+                inner = line[start + 2:end]
+                target, _, label = inner.partition('|')
+                target, hash_mark, subpath = target.partition('#')
+                yield Link(offset + link_start, offset + end + 2, embed, 'wiki',
+                           target.strip(), hash_mark + subpath, label, frontmatter)
+                resume = end + 2
+                continue
+
+        end = bracket_pairs.get(start)
+        if end is None or not line.startswith('(', end + 1):
+            continue
+        destination_start = end + 2
+        while destination_start < len(line) and line[destination_start] in ' \t':
+            destination_start += 1
+        if line.startswith('<', destination_start):
+            if close_angle < destination_start:
+                close_angle = line.find('>', destination_start)
+                if close_angle == -1:
+                    close_angle = len(line)
+            close_paren = line.find(')', close_angle)
+            if close_angle == len(line) or close_paren == -1:
+                continue
+            destination = line[destination_start + 1:close_angle]
+        else:
+            # Bare destinations may contain balanced parentheses, as in 'my file (1).png'
+            close_paren = paren_pairs.get(end + 1)
+            if close_paren is None:
+                continue
+            destination = _strip_title(line[destination_start:close_paren])
+        target, hash_mark, subpath = destination.partition('#')
+        if not target:
+            continue
+        yield Link(offset + link_start, offset + close_paren + 1, embed, 'markdown',
+                   target, hash_mark + subpath, line[start + 1:end], frontmatter)
+        if embed:
+            resume = close_paren + 1
+        else:
+            # A link's label may hold an image, as in [![alt](image.png)](url); only its destination is skipped
+            destinations.append((end, close_paren + 1))
+
+
+def _strip_title(destination):
+    """Strip surrounding whitespace and a trailing quoted title from a bare destination"""
+    destination = destination.strip()
+    quote = destination[-1:]
+    if quote not in ('"', "'"):
+        return destination
+    # Searched from the right so long runs of whitespace are scanned only once
+    opening = destination.rfind(quote, 0, len(destination) - 1)
+    if opening > 0 and destination[opening - 1].isspace():
+        return destination[:opening].rstrip()
+    return destination
+
+
+def _code_spans(line):
+    """Get the (start, end) ranges of the inline code spans in a line, in order"""
+    runs = {}
+    for match in BACKTICK_PATTERN.finditer(line):
+        runs.setdefault(len(match.group()), []).append(match.start())
+    run_cursor = {length: 0 for length in runs}
+
+    spans = []
+    resume = 0
+    for match in BACKTICK_PATTERN.finditer(line):
+        start = match.start()
+        if start < resume:
+            continue
+        # Inline code runs to the next backtick run of the same length
+        length = len(match.group())
+        positions = runs[length]
+        cursor = run_cursor[length]
+        while cursor < len(positions) and positions[cursor] <= start:
+            cursor += 1
+        run_cursor[length] = cursor
+        if cursor < len(positions):
+            resume = positions[cursor] + length
+            spans.append((start, resume))
+    return spans
+
+
+def _match_pairs(line, code_spans):
+    """
+    Match the brackets and the parentheses of a line outside of inline code and escapes
+
+    Returns:
+        tuple: (dict, dict) - Position of each matched '[' and '(' -> position of its closing character
+    """
+    brackets, parens = {}, {}
+    open_brackets, open_parens = [], []
+    span_index = 0
+    for match in PAIR_PATTERN.finditer(line):
+        position = match.start()
+        while span_index < len(code_spans) and code_spans[span_index][1] <= position:
+            span_index += 1
+        if span_index < len(code_spans) and code_spans[span_index][0] <= position:
+            continue
+        char = match.group()
+        if char == '[':
+            open_brackets.append(position)
+        elif char == ']':
+            if open_brackets:
+                brackets[open_brackets.pop()] = position
+        elif char == '(':
+            open_parens.append(position)
+        elif char == ')':
+            if open_parens:
+                parens[open_parens.pop()] = position
+    return brackets, parens
+
+
+def link_basename(link):
+    """Get the file name a link points at, without folders or subpath"""
+    target = link.target
+    if link.style == 'markdown':
+        target = unquote(target)
+    return re.split(r'[/\\]', target)[-1]
+
+
+def rewrite_links(text, replace):
+    """
+    Rewrite links in a single pass into one output buffer
+
+    Links nested in the label of a replaced link (the image of a linked
+    image) are part of its replacement and are skipped.
+
+    Args:
+        text (str): Note content
+        replace (callable): Called with each Link; returns the replacement text or None to keep it
+
+    Returns:
+        tuple: (str, int) - (New content, number of links replaced)
+    """
+    parts = []
+    last = 0
+    replaced = 0
+    for link in iter_links(text):
+        if link.start < last:
+            continue
+        replacement = replace(link)
+        if replacement is None:
+            continue
+        parts.append(text[last:link.start])
+        parts.append(replacement)
+        last = link.end
+        replaced += 1
+    if not replaced:
+        return text, 0
+    parts.append(text[last:])
+    return ''.join(parts), replaced
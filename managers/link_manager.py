@@ -1,42 +1,60 @@
-import re
 import os
 from utils.logger import Logger
 from managers.config_manager import ConfigManager
 from managers.file_manager import FileManager
+from managers.link_index import LinkIndex
+from managers.link_lexer import iter_links, link_basename, rewrite_links
+from managers.link_rewriter import is_video_file, render_cloudfront_link, rewrite_content
 
 class LinkManager:
-    def __init__(self, vault_path):
+    def __init__(self, vault_path, file_manager=None):
         """Initialize LinkManager with the path to the Obsidian vault"""
         self.vault_path = vault_path
         self.config_manager = ConfigManager()
-        self.file_manager = FileManager()
+        self.file_manager = file_manager
+        if self.file_manager is None:
+            self.file_manager = FileManager()
+            self.file_manager.set_vault_path(vault_path)
         self.logger = Logger()
+        self._link_index = None
+        self._link_index_enabled = self.config_manager.get('link_index', {}).get('enabled', True)
 
-    def create_pattern_for_file(self, filename):
-        """Create regex patterns for a specific filename in all supported link formats"""
-        # Escape special characters in filename while preserving dots
-        escaped_filename = re.escape(filename).replace(r'\.', '.')
-        
-        # Create patterns for both wikilinks and standard markdown links
-        # Allow for optional path components before the filename
-        path_component = r'(?:[^]\[/\\]+/)*'  # Matches any path segments before filename
-        block_ref = r'(?:#\^[a-zA-Z0-9-_]+)?'  # Optional block reference
-        
-        patterns = [
-            # Obsidian wikilinks with optional path, alias, and block reference
-            f"!?\\[\\[{path_component}{escaped_filename}{block_ref}(?:\\|[^\\]]*)?\\]\\]",
-            
-            # Markdown image/link with optional path
-            f"!?\\[[^\\]]*\\]\\({path_component}{escaped_filename}{block_ref}\\)",
-            
-            # Handle relative path references (../ or ./)
-            f"!?\\[\\[(?:\\.\\./)*{path_component}{escaped_filename}{block_ref}(?:\\|[^\\]]*)?\\]\\]",
-            f"!?\\[[^\\]]*\\]\\((?:\\.\\./)*{path_component}{escaped_filename}{block_ref}\\)"
-        ]
-        
-        # Combine patterns with OR operator
-        combined_pattern = '|'.join(f"(?:{pattern})" for pattern in patterns)
-        return re.compile(combined_pattern)
+    @property
+    def link_index(self):
+        """Lazy initialization of the reverse link index, or None if disabled"""
+        if self._link_index is None and self._link_index_enabled:
+            index_file = self.config_manager.get('vault_index', {}).get('file', 'vault_index.db')
+            db_path = self.config_manager.get_data_path(index_file)
+            try:
+                self._link_index = LinkIndex(db_path)
+            except Exception as e:
+                self.logger.error(f"Cannot open link index {db_path}, falling back to full scans: {e}")
+                self._link_index_enabled = False
+        return self._link_index
+
+    def get_referencing_notes(self, filenames, refresh_index=True):
+        """
+        Get the markdown files that link to any of the given media files
+
+        Args:
+            filenames (iterable): Original media file names
+            refresh_index (bool): Re-check notes for changes before the lookup
+
+        Returns:
+            list: Paths of the notes to rewrite; every note in the vault if the index is unavailable
+        """
+        markdown_files = self.file_manager.get_markdown_files()
+        if self.link_index is None:
+            return markdown_files
+        try:
+            if refresh_index:
+                self.link_index.update(self.vault_path, markdown_files)
+            notes = self.link_index.find_notes(filenames)
+        except Exception as e:
+            self.logger.error(f"Link index lookup failed, scanning every note: {e}")
+            return markdown_files
+        self.logger.info(f"{len(notes)} of {len(markdown_files)} notes reference the uploaded files")
+        return sorted(notes)
 
     def find_media_links(self, markdown_file_path, workload):
         """Find all media links in a markdown file that match files in the workload"""
@@ -44,38 +62,29 @@ class LinkManager:
             with open(markdown_file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
 
+            # Map each workload filename to its path for a single lookup per link
+            workload_files = {os.path.basename(item['path']): item['path'] for item in workload}
+
             # Create a dictionary to store results for each file
             results = {}
-            
-            # For each file in workload, find all its occurrences in the markdown
-            for item in workload:
-                filename = os.path.basename(item['path'])
-                pattern = self.create_pattern_for_file(filename)
-                
-                # Use a set to track unique positions to avoid duplicates
-                unique_matches = {}
-                
-                for match in pattern.finditer(content):
-                    # Create a unique key based on the start and end position
-                    pos_key = (match.start(), match.end())
-                    if pos_key not in unique_matches:
-                        unique_matches[pos_key] = {
-                            'full_match': match.group(0),
-                            'position': pos_key,
-                            'original_path': item['path']
-                        }
-                
-                if unique_matches:
-                    results[filename] = {
-                        'matches': list(unique_matches.values())
-                    }
-                    
-                    # Log each unique match with relative path info
-                    rel_path = os.path.relpath(markdown_file_path, self.vault_path)
-                    for match_data in unique_matches.values():
-                        self.logger.info(f"Found link in {rel_path} for file: {filename}")
-                        self.logger.info(f"  Full match: {match_data['full_match']}")
-                        self.logger.info(f"  Position: {match_data['position'][0]}-{match_data['position'][1]}")
+            rel_path = os.path.relpath(markdown_file_path, self.vault_path)
+
+            for link in iter_links(content):
+                filename = link_basename(link)
+                if filename not in workload_files:
+                    continue
+
+                match_data = {
+                    'full_match': content[link.start:link.end],
+                    'position': (link.start, link.end),
+                    'original_path': workload_files[filename]
+                }
+                results.setdefault(filename, {'matches': []})['matches'].append(match_data)
+
+                # Log each match with relative path info
+                self.logger.info(f"Found link in {rel_path} for file: {filename}")
+                self.logger.info(f"  Full match: {match_data['full_match']}")
+                self.logger.info(f"  Position: {match_data['position'][0]}-{match_data['position'][1]}")
 
             return results
 
@@ -90,13 +99,11 @@ class LinkManager:
         # Dictionary to store all results
         all_results = {}
         
-        for root, _, files in os.walk(self.vault_path):
-            for file in files:
-                if file.endswith('.md'):
-                    markdown_path = os.path.join(root, file)
-                    results = self.find_media_links(markdown_path, workload)
-                    if results:
-                        all_results[markdown_path] = results
+        filenames = [os.path.basename(item['path']) for item in workload]
+        for markdown_path in self.get_referencing_notes(filenames):
+            results = self.find_media_links(markdown_path, workload)
+            if results:
+                all_results[markdown_path] = results
 
         self.logger.info(f"Vault scan complete. Found media links in {len(all_results)} markdown files")
         return all_results
@@ -112,44 +119,26 @@ class LinkManager:
             
         return f"{base_url}/{subfolder}{compressed_filename}"
 
+    def render_external_link(self, link, external_url):
+        """Render a link token pointing at its external URL, preserving the link format"""
+        block_ref = link.subpath if link.subpath.startswith('#^') else ""
+        if link.style == 'wiki':
+            alias = f"|{link.label}" if link.label else ""
+            prefix = "![[" if link.embed else "[["
+            return f"{prefix}{external_url}{block_ref}{alias}]]"
+        prefix = "![" if link.embed else "["
+        return f"{prefix}{link.label}]({external_url}{block_ref})"
+
     def replace_link_in_content(self, content, original_filename, compressed_filename):
         """Replace all occurrences of a media file link in the content with its external URL"""
-        pattern = self.create_pattern_for_file(original_filename)
         external_url = self.create_external_url(compressed_filename)
-        
-        def replace_match(match):
-            full_match = match.group(0)
-            
-            # Extract block reference if present
-            block_ref = ""
-            block_ref_match = re.search(r'(#\^[a-zA-Z0-9-_]+)', full_match)
-            if block_ref_match:
-                block_ref = block_ref_match.group(1)
-            
-            # Extract alias if present
-            alias = ""
-            alias_match = re.search(r'\|(.*?)(?:\#|\])', full_match)
-            if alias_match:
-                alias = f"|{alias_match.group(1)}"
-            
-            # Handle different link formats
-            if full_match.startswith('![['):
-                # Obsidian wikilink with image embed
-                return f"![[{external_url}{block_ref}{alias}]]"
-            elif full_match.startswith('[['):
-                # Obsidian wikilink without image embed
-                return f"[[{external_url}{block_ref}{alias}]]"
-            elif full_match.startswith('!['):
-                # Markdown image link
-                alt_text = re.search(r'!\[(.*?)\]', full_match).group(1)
-                return f"![{alt_text}]({external_url}{block_ref})"
-            else:
-                # Regular Markdown link
-                alt_text = re.search(r'\[(.*?)\]', full_match).group(1)
-                return f"[{alt_text}]({external_url}{block_ref})"
-        
-        # Replace all occurrences while preserving the link format
-        new_content = pattern.sub(replace_match, content)
+
+        def replace(link):
+            if link_basename(link) != original_filename:
+                return None
+            return self.render_external_link(link, external_url)
+
+        new_content, _ = rewrite_links(content, replace)
         return new_content
 
     def replace_media_links(self, markdown_file_path, media_mapping):
@@ -169,15 +158,17 @@ class LinkManager:
             with open(markdown_file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
             
-            # Keep track of changes
-            original_content = content
-            
-            # Replace each media file link
-            for original_file, compressed_file in media_mapping.items():
-                content = self.replace_link_in_content(content, original_file, compressed_file)
-            
+            # Replace every mapped media file link in one pass
+            def replace(link):
+                compressed_file = media_mapping.get(link_basename(link))
+                if compressed_file is None:
+                    return None
+                return self.render_external_link(link, self.create_external_url(compressed_file))
+
+            content, replaced = rewrite_links(content, replace)
+
             # Check if any changes were made
-            if content == original_content:
+            if not replaced:
                 return True, "No changes needed"  # No changes needed
             
             # Write the updated content back to the file
@@ -193,52 +184,13 @@ class LinkManager:
 
     def is_video_file(self, filename):
         """Check if the file is a video based on extension"""
-        video_extensions = {'.mp4', '.mov', '.avi', '.mkv', '.webm', '.m4v'}
-        return any(filename.lower().endswith(ext) for ext in video_extensions)
+        return is_video_file(filename)
 
-    def replace_match(self, match, cloudfront_url, original_file):
-        """
-        Replace a matched link with the appropriate CloudFront URL format.
-        Always converts internal Obsidian links to proper markdown links.
-        For videos, uses HTML5 video tag.
-        """
-        full_match = match.group(0)
-        
-        # Extract block reference if present
-        block_ref = ""
-        block_ref_match = re.search(r'(#\^[a-zA-Z0-9-_]+)', full_match)
-        if block_ref_match:
-            block_ref = block_ref_match.group(1)
-        
-        # Extract alias if present
-        alias = ""
-        alias_match = re.search(r'\|(.*?)(?:\#|\])', full_match)
-        if alias_match:
-            alias = alias_match.group(1)
-        
-        # Get the display text (either alias or original filename)
-        original_name = re.search(r'\[\[(.*?)(?:\||#|\])', full_match) or re.search(r'!\[(.*?)\]', full_match) or re.search(r'\[(.*?)\]', full_match)
-        display_text = alias or (original_name.group(1) if original_name else "")
+    def replace_match(self, link, cloudfront_url, original_file):
+        """Replace a link token with the appropriate CloudFront URL format."""
+        return render_cloudfront_link(link, cloudfront_url, original_file)
 
-        # Special handling for video files
-        if self.is_video_file(original_file):
-            return f'<video controls width="600">\n    <source src="{cloudfront_url}" type="video/mp4">\n</video>'
-        
-        # Handle different link formats for images
-        if full_match.startswith('![['):
-            # Convert Obsidian image embed to markdown image link
-            return f"![{display_text}]({cloudfront_url}{block_ref})"
-        elif full_match.startswith('[['):
-            # Convert Obsidian wikilink to markdown link
-            return f"[{display_text}]({cloudfront_url}{block_ref})"
-        elif full_match.startswith('!['):
-            # Already markdown image link
-            return f"![{display_text}]({cloudfront_url}{block_ref})"
-        else:
-            # Already markdown link
-            return f"[{display_text}]({cloudfront_url}{block_ref})"
-
-    def replace_cloudfront_links(self, markdown_file, media_mapping):
+    def replace_cloudfront_links(self, markdown_file, media_mapping, prefilter=None):
         """
         Replace media links with CloudFront URLs in a markdown file
         
@@ -246,29 +198,24 @@ class LinkManager:
             markdown_file (str): Path to the markdown file
             media_mapping (dict): Dictionary mapping original filenames to CloudFront URLs
                                 Format: {'original.jpg': 'https://...'}
+            prefilter (AttachmentPrefilter, optional): Skips the note if its bytes contain no mapped name
         
         Returns:
             tuple: (bool, str) - (Success status, Message)
         """
         try:
+            if prefilter is not None and not prefilter.scan_file(markdown_file):
+                return True, "No changes needed"
+
             success, content = self.file_manager.read_markdown_file(markdown_file)
             if not success:
                 return False, content  # content contains error message
             
-            original_content = content
-            modified = False
-            
-            for original_name, cloudfront_url in media_mapping.items():
-                pattern = self.create_pattern_for_file(original_name)
-                
-                # Replace all occurrences while preserving the link format
-                new_content = pattern.sub(lambda m: self.replace_match(m, cloudfront_url, original_name), content)
-                if new_content != content:
-                    content = new_content
-                    modified = True
-                    self.logger.info(f"Replaced links for {original_name} in {markdown_file}")
-            
-            if modified:
+            # Rewrite every mapped link in a single pass over the note
+            content, replaced_names = rewrite_content(content, media_mapping)
+            replaced = len(replaced_names)
+            if replaced:
+                self.logger.info(f"Replaced {replaced} links in {markdown_file}")
                 success, message = self.file_manager.write_markdown_file(markdown_file, content)
                 if success:
                     self.logger.info(f"Updated links in {markdown_file}")
@@ -291,12 +238,9 @@ class LinkManager:
             relative_path = os.path.basename(old_path)
             updated = False
             
-            for root, _, files in os.walk(self.vault_path):
-                for file in files:
-                    if file.endswith('.md'):
-                        markdown_path = os.path.join(root, file)
-                        if self.replace_media_links(markdown_path, {relative_path: workload_item['compressed_filename']}):
-                            updated = True
+            for markdown_path in self.get_referencing_notes([relative_path]):
+                if self.replace_media_links(markdown_path, {relative_path: workload_item['compressed_filename']}):
+                    updated = True
             
             if updated:
                 self.logger.info(f"Updated links for {old_path} to {new_url}")
@@ -0,0 +1,136 @@
+# managers/link_prefilter.py
+
+import logging
+import mmap
+from urllib.parse import quote, unquote_to_bytes
+
+# Also used in link-rewrite worker processes, so this logs through the standard
+# library logger that utils.logger.Logger wraps instead of importing it (and Qt)
+logger = logging.getLogger("ObsCloudMigrate")
+
+try:
+    import ahocorasick  # Optional C Aho-Corasick implementation (pyahocorasick)
+except ImportError:
+    ahocorasick = None
+
+
+class AttachmentPrefilter:
+    """
+    Multi-pattern byte search for attachment names in raw note files.
+
+    Notes with no occurrence of any candidate name cannot contain a link to
+    them, so the link phase skips them without decoding. Matching uses an
+    Aho-Corasick automaton when pyahocorasick is installed. Otherwise every
+    occurrence of a name's last bytes (almost always its extension) is found
+    with bytes.find and checked against the names of each length ending
+    there, which keeps the search in C. Notes with no match that contain
+    '%' are matched again after percent-decoding, since a link destination
+    may encode only some characters of a name.
+    """
+
+    TAIL_LENGTH = 4
+
+    def __init__(self, filenames):
+        """
+        Build the matcher for a batch of attachment names
+
+        Args:
+            filenames (iterable): Attachment file names as they appear in links
+        """
+        patterns = set()
+        for filename in filenames:
+            patterns.add(filename.encode('utf-8'))
+            # Markdown links may percent-encode spaces and other characters
+            patterns.add(quote(filename).encode('utf-8'))
+        patterns.discard(b'')
+        self.patterns = patterns
+
+        self.hits = {}  # note path -> number of name occurrences
+        self.notes_scanned = 0
+        self.notes_matched = 0
+
+        self._automaton = None
+        if ahocorasick is not None and patterns:
+            self._automaton = ahocorasick.Automaton()
+            for pattern in patterns:
+                # latin-1 maps bytes to code points 1:1, so this stays a byte-level match
+                self._automaton.add_word(pattern.decode('latin-1'), len(pattern))
+            self._automaton.make_automaton()
+        else:
+            self.tail_length = min([self.TAIL_LENGTH] + [len(pattern) for pattern in patterns])
+            self._by_tail = {}
+            for pattern in patterns:
+                tail = pattern[-self.tail_length:]
+                self._by_tail.setdefault(tail, {}).setdefault(len(pattern), set()).add(pattern)
+
+    def count_hits(self, data):
+        """Count occurrences of any candidate name in a bytes-like object"""
+        if not self.patterns:
+            return 0
+        hits = self._count_matches(data)
+        if not hits and data.find(b'%') != -1:
+            # e.g. 'a%20b&c.png' for 'a b&c.png': neither the raw nor the fully quoted name appears
+            hits = self._count_matches(unquote_to_bytes(bytes(data)))
+        return hits
+
+    def _count_matches(self, data):
+        """Count occurrences of the name patterns in a bytes-like object"""
+        if self._automaton is not None:
+            text = bytes(data).decode('latin-1')
+            return sum(1 for _ in self._automaton.iter(text))
+
+        hits = 0
+        for tail, by_length in self._by_tail.items():
+            position = data.find(tail)
+            while position != -1:
+                end = position + self.tail_length
+                for length, names in by_length.items():
+                    if length <= end and data[end - length:end] in names:
+                        hits += 1
+                position = data.find(tail, position + 1)
+        return hits
+
+    def scan_file(self, file_path):
+        """
+        Count candidate name occurrences in a note, reading it through mmap
+
+        Returns:
+            int: Number of hits; 0 means the note can be skipped
+        """
+        self.notes_scanned += 1
+        with open(file_path, 'rb') as f:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    hits = self.count_hits(data)
+            except ValueError:
+                # Empty files cannot be mapped
+                hits = 0
+        if hits:
+            self.notes_matched += 1
+            self.hits[file_path] = hits
+        return hits
+
+    def get_stats(self):
+        """
+        Get the selectivity metrics of the prefilter
+
+        Returns:
+            dict: notes_scanned, notes_matched, notes_skipped, total_hits, selectivity and per-note hits
+        """
+        return {
+            'notes_scanned': self.notes_scanned,
+            'notes_matched': self.notes_matched,
+            'notes_skipped': self.notes_scanned - self.notes_matched,
+            'total_hits': sum(self.hits.values()),
+            'selectivity': self.notes_matched / self.notes_scanned if self.notes_scanned else 0.0,
+            'hits': dict(self.hits)
+        }
+
+    def log_stats(self):
+        """Log a summary of how many notes the prefilter let through"""
+        stats = self.get_stats()
+        logger.info(
+            f"Link prefilter: {stats['notes_matched']} of {stats['notes_scanned']} notes matched "
+            f"({stats['selectivity']:.1%}), {stats['total_hits']} name hits, "
+            f"{stats['notes_skipped']} notes skipped without decoding"
+        )
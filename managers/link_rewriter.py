@@ -0,0 +1,110 @@
+# managers/link_rewriter.py
+
+"""
+Link rewriting that runs without Qt or manager state.
+
+Used directly by LinkManager and, through the pool initializer and chunk
+function below, by worker processes of the parallel link-rewrite engine.
+"""
+
+from managers.link_lexer import link_basename, rewrite_links
+from managers.link_prefilter import AttachmentPrefilter
+
+VIDEO_EXTENSIONS = {'.mp4', '.mov', '.avi', '.mkv', '.webm', '.m4v'}
+
+# Per-process state set once by init_worker
+_media_mapping = None
+_prefilter = None
+
+
+def is_video_file(filename):
+    """Check if the file is a video based on extension"""
+    return any(filename.lower().endswith(ext) for ext in VIDEO_EXTENSIONS)
+
+
+def render_cloudfront_link(link, cloudfront_url, original_file):
+    """
+    Render a link token as its CloudFront replacement.
+    Always converts internal Obsidian links to proper markdown links.
+    For videos, uses HTML5 video tag, except in frontmatter, where a
+    multi-line tag would break the YAML.
+    """
+    # Keep block references only
+    block_ref = link.subpath if link.subpath.startswith('#^') else ""
+
+    # Get the display text (alias, wikilink target or markdown link text)
+    if link.style == 'wiki':
+        display_text = link.label or link.target
+    else:
+        display_text = link.label
+
+    # Special handling for video files
+    if is_video_file(original_file) and not link.frontmatter:
+        return f'<video controls width="600">\n    <source src="{cloudfront_url}" type="video/mp4">\n</video>'
+
+    # Images become markdown image links, other links become markdown links
+    if link.embed:
+        return f"![{display_text}]({cloudfront_url}{block_ref})"
+    return f"[{display_text}]({cloudfront_url}{block_ref})"
+
+
+def rewrite_content(content, media_mapping):
+    """
+    Replace every mapped media link in a note's content
+
+    Returns:
+        tuple: (str, list) - (New content, original names of the replaced links)
+    """
+    replaced_names = []
+
+    def replace(link):
+        original_name = link_basename(link)
+        cloudfront_url = media_mapping.get(original_name)
+        if cloudfront_url is None:
+            return None
+        replaced_names.append(original_name)
+        return render_cloudfront_link(link, cloudfront_url, original_name)
+
+    new_content, _ = rewrite_links(content, replace)
+    return new_content, replaced_names
+
+
+def rewrite_note_file(markdown_file, media_mapping, prefilter=None):
+    """
+    Rewrite the media links of one note on disk
+
+    Returns:
+        dict: Change summary with path, hits, replaced, names and error; when
+            writing the note fails, names still lists the links it holds
+    """
+    summary = {'path': markdown_file, 'hits': None, 'replaced': 0, 'names': [], 'error': None}
+    try:
+        if prefilter is not None:
+            summary['hits'] = prefilter.scan_file(markdown_file)
+            if not summary['hits']:
+                return summary
+
+        with open(markdown_file, 'r', encoding='utf-8') as f:
+            content = f.read()
+
+        new_content, names = rewrite_content(content, media_mapping)
+        if names:
+            summary['names'] = sorted(set(names))
+            with open(markdown_file, 'w', encoding='utf-8') as f:
+                f.write(new_content)
+            summary['replaced'] = len(names)
+    except Exception as e:
+        summary['error'] = f"Error replacing links in {markdown_file}: {str(e)}"
+    return summary
+
+
+def init_worker(media_mapping):
+    """Process pool initializer: receive the media mapping once per worker"""
+    global _media_mapping, _prefilter
+    _media_mapping = media_mapping
+    _prefilter = AttachmentPrefilter(media_mapping.keys())
+
+
+def rewrite_chunk(markdown_files):
+    """Rewrite a shard of notes inside a worker process"""
+    return [rewrite_note_file(path, _media_mapping, _prefilter) for path in markdown_files]
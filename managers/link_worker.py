@@ -0,0 +1,123 @@
+# managers/link_worker.py
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from PyQt6.QtCore import pyqtSignal, QThread
+from managers.link_prefilter import AttachmentPrefilter
+from managers.link_rewriter import init_worker, rewrite_chunk, rewrite_note_file
+from utils.logger import Logger
+
+
+class LinkRewriteWorker(QThread):
+    progress = pyqtSignal(int, int)  # notes_done, notes_total
+    error = pyqtSignal(str)
+    finished = pyqtSignal()
+
+    PROGRESS_INTERVAL = 0.2  # Seconds between progress signals
+
+    def __init__(self, link_manager, media_mapping, max_workers=None, min_notes_for_pool=64,
+                 refresh_index=True):
+        """
+        Rewrite media links across the vault off the UI thread
+
+        Notes are sharded across a process pool (the work is CPU-bound string
+        processing, so threads would serialize on the GIL); the media mapping
+        is shipped to each worker process once through the pool initializer.
+
+        Args:
+            link_manager (LinkManager): Used to find the notes referencing the mapped files
+            media_mapping (dict): Original filename -> CloudFront URL
+            max_workers (int, optional): Worker processes; defaults to the CPU count
+            min_notes_for_pool (int): Below this many notes, rewrite in this thread instead
+            refresh_index (bool): Update the link index before the lookup; later batches
+                of the same run can reuse it
+        """
+        super().__init__()
+        self.link_manager = link_manager
+        self.media_mapping = media_mapping
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.min_notes_for_pool = min_notes_for_pool
+        self.refresh_index = refresh_index
+        self.logger = Logger()
+        self.summaries = []
+        self.stats = {}
+        # Set when notes may still link to any file of the batch, for example when the pool broke
+        # or a note could not be read; otherwise failed_names holds the files of notes not rewritten
+        self.failed = False
+        self.failed_names = set()
+        self._last_progress = 0
+
+    def run(self):
+        """Find the affected notes and rewrite them, collecting per-note summaries."""
+        started = time.perf_counter()
+        try:
+            notes = self.link_manager.get_referencing_notes(self.media_mapping.keys(), self.refresh_index)
+            total = len(notes)
+            self.progress.emit(0, total)
+
+            if total < self.min_notes_for_pool or self.max_workers == 1:
+                prefilter = AttachmentPrefilter(self.media_mapping.keys())
+                for path in notes:
+                    self._add_summaries([rewrite_note_file(path, self.media_mapping, prefilter)], total)
+            else:
+                workers = min(self.max_workers, total)
+                # Several shards per worker keep the pool balanced when note sizes vary
+                chunk_size = max(1, -(-total // (workers * 4)))
+                chunks = [notes[i:i + chunk_size] for i in range(0, total, chunk_size)]
+                with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                         initargs=(self.media_mapping,)) as executor:
+                    futures = [executor.submit(rewrite_chunk, chunk) for chunk in chunks]
+                    for future in as_completed(futures):
+                        self._add_summaries(future.result(), total)
+
+            self.progress.emit(len(self.summaries), total)
+            self.stats = self._build_stats(time.perf_counter() - started)
+            self.logger.info(
+                f"Link rewrite: {self.stats['notes_updated']} of {total} notes updated, "
+                f"{self.stats['links_replaced']} links replaced in {self.stats['elapsed']:.2f}s"
+            )
+        except Exception as e:
+            self.failed = True
+            error_msg = f"Error during link replacement: {str(e)}"
+            self.logger.error(error_msg)
+            self.error.emit(error_msg)
+        finally:
+            self.finished.emit()
+
+    def _add_summaries(self, summaries, total):
+        """Collect note summaries, report errors and emit throttled progress"""
+        for summary in summaries:
+            self.summaries.append(summary)
+            if summary['error']:
+                if summary['names']:
+                    self.failed_names.update(summary['names'])
+                else:
+                    self.failed = True
+                self.logger.error(summary['error'])
+                self.error.emit(summary['error'])
+            elif summary['replaced']:
+                self.logger.info(f"Replaced {summary['replaced']} links in {summary['path']}")
+
+        now = time.monotonic()
+        if now - self._last_progress >= self.PROGRESS_INTERVAL:
+            self._last_progress = now
+            self.progress.emit(len(self.summaries), total)
+
+    def _build_stats(self, elapsed):
+        """Aggregate note summaries into link-phase metrics, including prefilter selectivity"""
+        scanned = [summary for summary in self.summaries if summary['hits'] is not None]
+        matched = [summary for summary in scanned if summary['hits']]
+        return {
+            'elapsed': elapsed,
+            'notes_total': len(self.summaries),
+            'notes_updated': sum(1 for summary in self.summaries if summary['replaced']),
+            'links_replaced': sum(summary['replaced'] for summary in self.summaries),
+            'errors': sum(1 for summary in self.summaries if summary['error']),
+            'notes_scanned': len(scanned),
+            'notes_matched': len(matched),
+            'notes_skipped': len(scanned) - len(matched),
+            'total_hits': sum(summary['hits'] for summary in matched),
+            'selectivity': len(matched) / len(scanned) if scanned else 0.0,
+            'hits': {summary['path']: summary['hits'] for summary in matched}
+        }
@@ -0,0 +1,116 @@
+# managers/multipart_store.py
+
+import time
+import threading
+from managers.database import open_database
+from utils.logger import Logger
+
+
+class MultipartStore:
+    """
+    Persistent SQLite record of multipart uploads in progress.
+
+    Each upload is stored with its upload ID, the size and mtime of the local
+    file and the part size, and every completed part with its ETag, so an
+    upload interrupted by a network drop or an application restart sends
+    only the parts that are missing.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS uploads (
+            bucket TEXT NOT NULL,
+            key TEXT NOT NULL,
+            upload_id TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            part_size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (bucket, key)
+        );
+        CREATE TABLE IF NOT EXISTS parts (
+            upload_id TEXT NOT NULL,
+            part_number INTEGER NOT NULL,
+            etag TEXT NOT NULL,
+            PRIMARY KEY (upload_id, part_number)
+        );
+    """
+
+    def __init__(self, db_path):
+        """
+        Open (or create) the store
+
+        Args:
+            db_path (str): Path of the SQLite database file
+        """
+        self.logger = Logger()
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = open_database(db_path, self.SCHEMA)
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def get_upload(self, bucket, key):
+        """
+        Get the upload in progress for an object
+
+        Returns:
+            dict: upload_id, size, mtime_ns, part_size, created_at and parts (part number -> ETag), or None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT upload_id, size, mtime_ns, part_size, created_at FROM uploads WHERE bucket = ? AND key = ?",
+                (bucket, key)
+            ).fetchone()
+            if row is None:
+                return None
+            parts = dict(self._conn.execute(
+                "SELECT part_number, etag FROM parts WHERE upload_id = ?", (row[0],)
+            ).fetchall())
+        upload_id, size, mtime_ns, part_size, created_at = row
+        return {'upload_id': upload_id, 'size': size, 'mtime_ns': mtime_ns, 'part_size': part_size,
+                'created_at': created_at, 'parts': parts}
+
+    def get_upload_ids(self, bucket):
+        """Get the IDs of the uploads recorded for a bucket"""
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT upload_id FROM uploads WHERE bucket = ?", (bucket,))}
+
+    def start_upload(self, bucket, key, upload_id, size, mtime_ns, part_size):
+        """Record a new multipart upload, replacing any earlier one for the object"""
+        with self._lock, self._conn:
+            self._forget(bucket, key)
+            self._conn.execute(
+                "INSERT INTO uploads (bucket, key, upload_id, size, mtime_ns, part_size, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (bucket, key, upload_id, size, mtime_ns, part_size, time.time())
+            )
+
+    def add_part(self, upload_id, part_number, etag):
+        """Record a completed part"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO parts (upload_id, part_number, etag) VALUES (?, ?, ?)",
+                (upload_id, part_number, etag)
+            )
+
+    def remove_upload(self, bucket, key):
+        """Forget an upload once it is completed or aborted"""
+        with self._lock, self._conn:
+            self._forget(bucket, key)
+
+    def remove_upload_id(self, upload_id):
+        """Forget an upload by its ID"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM parts WHERE upload_id = ?", (upload_id,))
+            self._conn.execute("DELETE FROM uploads WHERE upload_id = ?", (upload_id,))
+
+    def _forget(self, bucket, key):
+        """Delete an upload and its parts; the caller holds the lock"""
+        self._conn.execute(
+            "DELETE FROM parts WHERE upload_id IN (SELECT upload_id FROM uploads WHERE bucket = ? AND key = ?)",
+            (bucket, key)
+        )
+        self._conn.execute("DELETE FROM uploads WHERE bucket = ? AND key = ?", (bucket, key))
@@ -0,0 +1,169 @@
+# managers/pipeline_scheduler.py
+
+from collections import deque
+from PyQt6.QtCore import QObject, pyqtSignal
+from utils.logger import Logger
+
+
+class PipelineStage:
+    def __init__(self, name, start, limit=1, skip=None, lane=None, lane_limits=None,
+                 batch_size=None, wait_for_input=False):
+        """
+        Describe one stage of the per-item pipeline
+
+        Args:
+            name (str): Stage name, also written to item['current_stage']
+            start (callable): Starts the stage for one item (or a list of items for batch
+                stages) and must later call PipelineScheduler.stage_done
+            limit (int, optional): Maximum concurrent starts of this stage; None hands every
+                ready item to the stage at once, for stages with their own queue
+            skip (callable, optional): Returns True for items that bypass this stage
+            lane (callable, optional): Maps an item to a lane name for per-lane limits
+            lane_limits (dict, optional): Lane name -> maximum concurrent items in that lane
+            batch_size (int, optional): If set, queued items are started together in batches up to this size
+            wait_for_input (bool): Hold items until every item has been added
+        """
+        self.name = name
+        self.start = start
+        self.limit = max(1, limit) if limit is not None else float('inf')
+        self.skip = skip
+        self.lane = lane
+        self.lane_limits = lane_limits or {}
+        self.batch_size = batch_size
+        self.wait_for_input = wait_for_input
+
+
+class PipelineScheduler(QObject):
+    """
+    Moves each workload item through the stages independently.
+
+    An item enters its next stage as soon as its previous stage completes,
+    subject to that stage's concurrency limits, so fast items are not held
+    behind slow ones. Items can be added while the scan is still running.
+    All bookkeeping happens on the thread that owns the scheduler; workers
+    report back through stage_done via queued signals.
+    """
+
+    stage_skipped = pyqtSignal(dict, str)  # item, stage name
+    item_finished = pyqtSignal(dict)  # item completed its last stage or dropped out
+    all_finished = pyqtSignal()
+
+    def __init__(self, stages):
+        super().__init__()
+        self.logger = Logger()
+        self.stages = stages
+        self.stage_index = {stage.name: index for index, stage in enumerate(stages)}
+        self.queues = {stage.name: {} for stage in stages}  # stage -> lane -> deque
+        self.running = {stage.name: 0 for stage in stages}
+        self.lane_running = {stage.name: {} for stage in stages}
+        self.input_closed = False
+        self.in_flight = 0
+        self._finished = False
+
+    def add_items(self, items):
+        """Feed newly discovered items into the first stage"""
+        for item in items:
+            self.in_flight += 1
+            self._enter(item, 0)
+
+    def close_input(self):
+        """Signal that no more items will be added"""
+        self.input_closed = True
+        for stage in self.stages:
+            self._dispatch(stage)
+        self._check_finished()
+
+    def stage_done(self, items, stage_name, success=True, failed=()):
+        """
+        Report that a started stage has finished
+
+        Args:
+            items (dict or list): The item, or the batch of items, passed to the stage's start
+            stage_name (str): Name of the finished stage
+            success (bool): Whether the items move on; failed items leave the pipeline
+            failed (iterable): Items of a batch that failed while the rest of it moves on
+        """
+        if isinstance(items, dict):
+            items = [items]
+        stage = self.stages[self.stage_index[stage_name]]
+        self.running[stage_name] -= 1
+        if stage.batch_size is None:
+            for item in items:
+                lane = stage.lane(item) if stage.lane is not None else None
+                self.lane_running[stage_name][lane] -= 1
+
+        failed = {id(item) for item in failed}
+        for item in items:
+            if success and id(item) not in failed:
+                self._enter(item, self.stage_index[stage_name] + 1)
+            else:
+                self._leave(item)
+
+        self._dispatch(stage)
+        self._check_finished()
+
+    def pending_counts(self):
+        """Get the queued and running item counts per stage"""
+        return {
+            name: {
+                'queued': sum(len(queue) for queue in self.queues[name].values()),
+                'running': self.running[name]
+            }
+            for name in self.queues
+        }
+
+    def _enter(self, item, index):
+        """Queue an item for the first stage at or after index that it does not skip"""
+        while index < len(self.stages) and self.stages[index].skip and self.stages[index].skip(item):
+            self.stage_skipped.emit(item, self.stages[index].name)
+            index += 1
+
+        if index == len(self.stages):
+            self._leave(item)
+            return
+
+        stage = self.stages[index]
+        item['current_stage'] = stage.name
+        lane = stage.lane(item) if stage.lane is not None and stage.batch_size is None else None
+        self.queues[stage.name].setdefault(lane, deque()).append(item)
+        self._dispatch(stage)
+
+    def _leave(self, item):
+        """Remove an item from the pipeline"""
+        self.in_flight -= 1
+        self.item_finished.emit(item)
+
+    def _dispatch(self, stage):
+        """Start queued items of a stage while its limits allow"""
+        if stage.wait_for_input and not self.input_closed:
+            return
+        queues = self.queues[stage.name]
+
+        if stage.batch_size is not None:
+            queue = queues.get(None)
+            while queue and self.running[stage.name] < stage.limit:
+                batch = [queue.popleft() for _ in range(min(stage.batch_size, len(queue)))]
+                self.running[stage.name] += 1
+                stage.start(batch)
+            return
+
+        lane_running = self.lane_running[stage.name]
+        while self.running[stage.name] < stage.limit:
+            ready = [
+                lane for lane, queue in queues.items()
+                if queue and lane_running.get(lane, 0) < stage.lane_limits.get(lane, stage.limit)
+            ]
+            if not ready:
+                return
+            # Prefer the lane with the fewest running items so lanes share the stage
+            lane = min(ready, key=lambda name: lane_running.get(name, 0))
+            item = queues[lane].popleft()
+            self.running[stage.name] += 1
+            lane_running[lane] = lane_running.get(lane, 0) + 1
+            stage.start(item)
+
+    def _check_finished(self):
+        """Emit all_finished once input is closed and no item remains"""
+        if self.input_closed and self.in_flight == 0 and not self._finished:
+            self._finished = True
+            self.all_finished.emit()
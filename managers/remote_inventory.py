@@ -0,0 +1,116 @@
+# managers/remote_inventory.py
+
+import time
+import threading
+from managers.database import open_database
+from utils.logger import Logger
+
+
+class RemoteInventory:
+    """
+    Local SQLite snapshot of the objects under the upload prefix of a bucket.
+
+    The snapshot is built with paginated ListObjectsV2 calls (1000 keys per
+    page) instead of one HEAD request per object, and kept between runs.
+    Objects uploaded by this application are added as they are uploaded, so
+    the snapshot stays current between listings; a new listing replaces it
+    once it is older than the configured age.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS objects (
+            bucket TEXT NOT NULL,
+            key TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            etag TEXT,
+            PRIMARY KEY (bucket, key)
+        );
+        CREATE TABLE IF NOT EXISTS listings (
+            bucket TEXT NOT NULL,
+            prefix TEXT NOT NULL,
+            listed_at REAL NOT NULL,
+            object_count INTEGER NOT NULL,
+            PRIMARY KEY (bucket, prefix)
+        );
+    """
+
+    def __init__(self, db_path):
+        """
+        Open (or create) the inventory database
+
+        Args:
+            db_path (str): Path of the SQLite database file
+        """
+        self.logger = Logger()
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = open_database(db_path, self.SCHEMA)
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def get_listing_age(self, bucket, prefix):
+        """Get the seconds since the prefix was last listed, or None if it never was"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT listed_at FROM listings WHERE bucket = ? AND prefix = ?", (bucket, prefix)
+            ).fetchone()
+        return time.time() - row[0] if row else None
+
+    def refresh(self, s3_client, bucket, prefix):
+        """
+        Replace the snapshot of a prefix with a fresh listing
+
+        Args:
+            s3_client: boto3 S3 client
+            bucket (str): Bucket name
+            prefix (str): Key prefix, e.g. 'obsidian_attachments/'
+
+        Returns:
+            int: Number of objects listed
+        """
+        started = time.perf_counter()
+        objects = []
+        pages = 0
+        for page in s3_client.get_paginator('list_objects_v2').paginate(Bucket=bucket, Prefix=prefix):
+            pages += 1
+            objects.extend(
+                (bucket, obj['Key'], obj['Size'], obj.get('ETag', '').strip('"') or None)
+                for obj in page.get('Contents', [])
+            )
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM objects WHERE bucket = ? AND substr(key, 1, ?) = ?", (bucket, len(prefix), prefix)
+            )
+            self._conn.executemany("INSERT OR REPLACE INTO objects (bucket, key, size, etag) VALUES (?, ?, ?, ?)", objects)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO listings (bucket, prefix, listed_at, object_count) VALUES (?, ?, ?, ?)",
+                (bucket, prefix, time.time(), len(objects))
+            )
+        self.logger.info(
+            f"Listed {len(objects)} objects under s3://{bucket}/{prefix} in {pages} requests "
+            f"({time.perf_counter() - started:.2f}s)"
+        )
+        return len(objects)
+
+    def get(self, bucket, key):
+        """
+        Look up an object in the snapshot
+
+        Returns:
+            tuple: (size, etag) or None if the object is not known
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT size, etag FROM objects WHERE bucket = ? AND key = ?", (bucket, key)
+            ).fetchone()
+
+    def add(self, bucket, key, size, etag):
+        """Record an object uploaded since the last listing"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO objects (bucket, key, size, etag) VALUES (?, ?, ?, ?)", (bucket, key, size, etag)
+            )
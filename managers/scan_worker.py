@@ -0,0 +1,48 @@
+# managers/scan_worker.py
+
+import time
+from PyQt6.QtCore import pyqtSignal, QThread
+from utils.logger import Logger
+
+
+class ScanWorker(QThread):
+    items_found = pyqtSignal(list)  # batch of workload items
+    error = pyqtSignal(str)
+    finished = pyqtSignal()
+
+    BATCH_SIZE = 100
+    BATCH_INTERVAL = 0.1  # Seconds before a partial batch is sent anyway
+
+    def __init__(self, file_manager, vault_path):
+        super().__init__()
+        self.file_manager = file_manager
+        self.vault_path = vault_path
+        self.logger = Logger()
+
+    def run(self):
+        """Scan the vault, probe and hash media files and emit workload items in batches as they are found."""
+        try:
+            batch = []
+            last_emit = time.monotonic()
+            for item in self.file_manager.iter_media_workload(self.vault_path):
+                batch.append(item)
+                now = time.monotonic()
+                if len(batch) >= self.BATCH_SIZE or now - last_emit >= self.BATCH_INTERVAL:
+                    self._prepare(batch)
+                    self.items_found.emit(batch)
+                    batch = []
+                    last_emit = now
+            if batch:
+                self._prepare(batch)
+                self.items_found.emit(batch)
+        except Exception as e:
+            error_msg = f"Error scanning vault {self.vault_path}: {str(e)}"
+            self.logger.error(error_msg)
+            self.error.emit(error_msg)
+        finally:
+            self.finished.emit()
+
+    def _prepare(self, batch):
+        """Probe and hash a batch of items before it enters the pipeline."""
+        self.file_manager.probe_media(batch)
+        self.file_manager.hash_media(batch)
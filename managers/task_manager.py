@@ -1,20 +1,27 @@
 # managers/task_manager.py
 
 import os
-from PyQt6.QtCore import QObject, pyqtSignal, QThread
+import time
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
 from managers.file_manager import FileManager
 from managers.link_manager import LinkManager
+from managers.link_worker import LinkRewriteWorker
 from managers.sound_manager import SoundManager
 from managers.upload_manager import UploadManager
 from managers.config_manager import ConfigManager
+from managers.pipeline_scheduler import PipelineScheduler, PipelineStage
 from utils.logger import Logger
-from managers.compression_worker import CompressionWorker
+from managers.compression_executor import CompressionExecutor
 from managers.deletion_worker import DeletionWorker
-from managers.upload_worker import UploadWorker
+from managers.job_journal import JobJournal
+from managers.scan_worker import ScanWorker
+from managers.upload_scheduler import UploadScheduler
 
 
 class TaskManager(QObject):
     progress = pyqtSignal(dict, str)  # item, status
+    link_progress = pyqtSignal(int, int)  # notes_done, notes_total
+    workload_discovered = pyqtSignal(list)  # items found by the scan
     error = pyqtSignal(str)
     all_tasks_completed = pyqtSignal()
 
@@ -29,23 +36,44 @@ class TaskManager(QObject):
         self.vault_path = None
         self.workload = []
         self.current_stage = ''
-        self.workflow_phases = []
-        self.current_phase_index = 0
+        self.scheduler = None
+        self.link_stats = {}
+        self.link_batches = 0
+        self.duplicate_groups = {}  # content hash -> representative item and waiting copies
+        self.dedup_stats = {}
+        self.resume_state = {}  # original path -> last journaled state of an interrupted run
+        self.resumed_outputs = set()
+
+        journal_config = self.config_manager.get('journal', {})
+        self.journal = None
+        if journal_config.get('enabled', True):
+            fsync_interval = journal_config.get('fsync_interval', 0.5)
+            self.journal = JobJournal(
+                self.config_manager.get_data_path(journal_config.get('file', 'job_journal.jsonl')), fsync_interval
+            )
+            # Events written since the last fsync reach the disk even when no further events follow
+            self.journal_timer = QTimer(self)
+            self.journal_timer.setInterval(int(fsync_interval * 1000))
+            self.journal_timer.timeout.connect(self.journal.sync)
 
         # Worker tracking
-        self.compression_workers = []
-        self.upload_workers = []
+        self.scan_worker = None
+        self.scan_failed = False
+        self.compression_executor = CompressionExecutor(self.file_manager)
+        self.compression_executor.progress.connect(self.handle_progress)
+        self.compression_executor.error.connect(self.handle_error)
+        self.compression_executor.compression_finished.connect(self._on_compression_finished)
+        self.upload_scheduler = UploadScheduler(self.upload_manager)
+        self.upload_scheduler.progress.connect(self.handle_upload_progress)
+        self.upload_scheduler.error.connect(self.handle_error)
+        self.upload_scheduler.upload_finished.connect(self._on_upload_finished)
+        self.link_workers = []
         self.deletion_workers = []
 
-        # Task counters
-        self.compression_tasks_remaining = 0
-        self.upload_tasks_remaining = 0
-        self.deletion_tasks_remaining = 0
-
     def set_vault_path(self, vault_path):
         """Initialize managers with the vault path."""
         self.vault_path = vault_path
-        self.link_manager = LinkManager(vault_path)
+        self.link_manager = LinkManager(vault_path, self.file_manager)
         self.file_manager.set_vault_path(vault_path)
         self.logger.info(f"Initialized TaskManager with vault: {vault_path}")
 
@@ -56,191 +84,350 @@ class TaskManager(QObject):
             self.error.emit("No vault directory selected")
             return
 
-        self.prepare_workload()
-        if not self.workload:
-            self.logger.info("No media files found in vault")
-            self.error.emit("No media files found in vault")
+        for item in self.workload:
+            self.file_manager.release_output(item)
+        self.workload = []
+        self.link_stats = {}
+        self.link_batches = 0
+        self.duplicate_groups = {}
+        self.dedup_stats = {'groups': 0, 'duplicates': 0, 'bytes': 0, 'upload_bytes': 0, 'compression_time': 0.0}
+        self.compression_executor.reset()
+        self.upload_scheduler.reset()
+        self.current_stage = 'processing'
+        self.scan_failed = False
+        self.scheduler = self.create_scheduler()
+        self._start_journal()
+
+        # Items enter the pipeline as the scan finds them
+        self.scan_worker = ScanWorker(self.file_manager, self.vault_path)
+        self.scan_worker.items_found.connect(self._on_items_found)
+        self.scan_worker.error.connect(self._on_scan_error)
+        self.scan_worker.finished.connect(self._on_scan_finished)
+        self.scan_worker.start()
+
+    def _start_journal(self):
+        """Start journaling the run, resuming the previous run if it was interrupted."""
+        self.resume_state = {}
+        self.resumed_outputs = set()
+        if not self.journal:
             return
-
-        self.initialize_workflow()
-        self.start_next_phase()
-
-    def prepare_workload(self):
-        """Prepare the workload by getting media files from the vault."""
-        self.workload = self.file_manager.get_media_workload(self.vault_path)
-        self.logger.info(f"Prepared workload with {len(self.workload)} items")
-
-    def initialize_workflow(self):
-        """Initialize the workflow phases."""
-        self.workflow_phases = [
-            {'name': 'compression', 'method': self.start_compression},
-            {'name': 'upload', 'method': self.start_upload},
-            {'name': 'link_replacement', 'method': self.process_links},
-            {'name': 'deletion', 'method': self.start_deletion},
-        ]
-        self.current_phase_index = 0
-
-    def start_next_phase(self):
-        """Start the next phase in the workflow."""
-        if self.current_phase_index < len(self.workflow_phases):
-            phase = self.workflow_phases[self.current_phase_index]
-            self.current_stage = phase['name']
-            self.logger.info(f"Starting phase: {self.current_stage}")
-            phase_method = phase['method']
-            phase_method()
+        try:
+            unfinished, states, started_at = self.journal.load()
+            resume = unfinished and self.config_manager.get('journal', {}).get('resume', True)
+            if resume:
+                self.resume_state = states
+                self.logger.info(f"Resuming the run interrupted after {started_at and time.ctime(started_at)} "
+                                 f"with {len(states)} journaled files")
+            self.journal.start_run(resume=resume, vault=self.vault_path)
+            self.journal_timer.start()
+        except OSError as e:
+            self.logger.error(f"Cannot open job journal {self.journal.path}, running without it: {e}")
+
+    def _finish_journal(self):
+        """Mark the run finished in the journal, or leave it resumable if the scan did not see every file."""
+        if not self.journal:
+            return
+        self.journal_timer.stop()
+        if self.scan_failed:
+            self.journal.close()
         else:
-            # Workflow is complete
-            self.current_stage = 'complete'
-            self.logger.info("All tasks completed")
-            self.all_tasks_completed.emit()
-            self.sound_manager.play_complete()
-
-    def on_phase_completed(self):
-        """Handle the completion of the current phase and start the next one."""
-        self.current_phase_index += 1
-        self.start_next_phase()
-
-    def start_compression(self):
-        """Start concurrent compression of images and videos."""
-        self.compression_workers = []
-        self.compression_tasks_remaining = 0
-
-        # Separate workloads
-        video_files = [item for item in self.workload if item['type'] == 'video']
-        image_files = [item for item in self.workload if item['type'] == 'image']
-
-        if video_files:
-            self.compression_tasks_remaining += 1
-            self.start_compression_worker(video_files, 'video')
-
-        if image_files:
-            self.compression_tasks_remaining += 1
-            self.start_compression_worker(image_files, 'image')
-
-        if self.compression_tasks_remaining == 0:
-            # No files to compress, proceed to next phase
-            self.on_phase_completed()
-
-    def start_compression_worker(self, files, task_type):
-        """Start a compression worker for a given file type."""
-        worker = CompressionWorker(files, self.file_manager, task_type)
-        worker.progress.connect(self.handle_progress)
-        worker.error.connect(self.handle_error)
-        worker.finished.connect(lambda: self._on_compression_worker_finished(worker))
-        self.compression_workers.append(worker)
-        worker.start()
-
-    def _on_compression_worker_finished(self, worker):
-        """Handle completion of a compression worker."""
-        if worker in self.compression_workers:
-            self.compression_workers.remove(worker)
-            worker.deleteLater()
-
-        self.compression_tasks_remaining -= 1
-        if self.compression_tasks_remaining == 0:
-            # All compression tasks are complete
-            self.logger.info("Compression phase completed")
-            self.on_phase_completed()
-
-    def start_upload(self):
-        """Start uploading media files."""
-        files_to_upload = [
-            item for item in self.workload
-            if not item.get('error') and (item.get('processed_path') or item.get('path'))
-        ]
-
-        if not files_to_upload:
-            self.logger.warning("No valid files available for upload")
-            # Proceed to next phase even if no files to upload
-            self.on_phase_completed()
+            self.journal.finish_run()
+
+    def _record_state(self, item, state):
+        """Record an item's stage transition in the vault index and the job journal."""
+        if state in ('uploaded', 'linked', 'deleted'):
+            self.file_manager.record_migration(item, state)
+        if self.journal:
+            self.journal.record(item, state)
+
+    def _apply_resume_state(self, items):
+        """Restore compressed outputs and uploads that an interrupted run journaled for these items."""
+        for item in items:
+            state = self.resume_state.get(item['original_path'])
+            if not state:
+                continue
+            unchanged = (state.get('filesize'), state.get('mtime_ns')) == (item['filesize'], item.get('mtime_ns'))
+            if (not self._is_uploaded(item) and state['state'] in ('uploaded', 'linked')
+                    and state.get('cloudfront_url') and unchanged):
+                # Only the journal knows about the upload when the vault index is disabled
+                item['s3_key'] = state['s3_key']
+                item['cloudfront_url'] = state['cloudfront_url']
+                item['upload_status'] = 'success'
+
+            output = state.get('processed_path')
+            if not output or not os.path.exists(output):
+                continue
+            if self._is_uploaded(item):
+                # Only deletion still needs the output
+                item['processed_path'] = output
+                self.resumed_outputs.add(output)
+            elif unchanged and os.path.getsize(output) == state.get('compressed_size'):
+                item['processed_path'] = output
+                item['compressed_filename'] = state['compressed_filename']
+                item['compressed_size'] = state['compressed_size']
+                item['compression_resumed'] = True
+                self.resumed_outputs.add(output)
+                self.logger.info(f"Reusing compressed output {output} of {item['path']}")
+
+    def _remove_stale_outputs(self):
+        """Delete compressed outputs of the interrupted run that no item picked up."""
+        for path, state in self.resume_state.items():
+            output = state.get('processed_path')
+            if output and output not in self.resumed_outputs and os.path.exists(output):
+                try:
+                    os.remove(output)
+                    self.logger.info(f"Removed leftover compressed file {output} of {path}")
+                except OSError as e:
+                    self.logger.error(f"Failed to remove leftover compressed file {output}: {e}")
+
+    def create_scheduler(self):
+        """
+        Create the per-item pipeline: dedup -> compression -> upload -> link_replacement -> deletion.
+
+        Each item moves to its next stage as soon as the previous one finishes,
+        within the per-stage concurrency limits.
+        Dedup holds copies of a file whose content is already in the pipeline
+        until that file is uploaded; they then share its URL and skip
+        compression and upload.
+        Link replacement waits for the scan to finish (it needs the full note
+        list) and then rewrites notes in batches of uploaded items.
+        """
+        config = self.config_manager.get('pipeline', {})
+        scheduler = PipelineScheduler([
+            # Items are hashed for the artifact cache too, so the hash alone does not enable dedup
+            PipelineStage(
+                'dedup', self.start_dedup,
+                limit=None,
+                skip=lambda item: not self.file_manager.dedup_enabled or 'content_hash' not in item
+            ),
+            # The compression executor and upload scheduler queue and bound their jobs themselves
+            PipelineStage('compression', self.start_compression, limit=None, skip=self._is_compressed),
+            PipelineStage('upload', self.start_upload, limit=None, skip=self._is_uploaded),
+            PipelineStage(
+                'link_replacement', self.process_links,
+                limit=1,
+                batch_size=config.get('link_batch_size', 500),
+                wait_for_input=True
+            ),
+            PipelineStage('deletion', self.start_deletion, limit=config.get('deletion_workers', 4)),
+        ])
+        scheduler.stage_skipped.connect(self._on_stage_skipped)
+        scheduler.all_finished.connect(self._on_pipeline_finished)
+        return scheduler
+
+    def _is_uploaded(self, item):
+        """Items uploaded by an earlier run need no compression or upload."""
+        return item.get('upload_status') == 'success'
+
+    def _is_compressed(self, item):
+        """Items uploaded earlier or whose output survived an interrupted run need no compression."""
+        return self._is_uploaded(item) or item.get('compression_resumed', False)
+
+    def _on_stage_skipped(self, item, stage):
+        """Report skipped stages as complete so progress stays consistent."""
+        if stage == 'upload':
+            self.logger.info(f"Skipping upload of already migrated file: {item['path']}")
+        self.progress.emit(item, f"{stage}_complete")
+
+    def _on_items_found(self, items):
+        """Feed scanned items into the pipeline."""
+        self._apply_resume_state(items)
+        self.workload.extend(items)
+        self.workload_discovered.emit(items)
+        if self.scheduler:
+            self.scheduler.add_items(items)
+
+    def _on_scan_error(self, error_message):
+        """Remember that the scan stopped early; it still emits finished afterwards."""
+        self.scan_failed = True
+        self.handle_error(error_message)
+
+    def _on_scan_finished(self):
+        """Close the pipeline input once the scan is done."""
+        if self.scan_worker:
+            self.scan_worker.deleteLater()
+            self.scan_worker = None
+        if not self.scheduler:
             return
 
-        self.upload_workers = []
-        self.upload_tasks_remaining = len(files_to_upload)
-        self.logger.info(f"Starting upload of {self.upload_tasks_remaining} files")
-
-        for item in files_to_upload:
-            self.start_upload_worker(item)
-
-    def start_upload_worker(self, item):
-        """Start an upload worker for a given file."""
-        worker = UploadWorker(item, self.upload_manager)
-        worker.progress.connect(self.handle_upload_progress)
-        worker.error.connect(self.handle_error)
-        worker.finished.connect(lambda: self._on_upload_worker_finished(worker))
-        self.upload_workers.append(worker)
-        worker.start()
-
-    def _on_upload_worker_finished(self, worker):
-        """Handle completion of an upload worker."""
-        if worker in self.upload_workers:
-            self.upload_workers.remove(worker)
-            worker.deleteLater()
-
-        self.upload_tasks_remaining -= 1
-        if self.upload_tasks_remaining == 0:
-            # All upload tasks are complete
-            self.logger.info("Upload phase completed")
-            self.on_phase_completed()
-
-    def process_links(self):
-        """Process markdown files to update media links."""
         if not self.workload:
-            self.logger.warning("No workload available for link processing")
-            self.on_phase_completed()
+            if not self.scan_failed:
+                self.logger.info("No media files found in vault")
+                self.error.emit("No media files found in vault")
+            self.scheduler = None
+            self.current_stage = ''
+            self._finish_journal()
             return
 
-        self.logger.info("Starting link replacement process")
-        markdown_files = self.file_manager.get_markdown_files()
+        if self.scan_failed:
+            # Outputs of files the scan did not reach are kept for the next run
+            self.logger.info("Scan did not complete, keeping compressed outputs of the interrupted run")
+        else:
+            # Every file has been seen, so outputs no item picked up are leftovers
+            self._remove_stale_outputs()
+        self.logger.info(f"Prepared workload with {len(self.workload)} items")
+        self.scheduler.close_input()
+
+    def _on_pipeline_finished(self):
+        """Handle completion of every item."""
+        self.current_stage = 'complete'
+        self.scheduler = None
+        self._finish_journal()
+        self.file_manager.remove_spill_dir()
+        self.compression_executor.log_stats()
+        self.upload_scheduler.log_stats()
+        self._log_dedup_stats()
+        self.logger.info("All tasks completed")
+        self.all_tasks_completed.emit()
+        self.sound_manager.play_complete()
+
+    def start_dedup(self, item):
+        """Let the first file with given content through and hold its copies until it is uploaded."""
+        content_hash = item['content_hash']
+        group = self.duplicate_groups.get(content_hash)
+        if group is None:
+            self.duplicate_groups[content_hash] = {'representative': item, 'copies': []}
+            self.scheduler.stage_done(item, 'dedup')
+        elif self._is_uploaded(group['representative']):
+            self._share_upload(group['representative'], item)
+            self.scheduler.stage_done(item, 'dedup')
+        else:
+            group['copies'].append(item)
+
+    def _release_duplicates(self, item):
+        """Pass a representative's upload to its copies, or promote a copy if the representative failed."""
+        group = self.duplicate_groups.get(item.get('content_hash'))
+        if not group or group['representative'] is not item or not self.scheduler:
+            return
 
+        copies, group['copies'] = group['copies'], []
+        if self._is_uploaded(item):
+            for copy in copies:
+                self._share_upload(item, copy)
+                self.scheduler.stage_done(copy, 'dedup')
+        elif copies:
+            # The next copy is compressed and uploaded in its place
+            group['representative'] = copies[0]
+            group['copies'] = copies[1:]
+            self.scheduler.stage_done(copies[0], 'dedup')
+        else:
+            # A copy found later becomes the representative
+            del self.duplicate_groups[item['content_hash']]
+
+    def _share_upload(self, source, item):
+        """Point a duplicate at the uploaded object of the file with the same content."""
+        item['s3_key'] = source['s3_key']
+        item['cloudfront_url'] = source['cloudfront_url']
+        item['upload_status'] = 'success'
+        item['duplicate_of'] = source['path']
+        self._record_state(item, 'uploaded')
+        self.logger.info(f"Reusing upload of {source['path']} for identical file {item['path']}")
+
+        stats = self.dedup_stats
+        if not source.get('duplicates'):
+            stats['groups'] += 1
+        source['duplicates'] = source.get('duplicates', 0) + 1
+        stats['duplicates'] += 1
+        stats['bytes'] += item['filesize']
+        # Sources uploaded by an earlier run cost nothing in this one
+        if 'compressed_size' in source:
+            stats['upload_bytes'] += source.get('compressed_size', 0)
+            stats['compression_time'] += source.get('compression_time', 0.0)
+
+    def _log_dedup_stats(self):
+        """Log the work saved by deduplication."""
+        stats = self.dedup_stats
+        if stats.get('duplicates'):
+            self.logger.info(
+                f"Deduplication: {stats['duplicates']} copies of {stats['groups']} files reused an upload, "
+                f"{stats['bytes'] / (1024 * 1024):.1f} MB not compressed, "
+                f"{stats['upload_bytes'] / (1024 * 1024):.1f} MB not uploaded, "
+                f"~{stats['compression_time']:.1f}s of compression saved"
+            )
+
+    def start_compression(self, item):
+        """Queue a media file on the compression executor."""
+        self.compression_executor.submit(item)
+
+    def _on_compression_finished(self, item):
+        """Handle completion of a compression job."""
+        if item.get('error'):
+            self._release_duplicates(item)
+        self._record_state(item, 'failed' if item.get('error') else 'compressed')
+        if self.scheduler:
+            self.scheduler.stage_done(item, 'compression', success=not item.get('error'))
+
+    def start_upload(self, item):
+        """Queue a file on the upload scheduler."""
+        self.upload_scheduler.submit(item)
+
+    def _on_upload_finished(self, item):
+        """Handle completion of an upload."""
+        uploaded = item.get('upload_status') == 'success'
+        self._record_state(item, 'uploaded' if uploaded else 'failed')
+        self.file_manager.release_output(item)
+        self._release_duplicates(item)
+
+        if self.scheduler:
+            self.scheduler.stage_done(item, 'upload', success=uploaded)
+
+    def process_links(self, items):
+        """Rewrite the links to a batch of uploaded media files."""
         # Create mapping of original filenames to CloudFront URLs
         media_mapping = {}
-        for item in self.workload:
-            if item.get('upload_status') == 'success' and 'cloudfront_url' in item:
+        for item in items:
+            if 'cloudfront_url' in item:
                 original_name = os.path.basename(item['original_path'])
                 media_mapping[original_name] = item['cloudfront_url']
 
-        if not media_mapping:
-            self.logger.warning("No successfully uploaded files to process")
-            self.on_phase_completed()
-            return
+        self.logger.info(f"Starting link replacement for {len(media_mapping)} files")
+        link_config = self.config_manager.get('link_rewrite', {})
+        worker = LinkRewriteWorker(
+            self.link_manager,
+            media_mapping,
+            max_workers=link_config.get('workers'),
+            min_notes_for_pool=link_config.get('min_notes_for_pool', 64),
+            refresh_index=self.link_batches == 0
+        )
+        self.link_batches += 1
+        worker.progress.connect(self.link_progress.emit)
+        worker.error.connect(self.handle_error)
+        worker.finished.connect(lambda: self._on_link_worker_finished(worker, items))
+        self.link_workers.append(worker)
+        worker.start()
 
-        for markdown_file in markdown_files:
-            success, message = self.link_manager.replace_cloudfront_links(markdown_file, media_mapping)
-            if not success:
-                self.handle_error(message)
+    def _on_link_worker_finished(self, worker, items):
+        """Handle completion of a link rewrite batch."""
+        self._merge_link_stats(worker.stats)
+        if worker in self.link_workers:
+            self.link_workers.remove(worker)
+            worker.deleteLater()
 
-        # Emit progress for link replacement
-        for item in self.workload:
-            if item.get('upload_status') == 'success':
+        # Notes may still link to files whose links were not rewritten, so they are not deleted
+        failed = []
+        for item in items:
+            if worker.failed or os.path.basename(item['original_path']) in worker.failed_names:
+                item['link_status'] = 'failed'
+                failed.append(item)
+                self.logger.error(f"Keeping {item['path']}: links to it could not be rewritten")
+            else:
+                self._record_state(item, 'linked')
                 self.progress.emit(item, 'link_complete')
 
-        self.logger.info("Link replacement phase completed")
-        self.on_phase_completed()
-
-    def start_deletion(self):
-        """Start deletion of original and compressed media files."""
-        self.deletion_workers = []
-        self.deletion_tasks_remaining = 0
-
-        # Prepare list of files to delete
-        files_to_delete = [
-            item for item in self.workload
-            if not item.get('error') and (item.get('path') or item.get('processed_path'))
-        ]
-
-        if not files_to_delete:
-            self.logger.info("No files to delete")
-            self.on_phase_completed()
-            return
-
-        self.deletion_tasks_remaining = len(files_to_delete)
-        self.logger.info(f"Starting deletion of {self.deletion_tasks_remaining} files")
+        if self.scheduler:
+            self.scheduler.stage_done(items, 'link_replacement', failed=failed)
 
-        for item in files_to_delete:
-            self.start_deletion_worker(item)
+    def _merge_link_stats(self, stats):
+        """Accumulate the metrics of each link rewrite batch."""
+        for key, value in stats.items():
+            if key == 'hits':
+                self.link_stats.setdefault('hits', {}).update(value)
+            elif key != 'selectivity':
+                self.link_stats[key] = self.link_stats.get(key, 0) + value
+        scanned = self.link_stats.get('notes_scanned', 0)
+        self.link_stats['selectivity'] = self.link_stats.get('notes_matched', 0) / scanned if scanned else 0.0
 
-    def start_deletion_worker(self, item):
+    def start_deletion(self, item):
         """Start a deletion worker for a given file."""
         worker = DeletionWorker(item)
         worker.progress.connect(self.handle_progress)
@@ -255,18 +442,16 @@ class TaskManager(QObject):
             self.deletion_workers.remove(worker)
             worker.deleteLater()
 
-        self.deletion_tasks_remaining -= 1
-        if self.deletion_tasks_remaining == 0:
-            # All deletion tasks are complete
-            self.logger.info("Deletion phase completed")
-            self.on_phase_completed()
+        if self.scheduler:
+            self.scheduler.stage_done(worker.workload_item, 'deletion')
 
     def handle_progress(self, item, status):
         """Handle progress updates from workers."""
         if not item:
             return
 
-        item['current_stage'] = self.current_stage
+        if status == 'deletion_complete':
+            self._record_state(item, 'deleted')
         self.progress.emit(item, status)
 
     def handle_upload_progress(self, item, bytes_uploaded, total_bytes):
@@ -277,7 +462,6 @@ class TaskManager(QObject):
 
         item['bytes_uploaded'] = bytes_uploaded
         item['total_bytes'] = total_bytes
-        item['current_stage'] = self.current_stage
         self.progress.emit(item, 'upload_progress')
 
     def handle_error(self, error_message):
@@ -290,18 +474,29 @@ class TaskManager(QObject):
     def abort_processing(self):
         """Abort the entire processing workflow."""
         self.logger.error("Workflow aborted due to a critical error.")
+        self.scheduler = None
         # Stop all running workers
         self.stop_all_workers()
         self.error.emit("Processing aborted due to an error.")
         self.current_stage = 'aborted'
-        self.current_phase_index = len(self.workflow_phases)
 
     def stop_all_workers(self):
         """Stop all running workers."""
-        for worker in self.compression_workers + self.upload_workers + self.deletion_workers:
+        # Queued compressions and uploads are dropped; running video encodes are killed and
+        # running images and uploads finish on their own
+        self.compression_executor.cancel()
+        self.upload_scheduler.clear()
+        workers = self.link_workers + self.deletion_workers
+        if self.scan_worker:
+            workers.append(self.scan_worker)
+        for worker in workers:
             if worker.isRunning():
                 worker.terminate()
                 worker.wait()
-        self.compression_workers.clear()
-        self.upload_workers.clear()
+        self.scan_worker = None
+        self.link_workers.clear()
         self.deletion_workers.clear()
+        # The run stays unfinished in the journal, so the next run resumes it
+        if self.journal:
+            self.journal_timer.stop()
+            self.journal.close()
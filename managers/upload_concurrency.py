@@ -0,0 +1,173 @@
+# managers/upload_concurrency.py
+
+import json
+import os
+import threading
+import time
+from utils.logger import Logger
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD controller for the number of concurrent uploads.
+
+    Throughput is measured over fixed time windows. While the uploads fill
+    the current limit, the limit grows by one per window as long as
+    aggregate throughput keeps rising, and steps back when throughput
+    falls. A throttling response (SlowDown, 503, timeouts) halves it.
+    The best limit seen is stored per bucket/region so the next run starts
+    from it. Safe to call from any upload thread.
+    """
+
+    def __init__(self, minimum=1, maximum=32, initial=4, window=2.0, tolerance=0.05,
+                 state_path=None, key=None, clock=time.monotonic):
+        """
+        Args:
+            minimum (int): Lowest concurrency the controller backs off to
+            maximum (int): Highest concurrency the controller probes
+            initial (int): Starting concurrency if no stored setting exists
+            window (float): Seconds of uploads per throughput measurement
+            tolerance (float): Relative throughput change treated as no change
+            state_path (str, optional): JSON file holding the best limit per key
+            key (str, optional): Bucket/region key into the state file
+            clock (callable): Time source, replaceable for simulations
+        """
+        self.logger = Logger()
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.window = window
+        self.tolerance = tolerance
+        self.state_path = state_path
+        self.key = key
+        self.clock = clock
+        self._lock = threading.Lock()
+
+        stored = self._load()
+        self._limit = self._clamp(stored.get('limit', initial))
+        self.best_limit = self._limit
+        self.best_throughput = 0.0
+        self.in_flight = 0
+        self.throttle_count = 0
+        self._previous_throughput = None
+        self._reset_window()
+
+    @property
+    def limit(self):
+        """Current number of uploads allowed to run at once"""
+        return self._limit
+
+    def upload_started(self):
+        """Record the start of an upload"""
+        with self._lock:
+            self.in_flight += 1
+            self._window_peak = max(self._window_peak, self.in_flight)
+
+    def upload_finished(self, nbytes, throttled=False):
+        """
+        Record the end of an upload
+
+        Args:
+            nbytes (int): Bytes sent; 0 for failed uploads
+            throttled (bool): Whether the upload failed with a throttling error
+        """
+        with self._lock:
+            self.in_flight -= 1
+            if throttled:
+                self._on_throttle()
+                return
+            self._window_bytes += nbytes
+            if self.clock() - self._window_start >= self.window:
+                self._close_window()
+
+    def request_throttled(self):
+        """Record a throttled request that is being retried, without ending the upload"""
+        with self._lock:
+            self._on_throttle()
+
+    def _on_throttle(self):
+        """Multiplicative decrease, at most once per window"""
+        self.throttle_count += 1
+        if self._window_throttled:
+            return
+        self._window_throttled = True
+        previous = self._limit
+        self._limit = self._clamp(self._limit // 2)
+        # The limit that got throttled is not a good one to come back to
+        self.best_limit = min(self.best_limit, self._limit)
+        self._previous_throughput = None
+        self.logger.info(f"Upload throttled, concurrency {previous} -> {self._limit}")
+
+    def _close_window(self):
+        """Turn the finished window into a throughput sample and adjust the limit"""
+        now = self.clock()
+        throughput = self._window_bytes / max(now - self._window_start, 1e-6)
+        saturated = self._window_peak >= self._limit and not self._window_throttled
+        self._reset_window()
+        if not saturated:
+            # Uploads did not fill the limit, so the sample says nothing about it
+            return
+
+        if throughput > self.best_throughput:
+            self.best_throughput = throughput
+            self.best_limit = self._limit
+
+        previous = self._previous_throughput
+        self._previous_throughput = throughput
+        if previous is None or throughput > previous * (1 + self.tolerance):
+            new_limit = self._clamp(self._limit + 1)
+        elif throughput < previous * (1 - self.tolerance):
+            new_limit = self._clamp(self._limit - 1)
+        else:
+            return
+        if new_limit != self._limit:
+            self.logger.debug(
+                f"Upload concurrency {self._limit} -> {new_limit} "
+                f"({throughput / (1024 * 1024):.2f} MB/s)"
+            )
+            self._limit = new_limit
+
+    def _reset_window(self):
+        """Start a new measurement window"""
+        self._window_start = self.clock()
+        self._window_bytes = 0
+        self._window_peak = self.in_flight
+        self._window_throttled = False
+
+    def _clamp(self, value):
+        """Keep a limit within the configured bounds"""
+        return max(self.minimum, min(self.maximum, int(value)))
+
+    def _load(self):
+        """Read the stored setting for this key"""
+        if not self.state_path or not self.key or not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get(self.key, {})
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Cannot read upload tuning from {self.state_path}: {e}")
+            return {}
+
+    def save(self):
+        """Store the best limit seen for this key"""
+        if not self.state_path or not self.key or self.best_throughput <= 0:
+            return
+        with self._lock:
+            try:
+                state = {}
+                if os.path.exists(self.state_path):
+                    with open(self.state_path, 'r', encoding='utf-8') as f:
+                        state = json.load(f)
+                state[self.key] = {
+                    'limit': self.best_limit,
+                    'throughput': self.best_throughput,
+                    'updated': time.strftime('%Y-%m-%dT%H:%M:%S')
+                }
+                with open(self.state_path, 'w', encoding='utf-8') as f:
+                    json.dump(state, f, indent=2)
+                self.logger.info(
+                    f"Saved upload concurrency {self.best_limit} for {self.key} "
+                    f"({self.best_throughput / (1024 * 1024):.2f} MB/s)"
+                )
+            except (OSError, ValueError) as e:
+                self.logger.error(f"Cannot save upload tuning to {self.state_path}: {e}")
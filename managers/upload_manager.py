@@ -1,9 +1,74 @@
+import io
 import os
+import time
+import random
+import hashlib
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 import boto3
-from botocore.exceptions import NoCredentialsError, ClientError
+from boto3.exceptions import S3UploadFailedError
+from boto3.s3.transfer import ProgressCallbackInvoker, S3Transfer, TransferConfig, create_transfer_manager
+from botocore.config import Config
+from botocore.exceptions import (
+    NoCredentialsError, ClientError, ConnectTimeoutError, ReadTimeoutError, EndpointConnectionError,
+    ConnectionClosedError
+)
+from s3transfer.utils import ChunksizeAdjuster
 from managers.config_manager import ConfigManager
+from managers.content_hash import compute_s3_etag, get_source_size, hash_file
+from managers.multipart_store import MultipartStore
+from managers.remote_inventory import RemoteInventory
+from managers.upload_concurrency import AdaptiveConcurrency
 from utils.logger import Logger
 
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+CONTENT_HASH_LENGTH = 32  # Hex characters of the SHA-256 used in content-addressed keys
+
+THROTTLING_ERROR_CODES = {
+    'SlowDown', 'Throttling', 'ThrottlingException', 'RequestLimitExceeded',
+    'ServiceUnavailable', 'RequestTimeout', '503'
+}
+
+
+TRANSIENT_STATUS_CODES = {500, 502, 503, 504}
+
+
+def is_throttling_error(error):
+    """
+    Check whether an upload error means S3 wants fewer concurrent requests
+
+    S3Transfer wraps client errors in S3UploadFailedError, so the whole
+    exception chain is inspected.
+    """
+    while error is not None:
+        if isinstance(error, (ConnectTimeoutError, ReadTimeoutError)):
+            return True
+        if isinstance(error, ClientError):
+            code = error.response.get('Error', {}).get('Code')
+            status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+            return code in THROTTLING_ERROR_CODES or status == 503
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def is_transient_error(error):
+    """Check whether an upload error is worth retrying: throttling, dropped connections and 5xx responses"""
+    if is_throttling_error(error):
+        return True
+    while error is not None:
+        if isinstance(error, (EndpointConnectionError, ConnectionClosedError, ConnectionError)):
+            return True
+        if isinstance(error, ClientError):
+            status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+            return status in TRANSIENT_STATUS_CODES
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def get_backoff_delay(attempt, base_delay, max_delay):
+    """Exponential backoff with full jitter: a random delay up to base_delay * 2^attempt, capped at max_delay"""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
 
 class UploadManager:
     def __init__(self):
@@ -11,24 +76,146 @@ class UploadManager:
         self.config_manager = ConfigManager()
         self.logger = Logger()
         self._s3_client = None
+        self._transfer = None
+        self._transfer_manager = None
+        self._part_executor = None
+        self._concurrency = None
+        self._lock = threading.RLock()
         self._bucket_name = None
         self._subfolder = None
+        self._inventory = None
+        self._inventory_enabled = self.config_manager.get('inventory', {}).get('enabled', True)
+        self._inventory_current = False
+        self._inventory_lock = threading.Lock()
+        self._multipart_store = None
+        self._multipart_enabled = self.config_manager.get('transfer', {}).get('resumable_multipart', True)
+        self._multipart_cleaned = False
 
     @property
     def s3_client(self):
-        """Lazy initialization of S3 client"""
-        if self._s3_client is None:
-            aws_access_key = self.config_manager.get("aws_access_key_id")
-            aws_secret_key = self.config_manager.get("aws_secret_access_key")
-            aws_region = self.config_manager.get("aws_region")
-            
-            self._s3_client = boto3.client(
-                's3',
-                aws_access_key_id=aws_access_key,
-                aws_secret_access_key=aws_secret_key,
-                region_name=aws_region
-            )
-        return self._s3_client
+        """
+        Lazy initialization of the S3 client shared by all upload threads
+
+        boto3 clients are thread-safe; the connection pool is sized so that
+        every concurrent request of the transfer manager gets a connection.
+        """
+        with self._lock:
+            if self._s3_client is None:
+                aws_access_key = self.config_manager.get("aws_access_key_id")
+                aws_secret_key = self.config_manager.get("aws_secret_access_key")
+                aws_region = self.config_manager.get("aws_region")
+                pool_size = self.config_manager.get('transfer', {}).get('max_pool_connections')
+                # A few connections beyond the uploads for listing and metadata calls
+                pool_size = pool_size or self.get_transfer_config().max_request_concurrency + 4
+
+                self._s3_client = boto3.client(
+                    's3',
+                    aws_access_key_id=aws_access_key,
+                    aws_secret_access_key=aws_secret_key,
+                    region_name=aws_region,
+                    config=Config(max_pool_connections=pool_size)
+                )
+            return self._s3_client
+
+    @property
+    def transfer(self):
+        """
+        Lazy initialization of the transfer manager shared by all uploads
+
+        One manager means one bounded pool of part-upload threads for the whole
+        run, instead of a separate pool per file.
+        """
+        with self._lock:
+            if self._transfer is None:
+                self._transfer_manager = create_transfer_manager(self.s3_client, self.get_transfer_config())
+                self._transfer = S3Transfer(manager=self._transfer_manager)
+            return self._transfer
+
+    @property
+    def part_executor(self):
+        """
+        Lazy initialization of the thread pool shared by the parts of all resumable multipart uploads
+
+        It gets the large-file share of the request budget get_transfer_config
+        sizes the transfer manager and the connection pool to: the parts of
+        every large file the upload scheduler lets run at once.
+        """
+        with self._lock:
+            if self._part_executor is None:
+                config = self.config_manager.get('transfer', {})
+                upload_config = self.config_manager.get('upload', {})
+                large_uploads = min(upload_config.get('large_lane_limit', 2), upload_config.get('max_concurrent', 8))
+                self._part_executor = ThreadPoolExecutor(
+                    max_workers=max(1, large_uploads) * max(1, config.get('max_concurrency', 10)),
+                    thread_name_prefix='multipart'
+                )
+            return self._part_executor
+
+    def upload_fileobj(self, data, s3_key, callback=None, extra_args=None):
+        """
+        Upload in-memory content through the shared transfer manager, as boto3's upload_fileobj does
+
+        Args:
+            data (bytes): Content to upload
+            s3_key (str): Full object key
+            callback (callable, optional): Called with the bytes of each chunk sent
+            extra_args (dict, optional): Extra S3 arguments such as CacheControl
+        """
+        self.transfer  # Creates the shared transfer manager on first use
+        subscribers = [ProgressCallbackInvoker(callback)] if callback else None
+        future = self._transfer_manager.upload(io.BytesIO(data), self.bucket_name, s3_key, extra_args, subscribers)
+        future.result()
+
+    def get_transfer_config(self):
+        """
+        Build the TransferConfig from the 'transfer' config section
+
+        The shared transfer manager caps requests across all files, so its
+        concurrency is sized to the upload scheduler: one request per running
+        upload, plus extra part uploads for each large file being sent.
+
+        Returns:
+            TransferConfig: Multipart threshold, part size and request concurrency
+        """
+        config = self.config_manager.get('transfer', {})
+        upload_config = self.config_manager.get('upload', {})
+        mb = 1024 * 1024
+        max_uploads = upload_config.get('max_concurrent', 8)
+        large_uploads = min(upload_config.get('large_lane_limit', 2), max_uploads)
+        parts_per_file = max(1, config.get('max_concurrency', 10))
+        return TransferConfig(
+            multipart_threshold=config.get('multipart_threshold_mb', 16) * mb,
+            multipart_chunksize=config.get('multipart_chunksize_mb', 16) * mb,
+            max_concurrency=max_uploads + large_uploads * (parts_per_file - 1),
+            use_threads=True
+        )
+
+    @property
+    def concurrency(self):
+        """
+        Lazy initialization of the upload concurrency controller
+
+        With 'upload.adaptive' enabled the limit adapts to measured throughput
+        and throttling, starting from the best setting stored for this
+        bucket/region; otherwise it stays at 'upload.max_concurrent'.
+        """
+        with self._lock:
+            if self._concurrency is None:
+                config = self.config_manager.get('upload', {})
+                maximum = config.get('max_concurrent', 8)
+                if config.get('adaptive', True):
+                    region = self.config_manager.get("aws_region")
+                    self._concurrency = AdaptiveConcurrency(
+                        minimum=config.get('min_concurrent', 1),
+                        maximum=maximum,
+                        initial=config.get('initial_concurrent', 4),
+                        window=config.get('tuning_window_seconds', 2.0),
+                        state_path=self.config_manager.get_data_path(config.get('tuning_file', 'upload_tuning.json')),
+                        key=f"{self.bucket_name}@{region}"
+                    )
+                else:
+                    self._concurrency = AdaptiveConcurrency(minimum=maximum, maximum=maximum, initial=maximum)
+            return self._concurrency
 
     @property
     def bucket_name(self):
@@ -44,13 +231,404 @@ class UploadManager:
             self._subfolder = self.config_manager.get("s3_subfolder", "obsidian_attachments/").strip('/')
         return self._subfolder
 
-    def upload_file(self, file_path, object_name=None):
+    @property
+    def content_addressed(self):
+        """Whether object names are derived from the uploaded content ('upload.key_scheme: content')"""
+        return self.config_manager.get('upload', {}).get('key_scheme', 'random') == 'content'
+
+    def get_s3_key(self, object_name):
+        """Get the full S3 key of an object in the configured subfolder"""
+        return f"{self.subfolder}/{object_name}"
+
+    def get_content_object_name(self, file_path, original_filename, data=None):
+        """
+        Get a deterministic object name from the hash of the file to upload
+
+        The same output always maps to the same key, so re-runs and retries
+        reuse the existing object and it can be cached as immutable. The
+        original filename is kept as a readable slug.
+
+        Args:
+            file_path (str): File that will be uploaded; only its extension is used when data is given
+            original_filename (str): Filename in the vault, used for the slug
+            data (bytes, optional): In-memory content that will be uploaded
+
+        Returns:
+            str: '<hash>_<slug>.<ext>'
+        """
+        digest = hash_file(data if data is not None else file_path)
+        if digest is None:
+            raise FileNotFoundError(file_path)
+        slug = original_filename.rsplit('.', 1)[0].replace(' ', '_')
+        extension = os.path.splitext(file_path)[1].lower()
+        return f"{digest[:CONTENT_HASH_LENGTH]}_{slug}{extension}"
+
+    def get_upload_args(self):
+        """Get the extra S3 arguments for uploads; content-addressed objects never change, so they are cached forever"""
+        if not self.content_addressed:
+            return None
+        cache_control = self.config_manager.get('upload', {}).get('cache_control', IMMUTABLE_CACHE_CONTROL)
+        return {'CacheControl': cache_control} if cache_control else None
+
+    @property
+    def inventory(self):
+        """Lazy initialization of the local snapshot of the bucket, or None if disabled"""
+        with self._lock:
+            if self._inventory is None and self._inventory_enabled:
+                db_path = self.config_manager.get_data_path(
+                    self.config_manager.get('inventory', {}).get('file', 'remote_inventory.db')
+                )
+                try:
+                    self._inventory = RemoteInventory(db_path)
+                except Exception as e:
+                    self.logger.error(f"Cannot open remote inventory {db_path}, checking objects one by one: {e}")
+                    self._inventory_enabled = False
+            return self._inventory
+
+    def start_run(self):
+        """
+        Prepare for a new run: the next inventory lookup lists the bucket again if the
+        snapshot is older than 'inventory.max_age_minutes', and the next large upload
+        first aborts orphaned multipart uploads
+        """
+        self._inventory_current = False
+        self._multipart_cleaned = False
+
+    def get_current_inventory(self):
+        """
+        Get the inventory snapshot, listing the upload prefix first if needed
+
+        Listing happens at most once per run; if it fails, None is returned
+        and lookups fall back to HEAD requests for the rest of the run.
+        """
+        inventory = self.inventory
+        if inventory is None:
+            return None
+        with self._inventory_lock:
+            if not self._inventory_current:
+                prefix = f"{self.subfolder}/" if self.subfolder else ''
+                max_age = self.config_manager.get('inventory', {}).get('max_age_minutes', 0) * 60
+                try:
+                    age = inventory.get_listing_age(self.bucket_name, prefix)
+                    if age is None or age > max_age:
+                        inventory.refresh(self.s3_client, self.bucket_name, prefix)
+                    else:
+                        self.logger.info(f"Using the bucket listing from {age / 60:.0f} minutes ago")
+                except Exception as e:
+                    self.logger.error(f"Failed to list s3://{self.bucket_name}/{prefix}, checking objects one by one: {e}")
+                    return None
+                self._inventory_current = True
+            return inventory
+
+    def is_uploaded(self, object_name, file_path, data=None):
+        """
+        Check whether a file is already in the bucket under the given object name
+
+        Uses the bucket listing and compares size and ETag, so most checks
+        need no request at all; without a listing it falls back to a HEAD
+        request comparing the size.
+
+        Args:
+            object_name (str): Object name in the configured subfolder
+            file_path (str): Local file that would be uploaded
+            data (bytes, optional): In-memory content that would be uploaded instead of the file
+
+        Returns:
+            bool: True if an identical object exists
+        """
+        source = data if data is not None else file_path
+        size = get_source_size(source)
+        inventory = self.get_current_inventory()
+        if inventory is None:
+            return self.object_exists(object_name, size)
+
+        entry = inventory.get(self.bucket_name, self.get_s3_key(object_name))
+        if entry is None or entry[0] != size:
+            return False
+        transfer_config = self.get_transfer_config()
+        return entry[1] == compute_s3_etag(
+            source, transfer_config.multipart_threshold, transfer_config.multipart_chunksize
+        )
+
+    def _record_upload(self, s3_key, source, size):
+        """Add a content-addressed upload to the inventory so later checks find it without listing"""
+        if not self.content_addressed or not self._inventory_current or self._inventory is None:
+            return
+        transfer_config = self.get_transfer_config()
+        etag = compute_s3_etag(source, transfer_config.multipart_threshold, transfer_config.multipart_chunksize)
+        try:
+            self._inventory.add(self.bucket_name, s3_key, size, etag)
+        except Exception as e:
+            self.logger.error(f"Failed to record {s3_key} in the remote inventory: {e}")
+
+    @property
+    def multipart_store(self):
+        """Lazy initialization of the persistent multipart upload state, or None if disabled"""
+        with self._lock:
+            if self._multipart_store is None and self._multipart_enabled:
+                db_path = self.config_manager.get_data_path(
+                    self.config_manager.get('transfer', {}).get('multipart_state_file', 'multipart_uploads.db')
+                )
+                try:
+                    self._multipart_store = MultipartStore(db_path)
+                except Exception as e:
+                    self.logger.error(f"Cannot open multipart upload state {db_path}, using plain transfers: {e}")
+                    self._multipart_enabled = False
+            return self._multipart_store
+
+    def with_retries(self, operation, description, on_retry=None):
+        """
+        Run an S3 operation, retrying transient failures with exponential backoff and jitter
+
+        Throttled attempts also lower the upload concurrency. Settings come
+        from 'upload.max_attempts', 'upload.retry_base_delay' and
+        'upload.retry_max_delay'.
+
+        Args:
+            operation (callable): The operation; its result is returned
+            description (str): Used in log messages
+            on_retry (callable, optional): Called before each retry, e.g. to reset progress
+
+        Returns:
+            The result of operation
+        """
+        config = self.config_manager.get('upload', {})
+        attempts = max(1, config.get('max_attempts', 5))
+        for attempt in range(attempts):
+            try:
+                return operation()
+            except Exception as e:
+                if attempt + 1 >= attempts or not is_transient_error(e):
+                    raise
+                if is_throttling_error(e):
+                    self.concurrency.request_throttled()
+                delay = get_backoff_delay(attempt, config.get('retry_base_delay', 1.0), config.get('retry_max_delay', 30.0))
+                self.logger.warning(f"{description} failed ({e}), retry {attempt + 1}/{attempts - 1} in {delay:.1f}s")
+                if on_retry:
+                    on_retry()
+                time.sleep(delay)
+
+    def cleanup_multipart_uploads(self):
+        """
+        Abort multipart uploads under the upload prefix that can no longer be resumed
+
+        Unfinished uploads keep their parts (and their storage cost) until
+        they are aborted. Uploads this application does not know about and
+        known uploads older than 'transfer.multipart_max_age_hours' are
+        aborted; known recent ones are left to be resumed.
+
+        Returns:
+            int: Number of uploads aborted
+        """
+        store = self.multipart_store
+        if store is None:
+            return 0
+        max_age = self.config_manager.get('transfer', {}).get('multipart_max_age_hours', 72) * 3600
+        prefix = f"{self.subfolder}/" if self.subfolder else ''
+        known = store.get_upload_ids(self.bucket_name)
+        aborted = 0
+        paginator = self.s3_client.get_paginator('list_multipart_uploads')
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+            for upload in page.get('Uploads', []):
+                age = time.time() - upload['Initiated'].timestamp()
+                if upload['UploadId'] in known and age < max_age:
+                    continue
+                # Uploads started moments ago may belong to another running instance
+                if upload['UploadId'] not in known and age < 3600:
+                    continue
+                self.s3_client.abort_multipart_upload(
+                    Bucket=self.bucket_name, Key=upload['Key'], UploadId=upload['UploadId']
+                )
+                store.remove_upload_id(upload['UploadId'])
+                aborted += 1
+        if aborted:
+            self.logger.info(f"Aborted {aborted} orphaned multipart uploads under s3://{self.bucket_name}/{prefix}")
+        return aborted
+
+    def _cleanup_multipart_once(self):
+        """Run cleanup_multipart_uploads once per run, before the first multipart upload"""
+        with self._inventory_lock:
+            if self._multipart_cleaned:
+                return
+            self._multipart_cleaned = True
+            try:
+                self.cleanup_multipart_uploads()
+            except Exception as e:
+                self.logger.error(f"Failed to clean up orphaned multipart uploads: {e}")
+
+    def upload_multipart(self, file_path, s3_key, callback=None, extra_args=None):
+        """
+        Upload a large file as a resumable multipart upload
+
+        The upload ID and each completed part's ETag are stored, so after a
+        failure or restart only the missing parts are sent: the stored upload
+        is resumed if the local file still has the same size and mtime, and
+        the parts S3 lists for it are skipped once their size and ETag check
+        out (see _get_resumable_parts). Parts are sent on the shared
+        part_executor, at most 'transfer.max_concurrency' per file at once,
+        each with its own retries.
+
+        Args:
+            file_path (str): Local file
+            s3_key (str): Full object key
+            callback (callable, optional): Called with the bytes of each part sent (or found already sent)
+            extra_args (dict, optional): Extra S3 arguments such as CacheControl
+
+        Returns:
+            int: Bytes sent by this call
+        """
+        self._cleanup_multipart_once()
+        store = self.multipart_store
+        stat = os.stat(file_path)
+        size = stat.st_size
+        transfer_config = self.get_transfer_config()
+        # Same part size as the transfer manager, so the ETag matches compute_s3_etag
+        part_size = ChunksizeAdjuster().adjust_chunksize(transfer_config.multipart_chunksize, size)
+        part_count = (size + part_size - 1) // part_size
+
+        upload = store.get_upload(self.bucket_name, s3_key)
+        done = {}
+        if upload and (upload['size'], upload['mtime_ns'], upload['part_size']) == (size, stat.st_mtime_ns, part_size):
+            upload_id = upload['upload_id']
+            try:
+                done = self._get_resumable_parts(file_path, s3_key, upload, part_count)
+                self.logger.info(f"Resuming upload of {file_path}: {len(done)} of {part_count} parts already sent")
+            except ClientError as e:
+                if e.response.get('Error', {}).get('Code') != 'NoSuchUpload':
+                    raise
+                upload = None
+        else:
+            if upload:
+                self._abort_multipart(s3_key, upload['upload_id'])
+            upload = None
+
+        if upload is None:
+            response = self.with_retries(
+                lambda: self.s3_client.create_multipart_upload(Bucket=self.bucket_name, Key=s3_key, **(extra_args or {})),
+                f"Starting upload of {file_path}"
+            )
+            upload_id = response['UploadId']
+            store.start_upload(self.bucket_name, s3_key, upload_id, size, stat.st_mtime_ns, part_size)
+
+        if callback and done:
+            callback(sum(min(part_size, size - (number - 1) * part_size) for number in done))
+
+        def send_part(number):
+            offset = (number - 1) * part_size
+            with open(file_path, 'rb') as f:
+                f.seek(offset)
+                body = f.read(part_size)
+            response = self.with_retries(
+                lambda: self.s3_client.upload_part(
+                    Bucket=self.bucket_name, Key=s3_key, UploadId=upload_id, PartNumber=number, Body=body
+                ),
+                f"Part {number}/{part_count} of {file_path}"
+            )
+            store.add_part(upload_id, number, response['ETag'])
+            if callback:
+                callback(len(body))
+            return number, response['ETag'], len(body)
+
+        missing = [number for number in range(1, part_count + 1) if number not in done]
+        window = max(1, self.config_manager.get('transfer', {}).get('max_concurrency', 10))
+        results = []
+        pending = set()
+        try:
+            for number in missing:
+                if len(pending) >= window:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    results.extend(future.result() for future in finished)
+                pending.add(self.part_executor.submit(send_part, number))
+            finished, pending = wait(pending)
+            results.extend(future.result() for future in finished)
+        except Exception:
+            # Parts not started yet are dropped; the stored upload resumes from the parts that made it
+            for future in pending:
+                future.cancel()
+            raise
+        etags = dict(done)
+        etags.update({number: etag for number, etag, _ in results})
+
+        self.with_retries(
+            lambda: self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket_name, Key=s3_key, UploadId=upload_id,
+                MultipartUpload={'Parts': [{'PartNumber': number, 'ETag': etags[number]} for number in sorted(etags)]}
+            ),
+            f"Completing upload of {file_path}"
+        )
+        store.remove_upload(self.bucket_name, s3_key)
+        return sum(sent for _, _, sent in results)
+
+    def _get_resumable_parts(self, file_path, s3_key, upload, part_count):
+        """
+        Get the parts of a stored multipart upload that need not be sent again
+
+        A part S3 lists is kept only if its number and size fit the file and
+        its ETag matches the one stored when it was sent; a part whose ETag
+        was never stored (the application stopped right after sending it) is
+        kept if the ETag matches the MD5 of the local bytes. Others are sent
+        again and replace the listed ones.
+
+        Returns:
+            dict: Part number -> ETag
+        """
+        part_size = upload['part_size']
+        parts = {}
+        paginator = self.s3_client.get_paginator('list_parts')
+        for page in paginator.paginate(Bucket=self.bucket_name, Key=s3_key, UploadId=upload['upload_id']):
+            for part in page.get('Parts', []):
+                number = part['PartNumber']
+                if not 1 <= number <= part_count:
+                    continue
+                if part['Size'] != min(part_size, upload['size'] - (number - 1) * part_size):
+                    continue
+                stored = upload['parts'].get(number)
+                if stored is not None:
+                    if stored != part['ETag']:
+                        continue
+                else:
+                    with open(file_path, 'rb') as f:
+                        f.seek((number - 1) * part_size)
+                        if part['ETag'].strip('"') != hashlib.md5(f.read(part_size)).hexdigest():
+                            continue
+                parts[number] = part['ETag']
+        return parts
+
+    def _abort_multipart(self, s3_key, upload_id):
+        """Abort a stored multipart upload that cannot be resumed, e.g. because the file changed"""
+        try:
+            self.s3_client.abort_multipart_upload(Bucket=self.bucket_name, Key=s3_key, UploadId=upload_id)
+        except ClientError as e:
+            self.logger.warning(f"Failed to abort multipart upload of {s3_key}: {e}")
+        self.multipart_store.remove_upload_id(upload_id)
+
+    def object_exists(self, object_name, size=None):
+        """
+        Check whether an object is already in the bucket
+
+        Args:
+            object_name (str): Object name in the configured subfolder
+            size (int, optional): Expected size; an object of another size counts as missing
+
+        Returns:
+            bool: True if the object exists (with the expected size)
+        """
+        try:
+            response = self.s3_client.head_object(Bucket=self.bucket_name, Key=self.get_s3_key(object_name))
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+        return size is None or response.get('ContentLength') == size
+
+    def upload_file(self, file_path, object_name=None, extra_args=None):
         """
         Upload a file to S3 bucket in the configured subfolder
         
         Args:
             file_path (str): Local path to the file to upload
             object_name (str, optional): S3 object name. If not specified, file_path's basename is used
+            extra_args (dict, optional): Extra S3 arguments such as CacheControl
             
         Returns:
             tuple: (bool, str) - (Success status, Message or error description)
@@ -61,10 +639,14 @@ class UploadManager:
                 object_name = os.path.basename(file_path)
 
             # Construct the full S3 key with subfolder
-            s3_key = f"{self.subfolder}/{object_name}"
+            s3_key = self.get_s3_key(object_name)
 
             # Upload the file
-            self.s3_client.upload_file(file_path, self.bucket_name, s3_key)
+            self.with_retries(
+                lambda: self.transfer.upload_file(file_path, self.bucket_name, s3_key, extra_args=extra_args),
+                f"Upload of {file_path}"
+            )
+            self._record_upload(s3_key, file_path, os.path.getsize(file_path))
             
             success_msg = f"Successfully uploaded '{file_path}' to S3 bucket '{self.bucket_name}' as '{s3_key}'"
             self.logger.info(success_msg)
@@ -78,7 +660,7 @@ class UploadManager:
             error_msg = "AWS credentials not found or invalid"
             self.logger.error(error_msg)
             return False, error_msg
-        except ClientError as e:
+        except (ClientError, S3UploadFailedError) as e:
             error_msg = f"AWS S3 error: {str(e)}"
             self.logger.error(error_msg)
             return False, error_msg
@@ -87,14 +669,17 @@ class UploadManager:
             self.logger.error(error_msg)
             return False, error_msg
 
-    def upload_file_with_progress(self, file_path, object_name=None, progress_callback=None):
+    def upload_file_with_progress(self, file_path, object_name=None, progress_callback=None, extra_args=None,
+                                  data=None):
         """
         Upload a file to S3 bucket with progress tracking
         
         Args:
-            file_path (str): Local path to the file to upload
+            file_path (str): Local path to the file to upload; only names the upload when data is given
             object_name (str, optional): S3 object name. If not specified, file_path's basename is used
             progress_callback (callable, optional): Function to call with bytes uploaded
+            extra_args (dict, optional): Extra S3 arguments such as CacheControl
+            data (bytes, optional): In-memory content to upload instead of reading file_path
             
         Returns:
             tuple: (bool, str) - (Success status, Message or error description)
@@ -105,32 +690,62 @@ class UploadManager:
                 object_name = os.path.basename(file_path)
 
             # Construct the full S3 key with subfolder
-            s3_key = f"{self.subfolder}/{object_name}"
+            s3_key = self.get_s3_key(object_name)
             
             # Get file size for progress tracking
-            file_size = os.path.getsize(file_path)
+            file_size = len(data) if data is not None else os.path.getsize(file_path)
             
-            # Create a callback class for tracking upload progress
+            # Create a callback class for tracking upload progress; parts report from several threads
             class ProgressCallback:
                 def __init__(self, callback):
                     self._callback = callback
                     self._bytes_uploaded = 0
+                    self._lock = threading.Lock()
                 
                 def __call__(self, bytes_amount):
-                    self._bytes_uploaded += bytes_amount
+                    with self._lock:
+                        self._bytes_uploaded += bytes_amount
+                        bytes_uploaded = self._bytes_uploaded
                     if self._callback:
-                        self._callback(self._bytes_uploaded)
+                        self._callback(bytes_uploaded)
+
+                def reset(self):
+                    with self._lock:
+                        self._bytes_uploaded = 0
             
             # Create progress callback if needed
             callback = ProgressCallback(progress_callback) if progress_callback else None
             
-            # Upload the file with progress tracking
-            self.s3_client.upload_file(
-                file_path, 
-                self.bucket_name, 
-                s3_key,
-                Callback=callback
-            )
+            # Upload the file with progress tracking, reporting the outcome to the concurrency controller
+            self.concurrency.upload_started()
+            try:
+                if data is not None:
+                    self.with_retries(
+                        lambda: self.upload_fileobj(data, s3_key, callback=callback, extra_args=extra_args),
+                        f"Upload of {file_path}",
+                        on_retry=callback.reset if callback else None
+                    )
+                    sent = file_size
+                elif file_size >= self.get_transfer_config().multipart_threshold and self.multipart_store is not None:
+                    sent = self.upload_multipart(file_path, s3_key, callback=callback, extra_args=extra_args)
+                else:
+                    self.with_retries(
+                        lambda: self.transfer.upload_file(
+                            file_path,
+                            self.bucket_name,
+                            s3_key,
+                            callback=callback,
+                            extra_args=extra_args
+                        ),
+                        f"Upload of {file_path}",
+                        on_retry=callback.reset if callback else None
+                    )
+                    sent = file_size
+            except Exception as e:
+                self.concurrency.upload_finished(0, throttled=is_throttling_error(e))
+                raise
+            self.concurrency.upload_finished(sent)
+            self._record_upload(s3_key, data if data is not None else file_path, file_size)
             
             success_msg = f"Successfully uploaded '{file_path}' to S3 bucket '{self.bucket_name}' as '{s3_key}'"
             self.logger.info(success_msg)
@@ -144,7 +759,7 @@ class UploadManager:
             error_msg = "AWS credentials not found or invalid"
             self.logger.error(error_msg)
             return False, error_msg
-        except ClientError as e:
+        except (ClientError, S3UploadFailedError) as e:
             error_msg = f"AWS S3 error: {str(e)}"
             self.logger.error(error_msg)
             return False, error_msg
@@ -153,26 +768,30 @@ class UploadManager:
             self.logger.error(error_msg)
             return False, error_msg
 
-    def upload_files(self, file_paths, object_names=None):
+    def upload_files(self, file_paths, object_names=None, max_workers=None):
         """
-        Upload multiple files to S3 bucket
+        Upload multiple files to S3 bucket concurrently
         
         Args:
             file_paths (list): List of local file paths to upload
             object_names (list, optional): List of S3 object names. If not specified, file basenames are used
+            max_workers (int, optional): Files uploaded at once; defaults to the current upload concurrency
             
         Returns:
             dict: Dictionary mapping file paths to (success, message) tuples
         """
-        results = {}
-        
         if object_names is None:
             object_names = [None] * len(file_paths)
-        
-        for file_path, object_name in zip(file_paths, object_names):
-            results[file_path] = self.upload_file(file_path, object_name)
-        
-        return results
+        if not file_paths:
+            return {}
+
+        max_workers = max_workers or self.concurrency.limit
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(file_paths))) as executor:
+            futures = {
+                file_path: executor.submit(self.upload_file, file_path, object_name)
+                for file_path, object_name in zip(file_paths, object_names)
+            }
+            return {file_path: future.result() for file_path, future in futures.items()}
 
     def get_cloudfront_url(self, object_name):
         """
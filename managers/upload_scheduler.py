@@ -0,0 +1,170 @@
+# managers/upload_scheduler.py
+
+import os
+from collections import deque
+from PyQt6.QtCore import QObject, pyqtSignal, QThreadPool
+from managers.config_manager import ConfigManager
+from managers.upload_worker import UploadTask
+from utils.logger import Logger
+
+
+class UploadScheduler(QObject):
+    """
+    Bounded, size-aware upload queue.
+
+    Uploads run on a thread pool sized to 'upload.max_concurrent' and share
+    the upload manager's transfer manager; how many start at once follows
+    the upload manager's concurrency controller. Files at or above the
+    large-file threshold go to a separate lane with its own, smaller limit,
+    so a few big videos cannot hold every slot while hundreds of small
+    images wait. A cap on in-flight bytes keeps several large uploads from
+    starting at once.
+    """
+
+    progress = pyqtSignal(dict, int, int)  # item, bytes_uploaded, total_bytes
+    error = pyqtSignal(str)
+    upload_finished = pyqtSignal(dict)  # item, with upload_status set
+
+    LANES = ('small', 'large')
+
+    def __init__(self, upload_manager):
+        super().__init__()
+        self.upload_manager = upload_manager
+        self.config_manager = ConfigManager()
+        self.logger = Logger()
+
+        config = self.config_manager.get('upload', {})
+        self.max_concurrent = max(1, config.get('max_concurrent', 8))
+        self.large_file_threshold = config.get('large_file_threshold_mb', 16) * 1024 * 1024
+        self.large_lane_limit = max(1, min(config.get('large_lane_limit', 2), self.max_concurrent))
+        self.max_in_flight_bytes = config.get('max_in_flight_mb', 512) * 1024 * 1024
+
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(self.max_concurrent)
+        self.reset()
+
+    def reset(self):
+        """Drop queued uploads and reset the statistics, and start a new run of the upload manager"""
+        self.upload_manager.start_run()
+        self.queues = {lane: deque() for lane in self.LANES}
+        self.running = {lane: 0 for lane in self.LANES}
+        self.active = {}  # id(item) -> [size, bytes_uploaded]
+        self.stats = {
+            'completed': 0,
+            'failed': 0,
+            'skipped': 0,  # Objects already in the bucket
+            'uploaded_bytes': 0,
+            'peak_queue_depth': 0,
+            'peak_in_flight_bytes': 0
+        }
+
+    def submit(self, item):
+        """Queue a workload item for upload"""
+        if 'compressed_data' in item:
+            size = len(item['compressed_data'])
+        else:
+            file_path = item.get('processed_path', item['path'])
+            try:
+                size = os.path.getsize(file_path)
+            except OSError:
+                size = item.get('filesize', 0)
+        lane = 'large' if size >= self.large_file_threshold else 'small'
+        self.queues[lane].append((item, size))
+        self.stats['peak_queue_depth'] = max(self.stats['peak_queue_depth'], self.queue_depth())
+        self._dispatch()
+
+    def queue_depth(self):
+        """Get the number of uploads waiting for a slot"""
+        return sum(len(queue) for queue in self.queues.values())
+
+    def in_flight_bytes(self):
+        """Get the bytes still to be sent by the running uploads"""
+        return sum(size - sent for size, sent in self.active.values())
+
+    def get_stats(self):
+        """
+        Get a monitoring snapshot of the upload queue
+
+        Returns:
+            dict: Queue depth and running count per lane, in-flight bytes and totals
+        """
+        stats = dict(self.stats)
+        stats.update({
+            'queue_depth': self.queue_depth(),
+            'queued': {lane: len(queue) for lane, queue in self.queues.items()},
+            'queued_bytes': sum(size for queue in self.queues.values() for _, size in queue),
+            'running': dict(self.running),
+            'concurrency': self.upload_manager.concurrency.limit,
+            'in_flight_bytes': self.in_flight_bytes()
+        })
+        return stats
+
+    def log_stats(self):
+        """Log the upload totals of the run and store the tuned concurrency"""
+        self.upload_manager.concurrency.save()
+        stats = self.get_stats()
+        self.logger.info(
+            f"Uploads: {stats['completed']} completed, {stats['failed']} failed, "
+            f"{stats['skipped']} already in the bucket, "
+            f"{stats['uploaded_bytes'] / (1024 * 1024):.1f} MB sent, "
+            f"peak queue depth {stats['peak_queue_depth']}, "
+            f"peak in-flight {stats['peak_in_flight_bytes'] / (1024 * 1024):.1f} MB, "
+            f"concurrency {stats['concurrency']}"
+        )
+
+    def clear(self):
+        """Drop queued uploads; running uploads finish on their own"""
+        for queue in self.queues.values():
+            queue.clear()
+        self.pool.clear()
+
+    def _next_lane(self):
+        """Pick the lane of the next upload, or None if nothing may start"""
+        limit = self.upload_manager.concurrency.limit
+        if sum(self.running.values()) >= limit:
+            return None
+        # Large files are bounded by their lane limit and the in-flight byte cap,
+        # but one may always run so a single huge file cannot stall the queue
+        if self.queues['large'] and self.running['large'] < min(self.large_lane_limit, limit):
+            _, size = self.queues['large'][0]
+            if not self.active or self.in_flight_bytes() + size <= self.max_in_flight_bytes:
+                return 'large'
+        if self.queues['small']:
+            return 'small'
+        return None
+
+    def _dispatch(self):
+        """Start queued uploads while slots are free"""
+        lane = self._next_lane()
+        while lane is not None:
+            item, size = self.queues[lane].popleft()
+            self.running[lane] += 1
+            self.active[id(item)] = [size, 0]
+            self.stats['peak_in_flight_bytes'] = max(self.stats['peak_in_flight_bytes'], self.in_flight_bytes())
+
+            task = UploadTask(item, self.upload_manager)
+            task.signals.progress.connect(self._on_progress)
+            task.signals.error.connect(self.error.emit)
+            task.signals.finished.connect(lambda item=item, lane=lane: self._on_finished(item, lane))
+            self.pool.start(task)
+            lane = self._next_lane()
+
+    def _on_progress(self, item, bytes_uploaded, total_bytes):
+        """Track the bytes sent by a running upload"""
+        if id(item) in self.active:
+            self.active[id(item)][1] = bytes_uploaded
+        self.progress.emit(item, bytes_uploaded, total_bytes)
+
+    def _on_finished(self, item, lane):
+        """Free the upload's slot and start the next queued upload"""
+        size, _ = self.active.pop(id(item), (0, 0))
+        self.running[lane] -= 1
+        if item.get('upload_skipped'):
+            self.stats['skipped'] += 1
+        elif item.get('upload_status') == 'success':
+            self.stats['completed'] += 1
+            self.stats['uploaded_bytes'] += size
+        else:
+            self.stats['failed'] += 1
+        self.upload_finished.emit(item)
+        self._dispatch()
@@ -1,42 +1,67 @@
 # managers/upload_worker.py
 
-from PyQt6.QtCore import pyqtSignal, QThread
+from PyQt6.QtCore import QObject, pyqtSignal, QRunnable, pyqtSlot
 from utils.logger import Logger
 import os
+import traceback
 
-class UploadWorker(QThread):
+class UploadTaskSignals(QObject):
     progress = pyqtSignal(dict, int, int)  # item, bytes_uploaded, total_bytes
     error = pyqtSignal(str)
     finished = pyqtSignal()
 
+class UploadTask(QRunnable):
     def __init__(self, item, upload_manager):
         super().__init__()
         self.workload_item = item
         self.upload_manager = upload_manager
+        self.signals = UploadTaskSignals()
         self.logger = Logger()
+        self.setAutoDelete(True)
 
+    @pyqtSlot()
     def run(self):
         """Upload the file with progress tracking."""
         try:
-            # Get file information
-            file_path = self.workload_item.get('processed_path', self.workload_item['path'])
-            file_size = os.path.getsize(file_path)
+            # Get file information; images compressed in memory have no file, only their compressed name
+            data = self.workload_item.get('compressed_data')
+            if data is not None:
+                file_path = self.workload_item['compressed_filename']
+                file_size = len(data)
+            else:
+                file_path = self.workload_item.get('processed_path', self.workload_item['path'])
+                file_size = os.path.getsize(file_path)
 
             # Get the filename to use for uploading
-            upload_filename = self.workload_item.get('compressed_filename', os.path.basename(file_path))
+            if self.upload_manager.content_addressed:
+                upload_filename = self.upload_manager.get_content_object_name(
+                    file_path, self.workload_item['filename'], data=data
+                )
+            else:
+                upload_filename = self.workload_item.get('compressed_filename', os.path.basename(file_path))
 
             def progress_callback(bytes_uploaded):
-                self.progress.emit(self.workload_item, bytes_uploaded, file_size)
+                self.signals.progress.emit(self.workload_item, bytes_uploaded, file_size)
 
-            # Upload the file
-            success, message = self.upload_manager.upload_file_with_progress(
-                file_path,
-                object_name=upload_filename,
-                progress_callback=progress_callback
-            )
+            if self.upload_manager.content_addressed and self.upload_manager.is_uploaded(upload_filename, file_path, data=data):
+                # Same content was uploaded before, e.g. by a run that crashed before recording it
+                success, message = True, "Object already exists"
+                self.workload_item['upload_skipped'] = True
+                self.logger.info(f"Skipping upload of {file_path}: {upload_filename} already exists")
+                progress_callback(file_size)
+            else:
+                # Upload the file
+                success, message = self.upload_manager.upload_file_with_progress(
+                    file_path,
+                    object_name=upload_filename,
+                    progress_callback=progress_callback,
+                    extra_args=self.upload_manager.get_upload_args(),
+                    data=data
+                )
 
             if success:
                 self.workload_item['upload_status'] = 'success'
+                self.workload_item['s3_key'] = self.upload_manager.get_s3_key(upload_filename)
                 self.workload_item['cloudfront_url'] = self.upload_manager.get_cloudfront_url(upload_filename)
                 self.logger.info(f"Uploaded file: {file_path}")
             else:
@@ -44,13 +69,13 @@ class UploadWorker(QThread):
                 self.workload_item['upload_error'] = message
                 error_msg = f"Failed to upload {file_path}: {message}"
                 self.logger.error(error_msg)
-                self.error.emit(error_msg)
+                self.signals.error.emit(error_msg)
 
         except Exception as e:
             error_msg = f"Error during upload of {self.workload_item['path']}: {str(e)}\n{traceback.format_exc()}"
             self.logger.error(error_msg)
             self.workload_item['upload_status'] = 'failed'
             self.workload_item['upload_error'] = str(e)
-            self.error.emit(error_msg)
+            self.signals.error.emit(error_msg)
         finally:
-            self.finished.emit()
+            self.signals.finished.emit()
@@ -0,0 +1,360 @@
+# managers/vault_index.py
+
+import os
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from managers.vault_scanner import VaultEntry, VaultSnapshot
+from managers.database import open_database
+from utils.logger import Logger
+
+# Directories modified this close to their last scan are rescanned, since a
+# second change within the filesystem's timestamp granularity is invisible.
+RACY_WINDOW_NS = 2_000_000_000
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def compute_file_hash(file_path):
+    """Compute the content hash of a file in chunks"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, 'rb') as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class VaultIndex:
+    """
+    Persistent SQLite index of the media and markdown files in a vault.
+
+    Each refresh stats every known directory and every indexed file. Only
+    directories whose mtime changed since the last run are listed; the
+    file stats catch files edited or overwritten in place, which leave the
+    directory mtime unchanged. Rows also carry the migration state and the
+    S3 key and CloudFront URL of uploaded attachments, and probe results
+    (image headers, video metadata) are cached keyed by path, size and mtime.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS directories (
+            path TEXT PRIMARY KEY,
+            root TEXT NOT NULL,
+            parent TEXT,
+            mtime_ns INTEGER NOT NULL,
+            scanned_ns INTEGER NOT NULL,
+            other_count INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS directories_root ON directories(root);
+        CREATE TABLE IF NOT EXISTS files (
+            path TEXT PRIMARY KEY,
+            root TEXT NOT NULL,
+            directory TEXT NOT NULL,
+            name TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            content_hash TEXT,
+            migration_state TEXT NOT NULL DEFAULT 'pending',
+            s3_key TEXT,
+            cloudfront_url TEXT,
+            present INTEGER NOT NULL DEFAULT 1
+        );
+        CREATE INDEX IF NOT EXISTS files_root ON files(root);
+        CREATE INDEX IF NOT EXISTS files_directory ON files(directory);
+        CREATE TABLE IF NOT EXISTS media_probes (
+            path TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (path, kind)
+        );
+    """
+
+    def __init__(self, db_path, max_workers=None):
+        """
+        Open (or create) the index database
+
+        Args:
+            db_path (str): Path of the SQLite database file
+            max_workers (int, optional): Threads used to stat and list directories
+        """
+        self.logger = Logger()
+        self.db_path = db_path
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self._lock = threading.Lock()
+        self._conn = open_database(db_path, self.SCHEMA)
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def refresh(self, root, scanner):
+        """
+        Bring the index up to date with the vault and return a snapshot of it
+
+        Args:
+            root (str): Vault directory
+            scanner (VaultScanner): Scanner used to list changed directories
+
+        Returns:
+            VaultSnapshot: Media and markdown entries currently in the vault
+        """
+        started = time.perf_counter()
+        root = os.path.normpath(root)
+
+        with self._lock:
+            known_dirs = {
+                path: (parent, mtime_ns, scanned_ns)
+                for path, parent, mtime_ns, scanned_ns in self._conn.execute(
+                    "SELECT path, parent, mtime_ns, scanned_ns FROM directories WHERE root = ?", (root,)
+                )
+            }
+            known_files = {}
+            for path, directory, size, mtime_ns in self._conn.execute(
+                "SELECT path, directory, size, mtime_ns FROM files WHERE root = ? AND present = 1", (root,)
+            ):
+                known_files.setdefault(directory, []).append((path, size, mtime_ns))
+        children = {}
+        for path, (parent, _, _) in known_dirs.items():
+            if parent is not None:
+                children.setdefault(parent, []).append(path)
+
+        def visit(directory):
+            """
+            Stat a directory and list it only if it changed since the last scan
+
+            The directory mtime only reveals added, removed and renamed entries,
+            so the indexed files of an unchanged directory are stat'ed to catch
+            files edited or overwritten in place.
+            """
+            try:
+                mtime_ns = os.stat(directory).st_mtime_ns
+            except OSError:
+                return directory, None, None, None, None
+            known = known_dirs.get(directory)
+            if known and known[1] == mtime_ns and mtime_ns < known[2] - RACY_WINDOW_NS:
+                modified = []
+                for path, size, file_mtime_ns in known_files.get(directory, []):
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        break
+                    if (stat.st_size, stat.st_mtime_ns) != (size, file_mtime_ns):
+                        modified.append((path, stat.st_size, stat.st_mtime_ns))
+                else:
+                    return directory, mtime_ns, None, children.get(directory, []), modified
+            files, subdirs = scanner.scan_directory(directory)
+            return directory, mtime_ns, files, subdirs, None
+
+        changed = []
+        modified = []
+        visited = set()
+        frontier = [root]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while frontier:
+                next_frontier = []
+                for directory, mtime_ns, files, subdirs, modified_files in executor.map(visit, frontier):
+                    if mtime_ns is None:
+                        continue
+                    visited.add(directory)
+                    if files is not None:
+                        changed.append((directory, mtime_ns, files, subdirs))
+                    else:
+                        modified.extend(modified_files)
+                    next_frontier.extend(subdirs)
+                frontier = next_frontier
+
+        vanished = [path for path in known_dirs if path not in visited]
+        self._apply_changes(root, changed, modified, vanished, known_dirs)
+        snapshot = self.get_snapshot(root)
+
+        elapsed = time.perf_counter() - started
+        self.logger.info(
+            f"Refreshed vault index in {elapsed:.2f}s: {len(visited)} directories, "
+            f"{len(changed)} rescanned, {len(modified)} files modified in place, {len(vanished)} removed"
+        )
+        return snapshot
+
+    def _apply_changes(self, root, changed, modified, vanished, known_dirs):
+        """Write rescanned directories and files modified in place to the database in one transaction"""
+        scanned_ns = time.time_ns()
+        with self._lock, self._conn:
+            for path, size, mtime_ns in modified:
+                self._update_file(path, size, mtime_ns)
+
+            for directory in vanished:
+                self._forget_directory_files(directory)
+                self._conn.execute("DELETE FROM directories WHERE path = ?", (directory,))
+
+            for directory, mtime_ns, files, subdirs in changed:
+                indexed = [entry for entry in files if entry.kind != 'other']
+                parent = None if directory == root else os.path.dirname(directory)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO directories (path, root, parent, mtime_ns, scanned_ns, other_count) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (directory, root, parent, mtime_ns, scanned_ns, len(files) - len(indexed))
+                )
+
+                existing = {
+                    path: (size, mtime_ns_)
+                    for path, size, mtime_ns_ in self._conn.execute(
+                        "SELECT path, size, mtime_ns FROM files WHERE directory = ? AND present = 1", (directory,)
+                    )
+                }
+                for entry in indexed:
+                    previous = existing.pop(entry.path, None)
+                    if previous == (entry.size, entry.mtime_ns):
+                        continue
+                    if previous is None:
+                        self._conn.execute(
+                            "INSERT INTO files (path, root, directory, name, size, mtime_ns, kind) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                            "ON CONFLICT(path) DO UPDATE SET size = excluded.size, mtime_ns = excluded.mtime_ns, "
+                            "kind = excluded.kind, present = 1, content_hash = NULL, "
+                            "migration_state = 'pending', s3_key = NULL, cloudfront_url = NULL",
+                            (entry.path, root, directory, entry.name, entry.size, entry.mtime_ns, entry.kind)
+                        )
+                    else:
+                        self._update_file(entry.path, entry.size, entry.mtime_ns)
+                for path in existing:
+                    self._forget_file(path)
+
+    def _update_file(self, path, size, mtime_ns):
+        """Store the new size and mtime of a file whose content changed in place"""
+        # Earlier hash and upload no longer apply
+        self._conn.execute(
+            "UPDATE files SET size = ?, mtime_ns = ?, content_hash = NULL, "
+            "migration_state = 'pending', s3_key = NULL, cloudfront_url = NULL WHERE path = ?",
+            (size, mtime_ns, path)
+        )
+
+    def _forget_directory_files(self, directory):
+        """Drop the rows of files in a directory that no longer exists"""
+        paths = [row[0] for row in self._conn.execute(
+            "SELECT path FROM files WHERE directory = ? AND present = 1", (directory,)
+        )]
+        for path in paths:
+            self._forget_file(path)
+
+    def _forget_file(self, path):
+        """Remove a vanished file, keeping the row if it records a completed upload"""
+        self._conn.execute("DELETE FROM media_probes WHERE path = ?", (path,))
+        self._conn.execute("DELETE FROM files WHERE path = ? AND s3_key IS NULL", (path,))
+        self._conn.execute("UPDATE files SET present = 0 WHERE path = ?", (path,))
+
+    def get_snapshot(self, root):
+        """Build a vault snapshot from the indexed rows"""
+        root = os.path.normpath(root)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, name, size, mtime_ns, kind FROM files WHERE root = ? AND present = 1", (root,)
+            ).fetchall()
+            other_count = self._conn.execute(
+                "SELECT COALESCE(SUM(other_count), 0) FROM directories WHERE root = ?", (root,)
+            ).fetchone()[0]
+        entries = [VaultEntry(*row) for row in rows]
+        media = tuple(entry for entry in entries if entry.kind in ('image', 'video'))
+        markdown = tuple(entry for entry in entries if entry.kind == 'markdown')
+        return VaultSnapshot(root, media, markdown, other_count, time.time())
+
+    def get_migrations(self, root):
+        """
+        Get the recorded uploads of files in a vault
+
+        Returns:
+            dict: Maps file path to a dict with size, mtime_ns, migration_state, s3_key and cloudfront_url
+        """
+        root = os.path.normpath(root)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, size, mtime_ns, migration_state, s3_key, cloudfront_url "
+                "FROM files WHERE root = ? AND s3_key IS NOT NULL", (root,)
+            ).fetchall()
+        return {
+            path: {
+                'size': size,
+                'mtime_ns': mtime_ns,
+                'migration_state': state,
+                's3_key': s3_key,
+                'cloudfront_url': cloudfront_url
+            }
+            for path, size, mtime_ns, state, s3_key, cloudfront_url in rows
+        }
+
+    def record_upload(self, path, s3_key, cloudfront_url):
+        """Record the S3 object an attachment was uploaded to"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE files SET migration_state = 'uploaded', s3_key = ?, cloudfront_url = ? WHERE path = ?",
+                (s3_key, cloudfront_url, path)
+            )
+
+    def set_migration_state(self, path, state):
+        """Set the migration state of an indexed file"""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE files SET migration_state = ? WHERE path = ?", (state, path))
+
+    def get_content_hash(self, path):
+        """Get the content hash of an indexed file, computing it only if it is unknown or stale"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, content_hash FROM files WHERE path = ?", (path,)
+            ).fetchone()
+        stat = os.stat(path)
+        if row and row[2] and (row[0], row[1]) == (stat.st_size, stat.st_mtime_ns):
+            return row[2]
+
+        content_hash = compute_file_hash(path)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE files SET content_hash = ? WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (content_hash, path, stat.st_size, stat.st_mtime_ns)
+            )
+        return content_hash
+
+    def get_probes(self, kind, files):
+        """
+        Get cached probe results that are still valid
+
+        Args:
+            kind (str): Probe type, 'image' or 'video'
+            files (iterable): (path, size, mtime_ns) of the files to look up
+
+        Returns:
+            dict: Maps path to the stored probe data for files unchanged since they were probed
+        """
+        files = list(files)
+        found = {}
+        with self._lock:
+            for i in range(0, len(files), 500):
+                batch = files[i:i + 500]
+                placeholders = ','.join('?' * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT path, size, mtime_ns, data FROM media_probes WHERE kind = ? AND path IN ({placeholders})",
+                    [kind] + [path for path, _, _ in batch]
+                ).fetchall()
+                found.update({path: (size, mtime_ns, data) for path, size, mtime_ns, data in rows})
+        return {
+            path: json.loads(found[path][2])
+            for path, size, mtime_ns in files
+            if path in found and found[path][:2] == (size, mtime_ns)
+        }
+
+    def store_probes(self, kind, results):
+        """
+        Cache probe results
+
+        Args:
+            kind (str): Probe type, 'image' or 'video'
+            results (iterable): (path, size, mtime_ns, data) with JSON-serializable data
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO media_probes (path, kind, size, mtime_ns, data) VALUES (?, ?, ?, ?, ?)",
+                [(path, kind, size, mtime_ns, json.dumps(data)) for path, size, mtime_ns, data in results]
+            )
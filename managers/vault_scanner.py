@@ -0,0 +1,123 @@
+# managers/vault_scanner.py
+
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from utils.logger import Logger
+
+# A single file found in the vault. kind is 'image', 'video', 'markdown' or 'other'.
+VaultEntry = namedtuple('VaultEntry', ['path', 'name', 'size', 'mtime_ns', 'kind'])
+
+# Immutable result of one vault walk, shared by every processing phase.
+VaultSnapshot = namedtuple('VaultSnapshot', ['root', 'media', 'markdown', 'other_count', 'scanned_at'])
+
+
+class VaultScanner:
+    def __init__(self, image_extensions, video_extensions, max_workers=None):
+        """
+        Initialize the scanner with the extensions used to classify files
+
+        Args:
+            image_extensions (list): Image extensions including the leading dot
+            video_extensions (list): Video extensions including the leading dot
+            max_workers (int, optional): Threads used to walk top-level folders in parallel
+        """
+        self.logger = Logger()
+        self.kinds = {'.md': 'markdown'}
+        self.kinds.update({ext.lower(): 'image' for ext in image_extensions})
+        self.kinds.update({ext.lower(): 'video' for ext in video_extensions})
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+
+    def classify(self, filename):
+        """Get the kind of a file from its extension"""
+        return self.kinds.get(os.path.splitext(filename)[1].lower(), 'other')
+
+    def scan(self, root):
+        """
+        Walk the vault once and classify every file
+
+        Top-level folders are walked in parallel; stat results come from the
+        directory entries so no extra getsize call is made per file.
+
+        Args:
+            root (str): Vault directory
+
+        Returns:
+            VaultSnapshot: Media and markdown entries found under root
+        """
+        started = time.perf_counter()
+        top_files, top_dirs = self.scan_directory(root)
+        entries = list(top_files)
+
+        if top_dirs:
+            workers = min(self.max_workers, len(top_dirs))
+            if workers > 1:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    for subtree in executor.map(self._walk, top_dirs):
+                        entries.extend(subtree)
+            else:
+                for directory in top_dirs:
+                    entries.extend(self._walk(directory))
+
+        return self.build_snapshot(root, entries, time.perf_counter() - started)
+
+    def iter_scan(self, root):
+        """
+        Walk the vault in a single thread, yielding entries as directories are listed
+
+        Lets processing start before the walk finishes; collect the entries
+        and pass them to build_snapshot once the generator is exhausted.
+        """
+        pending = [root]
+        while pending:
+            files, subdirs = self.scan_directory(pending.pop())
+            yield from files
+            pending.extend(reversed(subdirs))
+
+    def build_snapshot(self, root, entries, elapsed):
+        """Build an immutable snapshot from scanned entries"""
+        media = tuple(entry for entry in entries if entry.kind in ('image', 'video'))
+        markdown = tuple(entry for entry in entries if entry.kind == 'markdown')
+        other_count = len(entries) - len(media) - len(markdown)
+
+        self.logger.info(
+            f"Scanned {len(entries)} files in {elapsed:.2f}s: "
+            f"{len(media)} media, {len(markdown)} markdown, {other_count} other"
+        )
+        return VaultSnapshot(root, media, markdown, other_count, time.time())
+
+    def _walk(self, directory):
+        """Walk a directory tree depth-first and return its file entries"""
+        entries = []
+        pending = [directory]
+        while pending:
+            files, subdirs = self.scan_directory(pending.pop())
+            entries.extend(files)
+            pending.extend(reversed(subdirs))
+        return entries
+
+    def scan_directory(self, directory):
+        """List one directory, returning (file entries, subdirectory paths)"""
+        files = []
+        subdirs = []
+        try:
+            with os.scandir(directory) as iterator:
+                for dir_entry in iterator:
+                    try:
+                        if dir_entry.is_dir(follow_symlinks=False):
+                            subdirs.append(dir_entry.path)
+                        elif dir_entry.is_file():
+                            stat = dir_entry.stat()
+                            files.append(VaultEntry(
+                                dir_entry.path,
+                                dir_entry.name,
+                                stat.st_size,
+                                stat.st_mtime_ns,
+                                self.classify(dir_entry.name)
+                            ))
+                    except OSError as e:
+                        self.logger.warning(f"Skipping {dir_entry.path}: {e}")
+        except OSError as e:
+            self.logger.warning(f"Cannot scan directory {directory}: {e}")
+        return files, subdirs
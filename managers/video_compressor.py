@@ -0,0 +1,346 @@
+# managers/video_compressor.py
+
+"""
+Encoding decisions for videos, based on their ffprobe metadata.
+
+Clips that are already H.264 within the size and bitrate limits are only
+remuxed into a faststart MP4; re-encoding them would cost minutes of CPU
+for little size gain and add generation loss. Long videos can be split at
+keyframes, encoded segment by segment in parallel and joined again
+without re-encoding.
+
+ffmpeg runs through run_ffmpeg, which reads its -progress output to report
+how far an encode is and lets a running encode be cancelled by killing its
+process.
+"""
+
+import glob
+import os
+import threading
+import time
+import ffmpeg
+
+COPY_VIDEO_CODECS = {'h264'}
+COPY_PIXEL_FORMATS = {'yuv420p', 'yuvj420p'}
+COPY_AUDIO_CODECS = {'aac'}
+
+# Encoding paths, cheapest first
+REMUX = 'remux'  # Copy video and audio
+ENCODE_AUDIO = 'encode_audio'  # Copy video, encode audio to AAC
+ENCODE_VIDEO = 'encode_video'  # Encode video, copy audio
+ENCODE = 'encode'  # Encode both
+
+STDERR_TAIL_BYTES = 64 * 1024  # ffmpeg log kept for error messages
+
+
+class FfmpegCancelled(Exception):
+    """Raised by run_ffmpeg when its process was killed by FfmpegProcesses.kill"""
+
+
+class FfmpegProcesses:
+    """Running ffmpeg processes by owner, so encodes can be cancelled by killing them"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running = {}  # id(process) -> (owner, process)
+
+    def add(self, process, owner=None):
+        with self._lock:
+            self._running[id(process)] = (owner, process)
+
+    def remove(self, process):
+        with self._lock:
+            self._running.pop(id(process), None)
+
+    def kill(self, owner=None):
+        """
+        Kill the running processes of an owner, or all of them if owner is None
+
+        Returns:
+            int: Number of processes killed
+        """
+        with self._lock:
+            targets = [process for process_owner, process in self._running.values()
+                       if owner is None or process_owner is owner]
+        for process in targets:
+            process.cancelled = True
+            try:
+                process.kill()
+            except OSError:
+                pass  # Already exited
+        return len(targets)
+
+
+def parse_progress(fields):
+    """
+    Parse one block of ffmpeg -progress output
+
+    Args:
+        fields (dict): key=value pairs up to a 'progress' line
+
+    Returns:
+        dict: out_time (seconds), fps and speed (x realtime); None where ffmpeg reported N/A
+    """
+    out_time = None
+    # out_time_ms is in microseconds as well, despite its name
+    for key in ('out_time_us', 'out_time_ms'):
+        try:
+            out_time = int(fields[key]) / 1000000
+            break
+        except (KeyError, ValueError):
+            continue
+    if out_time is None and ':' in fields.get('out_time', ''):
+        try:
+            hours, minutes, seconds = fields['out_time'].split(':')
+            out_time = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+        except ValueError:
+            pass
+
+    def to_float(value):
+        try:
+            return float(value.rstrip('x'))
+        except (AttributeError, ValueError):
+            return None
+
+    return {
+        'out_time': max(0.0, out_time) if out_time is not None else None,
+        'fps': to_float(fields.get('fps')),
+        'speed': to_float(fields.get('speed'))
+    }
+
+
+def get_progress_report(progress, duration):
+    """Add the fraction done and the ETA for the expected duration to a parsed progress block"""
+    report = dict(progress, fraction=None, eta=None)
+    if duration and progress['out_time'] is not None:
+        report['fraction'] = min(1.0, progress['out_time'] / duration)
+        if progress['speed']:
+            report['eta'] = max(0.0, duration - progress['out_time']) / progress['speed']
+    return report
+
+
+def run_ffmpeg(stream, duration=None, on_progress=None, interval=1.0, processes=None, owner=None):
+    """
+    Run an ffmpeg stream, reporting progress and allowing cancellation
+
+    Progress is read from '-progress pipe:1'. on_progress is called at most
+    once per interval (and once at the end) with out_time, fps and speed
+    from parse_progress plus 'fraction' and 'eta' (seconds) when duration is
+    known. stderr is drained on a separate thread so ffmpeg never blocks on
+    it; its tail goes into the ffmpeg.Error raised on failure.
+
+    Args:
+        stream: ffmpeg-python output stream
+        duration (float, optional): Expected output duration in seconds
+        on_progress (callable, optional): Called with the progress dict
+        interval (float): Minimum seconds between progress calls
+        processes (FfmpegProcesses, optional): Registry the process is added to while it runs
+        owner: Key under which the process is registered
+
+    Raises:
+        FfmpegCancelled: The process was killed through the registry
+        ffmpeg.Error: ffmpeg exited with an error
+    """
+    stream = stream.global_args('-progress', 'pipe:1', '-nostats')
+    process = ffmpeg.run_async(stream, pipe_stdout=True, pipe_stderr=True)
+    if processes is not None:
+        processes.add(process, owner)
+
+    stderr_tail = bytearray()
+
+    def drain_stderr():
+        for chunk in iter(lambda: process.stderr.read(4096), b''):
+            stderr_tail.extend(chunk)
+            del stderr_tail[:-STDERR_TAIL_BYTES]
+
+    stderr_thread = threading.Thread(target=drain_stderr, daemon=True)
+    stderr_thread.start()
+
+    try:
+        fields = {}
+        last_report = 0.0
+        for raw_line in process.stdout:
+            key, _, value = raw_line.decode('utf-8', 'replace').strip().partition('=')
+            if key != 'progress':
+                fields[key] = value
+                continue
+            now = time.monotonic()
+            if on_progress and (value == 'end' or now - last_report >= interval):
+                last_report = now
+                on_progress(get_progress_report(parse_progress(fields), duration))
+            fields = {}
+        returncode = process.wait()
+        stderr_thread.join()
+    except BaseException:
+        process.kill()
+        process.wait()
+        raise
+    finally:
+        if processes is not None:
+            processes.remove(process)
+
+    if getattr(process, 'cancelled', False):
+        raise FfmpegCancelled("ffmpeg was cancelled")
+    if returncode:
+        raise ffmpeg.Error('ffmpeg', None, bytes(stderr_tail))
+
+
+def parse_rate(rate):
+    """Parse an ffprobe rate like '30000/1001' into a float, or 0.0"""
+    try:
+        numerator, _, denominator = str(rate).partition('/')
+        return float(numerator) / float(denominator or 1)
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+
+
+def get_video_info(probe):
+    """
+    Extract the fields the encoding decision needs from ffprobe output
+
+    Args:
+        probe (dict): Result of ffmpeg.probe
+
+    Returns:
+        dict: width, height, codec, pix_fmt, fps, duration, bit_rate and audio_codec
+    """
+    video_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'video'), None)
+    if video_stream is None:
+        raise ValueError("No video stream found")
+    audio_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'audio'), None)
+    probe_format = probe.get('format', {})
+
+    duration = float(video_stream.get('duration') or probe_format.get('duration') or 0)
+    bit_rate = int(video_stream.get('bit_rate') or 0)
+    if not bit_rate and probe_format.get('bit_rate'):
+        # Container bitrate includes audio, which only makes the estimate conservative
+        bit_rate = int(probe_format['bit_rate'])
+
+    return {
+        'width': int(video_stream['width']),
+        'height': int(video_stream['height']),
+        'codec': video_stream.get('codec_name'),
+        'pix_fmt': video_stream.get('pix_fmt'),
+        'fps': parse_rate(video_stream.get('avg_frame_rate')) or parse_rate(video_stream.get('r_frame_rate')),
+        'duration': duration,
+        'bit_rate': bit_rate,
+        'audio_codec': audio_stream.get('codec_name') if audio_stream else None
+    }
+
+
+def probe_video(path):
+    """
+    Probe a video's metadata with ffprobe
+
+    Returns:
+        dict: Result of get_video_info, or None if ffprobe cannot read the file
+    """
+    try:
+        return get_video_info(ffmpeg.probe(path))
+    except Exception:
+        return None
+
+
+def get_bits_per_pixel(info):
+    """Get the video bitrate per pixel per frame, or None if unknown"""
+    pixel_rate = info['width'] * info['height'] * info['fps']
+    if not info['bit_rate'] or not pixel_rate:
+        return None
+    return info['bit_rate'] / pixel_rate
+
+
+def choose_video_path(info, max_short_side=1080, max_long_side=1920, max_bits_per_pixel=0.15):
+    """
+    Decide how a video is converted to the output MP4
+
+    The video stream is copied when it is H.264 in a widely playable pixel
+    format, is at most 1080p (in either orientation, so portrait phone
+    recordings qualify) and its bits per pixel show it is already
+    compressed about as far as a re-encode would take it. The audio stream
+    is copied when it is AAC (or absent).
+
+    Args:
+        info (dict): Result of get_video_info
+        max_short_side (int): Shorter side allowed for a copy
+        max_long_side (int): Longer side allowed for a copy
+        max_bits_per_pixel (float): Highest bitrate per pixel per frame that is copied
+
+    Returns:
+        tuple: (str, str) - (Path: REMUX, ENCODE_AUDIO, ENCODE_VIDEO or ENCODE, Reason)
+    """
+    bits_per_pixel = get_bits_per_pixel(info)
+    if info['codec'] not in COPY_VIDEO_CODECS:
+        copy_video, reason = False, f"video codec {info['codec']}"
+    elif info['pix_fmt'] not in COPY_PIXEL_FORMATS:
+        copy_video, reason = False, f"pixel format {info['pix_fmt']}"
+    elif (min(info['width'], info['height']) > max_short_side
+          or max(info['width'], info['height']) > max_long_side):
+        copy_video, reason = False, f"{info['width']}x{info['height']} exceeds {max_long_side}x{max_short_side}"
+    elif bits_per_pixel is None:
+        copy_video, reason = False, "unknown bitrate"
+    elif bits_per_pixel > max_bits_per_pixel:
+        copy_video, reason = False, f"{bits_per_pixel:.3f} bits per pixel"
+    else:
+        copy_video, reason = True, f"H.264 {info['width']}x{info['height']} at {bits_per_pixel:.3f} bits per pixel"
+
+    copy_audio = info['audio_codec'] is None or info['audio_codec'] in COPY_AUDIO_CODECS
+    if copy_video:
+        return (REMUX if copy_audio else ENCODE_AUDIO), reason
+    return (ENCODE_VIDEO if copy_audio else ENCODE), reason
+
+
+def get_encode_work(info):
+    """Get the pixels an encode of the video processes, used to estimate encoding time"""
+    return info['width'] * info['height'] * info['fps'] * info['duration']
+
+
+def split_video(input_path, work_dir, segment_seconds, **run_args):
+    """
+    Split the video stream into segments at keyframes without re-encoding
+
+    Extra keyword arguments are passed to run_ffmpeg, as for the other helpers below.
+
+    Returns:
+        list: Segment paths in playback order
+    """
+    pattern = os.path.join(work_dir, 'source_%05d.mkv')
+    stream = ffmpeg.input(input_path)
+    stream = ffmpeg.output(stream, pattern, map='0:v:0', vcodec='copy', f='segment',
+                           segment_time=segment_seconds, reset_timestamps=1)
+    run_ffmpeg(stream, **run_args)
+    return sorted(glob.glob(os.path.join(work_dir, 'source_*.mkv')))
+
+
+def encode_video_segment(segment_path, output_path, width, height, crf=28, threads=0, **run_args):
+    """Encode one video segment with the same settings as a full encode"""
+    stream = ffmpeg.input(segment_path)
+    stream = ffmpeg.output(stream, output_path,
+                           vf=f'scale={width}:{height}',
+                           vcodec='libx264',
+                           crf=str(crf),
+                           preset='fast',
+                           threads=threads)
+    run_ffmpeg(stream, **run_args)
+
+
+def extract_audio(input_path, output_path, copy, **run_args):
+    """Write the audio track to an M4A file, copying it if it is already AAC"""
+    stream = ffmpeg.input(input_path)
+    stream = ffmpeg.output(stream, output_path, map='0:a:0', vn=None, acodec='copy' if copy else 'aac')
+    run_ffmpeg(stream, **run_args)
+
+
+def concat_segments(segment_paths, audio_path, output_path, work_dir, **run_args):
+    """Join encoded segments and the audio track into a faststart MP4 without re-encoding"""
+    list_path = os.path.join(work_dir, 'segments.txt')
+    with open(list_path, 'w', encoding='utf-8') as f:
+        for path in segment_paths:
+            escaped = path.replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+    video = ffmpeg.input(list_path, f='concat', safe=0)
+    streams = [video.video]
+    if audio_path:
+        streams.append(ffmpeg.input(audio_path).audio)
+    stream = ffmpeg.output(*streams, output_path, vcodec='copy', acodec='copy', movflags='+faststart')
+    run_ffmpeg(stream, **run_args)
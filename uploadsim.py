@@ -0,0 +1,130 @@
+"""
+Exercise the adaptive upload concurrency against a simulated S3.
+
+The stand-in models an uplink of fixed total bandwidth, a per-connection
+rate limit and request latency, and answers SlowDown once too many
+uploads run at once. Nothing is sent over the network.
+
+    python uploadsim.py --uplink-mbps 40 --throttle-above 12
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from boto3.exceptions import S3UploadFailedError
+from botocore.exceptions import ClientError
+from PyQt6.QtCore import QCoreApplication, QTimer
+from managers.upload_concurrency import AdaptiveConcurrency
+from managers.upload_manager import UploadManager
+from managers.upload_scheduler import UploadScheduler
+
+
+class SimulatedS3:
+    """Drop-in for S3Transfer.upload_file with injected latency and throttling"""
+
+    def __init__(self, uplink_mbps, connection_mbps, latency, throttle_above):
+        self.uplink = uplink_mbps * 1024 * 1024 / 8
+        self.connection = connection_mbps * 1024 * 1024 / 8
+        self.latency = latency
+        self.throttle_above = throttle_above
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def upload_file(self, filename, bucket, key, callback=None, extra_args=None):
+        with self._lock:
+            self.in_flight += 1
+            concurrent = self.in_flight
+        try:
+            time.sleep(self.latency * random.uniform(0.8, 1.2))
+            if concurrent > self.throttle_above and random.random() < 0.5:
+                try:
+                    raise ClientError(
+                        {'Error': {'Code': 'SlowDown', 'Message': 'Please reduce your request rate.'},
+                         'ResponseMetadata': {'HTTPStatusCode': 503}},
+                        'PutObject'
+                    )
+                except ClientError as e:
+                    raise S3UploadFailedError(f"Failed to upload {filename} to {bucket}/{key}: {e}")
+            size = os.path.getsize(filename)
+            rate = min(self.connection, self.uplink / concurrent)
+            time.sleep(size / rate)
+            if callback:
+                callback(size)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class SimulatedUploadManager(UploadManager):
+    def __init__(self, s3, concurrency):
+        super().__init__()
+        self._transfer = s3
+        self._concurrency = concurrency
+        self._bucket_name = 'simulated-bucket'
+
+    def get_cloudfront_url(self, object_name):
+        return f"https://cdn.invalid/{self.get_s3_key(object_name)}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=400)
+    parser.add_argument('--file-kb', type=int, default=512)
+    parser.add_argument('--uplink-mbps', type=float, default=40)
+    parser.add_argument('--connection-mbps', type=float, default=8)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--throttle-above', type=int, default=12)
+    parser.add_argument('--max-concurrent', type=int, default=32)
+    parser.add_argument('--window', type=float, default=0.5)
+    args = parser.parse_args()
+
+    app = QCoreApplication([])
+    s3 = SimulatedS3(args.uplink_mbps, args.connection_mbps, args.latency, args.throttle_above)
+    concurrency = AdaptiveConcurrency(maximum=args.max_concurrent, initial=2, window=args.window)
+    upload_manager = SimulatedUploadManager(s3, concurrency)
+    scheduler = UploadScheduler(upload_manager)
+    scheduler.pool.setMaxThreadCount(args.max_concurrent)
+
+    with tempfile.TemporaryDirectory() as directory:
+        items = []
+        for i in range(args.files):
+            path = os.path.join(directory, f"file_{i}.bin")
+            with open(path, 'wb') as f:
+                f.truncate(args.file_kb * 1024)
+            items.append({'path': path, 'type': 'image', 'filesize': args.file_kb * 1024})
+
+        history = []
+        started = time.monotonic()
+        finished = []
+
+        def on_finished(item):
+            finished.append(item)
+            if len(finished) == len(items):
+                app.quit()
+
+        def sample():
+            history.append((time.monotonic() - started, concurrency.limit, s3.in_flight))
+            QTimer.singleShot(250, sample)
+
+        scheduler.upload_finished.connect(on_finished)
+        for item in items:
+            scheduler.submit(item)
+        sample()
+        app.exec()
+
+    elapsed = time.monotonic() - started
+    for t, limit, in_flight in history:
+        print(f"{t:6.2f}s  limit {limit:3d}  in flight {in_flight:3d}")
+    stats = scheduler.get_stats()
+    ideal = min(args.throttle_above, args.uplink_mbps / args.connection_mbps)
+    print(f"\n{stats['completed']} uploaded, {stats['failed']} failed in {elapsed:.1f}s, "
+          f"{stats['uploaded_bytes'] / elapsed / (1024 * 1024) * 8:.1f} Mbit/s")
+    print(f"Throttle events: {concurrency.throttle_count}, final limit {concurrency.limit}, "
+          f"best {concurrency.best_limit} (uplink saturates at about {ideal:.0f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark whole-file versus segment-parallel video encoding.
+
+Encodes a video once as a single ffmpeg process using every core, then
+splits it at keyframes, encodes the segments in parallel with --workers
+ffmpeg processes of --threads threads each and joins them, and reports the
+wall time of both. Without --input, a synthetic test clip is generated
+first with ffmpeg's testsrc2 source.
+
+    python videobench.py --input "D:\\Vault\\attachments\\lecture.mov" --workers 4 --threads 2
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+import ffmpeg
+from managers.video_compressor import (
+    concat_segments, encode_video_segment, extract_audio, get_video_info, split_video
+)
+
+
+def generate_clip(path, seconds):
+    """Create a 1080p test clip with a sine-tone AAC track"""
+    video = ffmpeg.input(f'testsrc2=size=1920x1080:rate=30:duration={seconds}', f='lavfi')
+    audio = ffmpeg.input(f'sine=frequency=440:duration={seconds}', f='lavfi')
+    stream = ffmpeg.output(video, audio, path, vcodec='libx264', preset='ultrafast', acodec='aac', g=60)
+    ffmpeg.run(stream, overwrite_output=True, capture_stdout=True, capture_stderr=True)
+
+
+def encode_whole(input_path, output_path, width, height, crf):
+    """Encode the whole file in one ffmpeg process and return the elapsed time"""
+    started = time.perf_counter()
+    stream = ffmpeg.input(input_path)
+    stream = ffmpeg.output(stream, output_path, vf=f'scale={width}:{height}', vcodec='libx264',
+                           crf=str(crf), preset='fast', acodec='aac', movflags='+faststart')
+    ffmpeg.run(stream, capture_stdout=True, capture_stderr=True)
+    return time.perf_counter() - started
+
+
+def encode_segmented(input_path, output_path, work_dir, width, height, crf, segment_seconds, workers, threads,
+                     has_audio):
+    """Split, encode the segments in parallel and join them; return (elapsed, segment count)"""
+    started = time.perf_counter()
+    segments = split_video(input_path, work_dir, segment_seconds)
+    audio_path = None
+    if has_audio:
+        audio_path = os.path.join(work_dir, 'audio.m4a')
+        extract_audio(input_path, audio_path, copy=False)
+    encoded = [os.path.join(work_dir, f"encoded_{i:05d}.mp4") for i in range(len(segments))]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(encode_video_segment, segment, output, width, height, crf, threads)
+            for segment, output in zip(segments, encoded)
+        ]
+        for future in futures:
+            future.result()
+    concat_segments(encoded, audio_path, output_path, work_dir)
+    return time.perf_counter() - started, len(segments)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--input', help="Video to encode")
+    parser.add_argument('--seconds', type=int, default=240, help="Length of the synthetic clip without --input")
+    parser.add_argument('--segment-seconds', type=int, default=60)
+    parser.add_argument('--workers', type=int, default=4, help="Segments encoded at once")
+    parser.add_argument('--threads', type=int, default=max(1, (os.cpu_count() or 1) // 4),
+                        help="ffmpeg threads per segment")
+    parser.add_argument('--crf', type=int, default=28)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='videobench_')
+    try:
+        input_path = args.input
+        if not input_path:
+            input_path = os.path.join(work_dir, 'input.mp4')
+            print(f"Generating a {args.seconds}s 1080p clip...")
+            generate_clip(input_path, args.seconds)
+
+        info = get_video_info(ffmpeg.probe(input_path))
+        scale = min(1.0, 1080 / max(info['width'], info['height']))
+        width = int(info['width'] * scale) // 2 * 2
+        height = int(info['height'] * scale) // 2 * 2
+        print(f"{info['width']}x{info['height']}, {info['duration']:.0f}s -> {width}x{height}\n")
+
+        whole_time = encode_whole(input_path, os.path.join(work_dir, 'whole.mp4'), width, height, args.crf)
+        print(f"whole      {whole_time:7.2f}s  1 process, all cores")
+
+        segment_dir = os.path.join(work_dir, 'segments')
+        os.makedirs(segment_dir)
+        segmented_time, count = encode_segmented(
+            input_path, os.path.join(work_dir, 'segmented.mp4'), segment_dir, width, height, args.crf,
+            args.segment_seconds, args.workers, args.threads, info['audio_codec'] is not None
+        )
+        print(f"segmented  {segmented_time:7.2f}s  {count} segments, {args.workers} x {args.threads} threads "
+              f"({whole_time / segmented_time:.2f}x)")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()